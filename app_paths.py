@@ -0,0 +1,42 @@
+import hashlib
+import itertools
+import os
+import sys
+import time
+
+APP_NAME = "AutoEPBM"
+
+
+def data_dir(*parts):
+    """Per-user directory for AutoEPBM's caches and logs, created on first use."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    path = os.path.join(base, APP_NAME, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def account_file_name(username, portal_url, suffix):
+    """File name for one account on one portal, shared by its caches; it doesn't reveal whose it is."""
+    digest = hashlib.sha256(f"{username.lower()}\n{portal_url.rstrip('/')}".encode()).hexdigest()
+    return digest[:32] + suffix
+
+
+def create_timestamped(directory, prefix, suffix):
+    """Create and open a new file named after the current time, down to the millisecond.
+
+    Another file of the same millisecond gets a counter instead of being
+    overwritten.
+    """
+    now = time.time()
+    name = f"{prefix}-{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now % 1 * 1000):03d}"
+    for number in itertools.count():
+        path = os.path.join(directory, f"{name}-{number}{suffix}" if number else name + suffix)
+        try:
+            return open(path, "x", encoding="utf-8")
+        except FileExistsError:
+            continue
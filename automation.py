@@ -0,0 +1,378 @@
+import threading
+
+from portal import STANDARD_PROFILE, add_cookies, create_driver, login, open_epbm_detail
+from portal_pages import BY_CSS, PORTAL_URL, SELENIUM_ENGINE
+from log_file import prefixed_log
+from page_filler import click_button, fill_page
+from pipeline import CourseQueue
+from questionnaire import compile_questionnaire
+from recovery import BROWSER_LOST, ELEMENT, PAGE, SESSION, SESSION_EXPIRED, RecoveryPolicy, SessionExpired, classify
+from timing import timed
+from waits import DEFAULT_POLL_INTERVAL, Waiter, WaitTimeout, button_text, heading_changed, present, url_changed
+
+# A save request may take a while on a busy portal, leaving early would cut it off
+SAVE_TIMEOUT = 10
+
+
+def saved_conditions(form_url):
+    """Anything the portal may show once it has answered a save of the form at form_url.
+
+    The last page has no ratings, so their absence says nothing; leaving
+    the form's URL does, as the portal only navigates once the save is in.
+    """
+    return {
+        'modal': present(".modal-dialog"),
+        'toast': present(".toast, .b-toast, .swal2-popup, .alert-success"),
+        'left_form': url_changed(form_url),
+        'rejected': present(".alert-danger"),
+    }
+
+
+def js_click(driver, element):
+    """Click the element from a script, past whatever covers it."""
+    if hasattr(element, 'call'):
+        # A DevTools element can't go into a script's arguments, it runs the click on itself
+        element.call("function () { this.click(); }")
+    else:
+        driver.execute_script("arguments[0].click();", element)
+
+
+def quit_driver(driver, log):
+    # A lost browser may fail to quit in ways of its own, e.g. its chromedriver is gone too
+    try:
+        driver.quit()
+    except Exception as e:
+        log(f"Gagal menutup browser: {e}")
+
+
+class CourseFiller:
+    """Fills EPBM forms one course at a time in a single logged-in browser."""
+
+    def __init__(self, driver, settings, log, progress, credentials=None, questionnaire=None, timer=None,
+                 journal=None):
+        self.driver = driver
+        self.settings = settings
+        self.log = log
+        self.progress = progress
+        self.credentials = credentials
+        self.waiter = Waiter(driver, settings.get('poll_interval', DEFAULT_POLL_INTERVAL))
+        self.questionnaire = questionnaire or compile_questionnaire(settings)
+        self.timer = timer
+        self.journal = journal
+        self.recovery = RecoveryPolicy(log, timer)
+
+    def wait(self, timeout, **conditions):
+        # Like Waiter.until, but a timeout just lets the caller carry on
+        try:
+            return self.waiter.until(timeout, **conditions)
+        except WaitTimeout:
+            return None
+
+    def open_form(self, href):
+        """Open a course's form from its link and wait until it is rendered."""
+        self.recovery.attempt(lambda: self.driver.get(href), PAGE)
+        outcome = self.wait(5, form=present(".b-rating"), save=button_text("Simpan EPBM"), login=present("#Username"))
+        if outcome == 'login':
+            raise SessionExpired("Halaman login muncul saat membuka form.")
+        return outcome in ('form', 'save')
+
+    def recover(self, kind):
+        """Recovery for a whole course: log in again when the session expired, a lost browser is for the pool."""
+        if kind == SESSION_EXPIRED:
+            if self.credentials is None:
+                return False
+            with timed(self.timer, "login"):
+                login(self.driver, self.credentials, self.log)
+        return kind != BROWSER_LOST
+
+    def log_page(self, result):
+        if result['heading']:
+            self.log(f"Mengisi halaman: {result['heading']}")
+        if result['ratings'] and not result['known_page']:
+            self.questionnaire.report_unknown(result['heading'], self.log)
+        if result['ratings']:
+            self.log(f"Mengisi {result['ratings']} pertanyaan...")
+            if result['rated'] < result['ratings']:
+                self.log(f"Gagal mengklik {result['ratings'] - result['rated']} rating")
+        if result['textareas']:
+            self.log("Mengisi saran untuk dosen...")
+        if result['checkboxes']:
+            self.log("Mengklik checkbox pernyataan...")
+
+    def fill_course(self, course, position, total):
+        """Fill one course's form, returns whether it was saved.
+
+        Errors the recovery policy can't get past fail just this course,
+        except a lost browser, which is raised for the BrowserPool to
+        start a new one.
+        """
+        try:
+            if not course.get('href'):
+                self.log(f"Error: Tautan untuk {course['title']}: {course['desc']} tidak ditemukan. Melewati...")
+                return False
+
+            self.log(f"\nMengisi EPBM untuk {course['title']}: {course['desc']} ({position}/{total})")
+
+            # Sarana Prasarana is a single page, regular courses have several;
+            # both go through the same page loop with their own plan
+            if course['is_sarpras']:
+                self.log("Mengisi kuesioner Sarana dan Prasarana...")
+
+            return self.recovery.attempt(lambda: self.fill_form(course), SESSION, course, recover=self.recover)
+        except Exception as e:
+            if classify(e) == BROWSER_LOST:
+                raise
+            # The next course opens from its own link, so there is no page to go back to
+            self.log(f"Terjadi error saat mengisi EPBM: {str(e)}")
+
+            # Don't show stacktrace in the log to keep it clean
+            if "Stacktrace:" in str(e):
+                self.log("Error tersebut umum terjadi dan biasanya tidak mempengaruhi hasil pengisian.")
+            return False
+        finally:
+            # Pages that were skipped still count as done for this course
+            self.progress.course_done(course)
+
+    def fill_form(self, course):
+        """One go at a course's form, from opening it to saving it."""
+        # Open the form straight from the link captured during the scan,
+        # no need to go through the Detail page and click the card
+        with timed(self.timer, "open_form", course):
+            opened = self.open_form(course['href'])
+        if opened:
+            self.log("Halaman form EPBM telah dimuat.")
+        else:
+            self.log("Timeout pada loading halaman, mencoba melanjutkan...")
+
+        plan = self.questionnaire.plan(course['is_sarpras'])
+        page = 0
+        while True:
+            # Fill the whole page, and go to the next one, in a single call
+            with timed(self.timer, "page", course):
+                result = self.recovery.attempt(lambda: fill_page(self.driver, plan), PAGE, course)
+            self.log_page(result)
+            self.progress.page_done(course)
+            page += 1
+            if self.journal is not None:
+                self.journal.page_done(course, page)
+
+            # Check if there's a "Simpan EPBM" button (final page)
+            if result['save']:
+                self.log("Halaman terakhir terdeteksi.")
+                saved = self.save(course)
+                if saved and self.journal is not None:
+                    self.journal.saved(course)
+                return saved
+
+            if not result['clicked_next']:
+                self.log("Tidak menemukan tombol Selanjutnya atau Simpan EPBM.")
+                return False
+
+            # Continue as soon as the next page is shown
+            self.log("Menuju halaman selanjutnya...")
+            with timed(self.timer, "next_page", course):
+                self.wait(3, next_page=heading_changed(result['heading']), save=button_text("Simpan EPBM"))
+
+    def save(self, course):
+        driver = self.driver
+        is_sarpras = course['is_sarpras']
+        try:
+            self.log("Menyimpan EPBM Sarana dan Prasarana..." if is_sarpras else "Menyimpan EPBM...")
+            with timed(self.timer, "save", course):
+                form_url = driver.current_url
+                if not click_button(driver, "Simpan EPBM"):
+                    self.log("Tombol Simpan EPBM tidak ditemukan, EPBM tidak tersimpan.")
+                    return False
+
+                # Stop waiting as soon as the portal reacts to the save
+                reaction = self.wait(SAVE_TIMEOUT, **saved_conditions(form_url))
+
+            if reaction == 'rejected':
+                self.log("Portal menolak penyimpanan EPBM.")
+                return False
+
+            # Handling modals that may appear after saving
+            if reaction == 'modal':
+                self.log("Dialog modal terdeteksi setelah menyimpan")
+
+                # Find and click any button in the modal
+                with timed(self.timer, "modal", course):
+                    modal_buttons = driver.find_elements(BY_CSS,
+                                                         ".modal-footer button, .modal button.btn, .modal .close")
+                    if modal_buttons:
+                        # A JS click when the native click is intercepted
+                        self.recovery.attempt(
+                            modal_buttons[0].click, ELEMENT, course,
+                            fallback=lambda: js_click(driver, modal_buttons[0]))
+                        self.log("Mengklik tombol pada modal dialog")
+
+            # The wait only makes sure the save went out before the next course
+            # is opened from its own link; the Detail page confirms it once all
+            # courses are done (see verification)
+            if reaction:
+                self.log("EPBM Sarana dan Prasarana berhasil disimpan!" if is_sarpras else "EPBM berhasil disimpan!")
+            else:
+                self.log("Portal belum merespons penyimpanan, dipastikan setelah semua mata kuliah selesai.")
+            return reaction is not None
+        except Exception as e:
+            # Never retried, the portal may have taken the save before the error;
+            # the next course still opens from its own link
+            self.log(f"Terjadi error saat simpan: {str(e)}")
+
+            # If error has stacktrace, don't show it in the log
+            if "Stacktrace:" in str(e):
+                self.log("Error tersebut umum terjadi dan biasanya tidak mempengaruhi hasil pengisian.")
+            return False
+
+
+class BrowserPool:
+    """Browsers taking courses from a shared CourseQueue until it is closed.
+
+    Only the first browser logs in; the others start right away and wait
+    until share_cookies hands them its session, so they can start while
+    the first one is still logging in or scanning. A browser that crashes
+    or disconnects is replaced by a new one with the same cookies, which
+    retries the course it was filling.
+    """
+
+    def __init__(self, credentials, settings, course_queue, log, progress, questionnaire=None, timer=None,
+                 journal=None):
+        self.credentials = credentials
+        self.settings = settings
+        self.course_queue = course_queue
+        self.log = log
+        self.progress = progress
+        self.questionnaire = questionnaire or compile_questionnaire(settings)
+        self.timer = timer
+        self.journal = journal
+        # position: whether the course was saved
+        self.saved = {}
+        self.cookies = None
+        self.cookies_ready = threading.Event()
+
+    def share_cookies(self, cookies):
+        """Let the waiting browsers in with these cookies, None sends them home. Only the first call counts."""
+        if not self.cookies_ready.is_set():
+            self.cookies = cookies
+            self.cookies_ready.set()
+
+    def start(self, numbers):
+        """Start a browser thread for each number, returns the threads."""
+        threads = [threading.Thread(target=self.work, args=(number,), daemon=True) for number in numbers]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def work(self, number, driver=None):
+        """Fill courses from the queue, in a new browser unless an already logged-in driver is given.
+
+        A lone browser is numbered None, its log lines go without prefix.
+        Returns the browser in use at the end: the given driver, or the one
+        that replaced it when it was lost, which the caller quits. Browsers
+        started without a given driver are quit here.
+        """
+        settings = self.settings
+        timer = self.timer
+        portal_url = settings.get('portal_url', PORTAL_URL)
+        worker_log = prefixed_log(self.log, f"[Browser {number}]") if number is not None else self.log
+        recovery = RecoveryPolicy(worker_log, timer)
+        # The browsers this worker started itself, a given driver is left to its owner
+        started = []
+        filler = None
+        current = driver
+
+        def start_browser():
+            worker_log("Menginisialisasi Chrome driver...")
+            with timed(timer, "driver_start"):
+                started.append(create_driver(settings['headless'], settings.get('browser_profile', STANDARD_PROFILE),
+                                             portal_url, settings.get('user_data_dir'),
+                                             settings.get('engine', SELENIUM_ENGINE)))
+            self.cookies_ready.wait()
+            if self.cookies is None:
+                return None
+            add_cookies(started[-1], self.cookies, portal_url)
+            open_epbm_detail(started[-1], self.credentials, worker_log, portal_url, timer)
+            return started[-1]
+
+        def use(new_driver):
+            nonlocal filler, current
+            current = new_driver
+            new_driver.set_page_load_timeout(15)
+            filler = CourseFiller(new_driver, settings, worker_log, self.progress, self.credentials,
+                                  self.questionnaire, timer, self.journal)
+
+        def restart(kind):
+            worker_log("Memulai browser baru...")
+            new_driver = start_browser()
+            if new_driver is None:
+                return False
+            # The browser it replaces is gone or logged out, whoever started it
+            lost = current
+            use(new_driver)
+            quit_driver(lost, worker_log)
+            return True
+
+        given = driver is not None
+        try:
+            if driver is None:
+                driver = start_browser()
+                if driver is None:
+                    return None
+            use(driver)
+            while True:
+                item = self.course_queue.get()
+                if item is None:
+                    return current if given else None
+                position, course = item
+                with timed(timer, "course", course):
+                    self.saved[position] = recovery.attempt(
+                        lambda: filler.fill_course(course, position, self.course_queue.count), SESSION, course,
+                        recover=restart)
+        except Exception as e:
+            worker_log(f"Browser berhenti karena error: {e}")
+            return current if given else None
+        finally:
+            for started_driver in started:
+                if given and started_driver is current:
+                    continue
+                quit_driver(started_driver, worker_log)
+
+
+def fill_courses_parallel(driver, credentials, settings, courses, workers, log, progress, questionnaire=None,
+                          timer=None, journal=None):
+    """Fill courses with several browsers that take work from a shared queue.
+
+    The already logged-in driver is used as the first browser, the others
+    start with its cookies so they don't have to log in again. Returns
+    whether each course was saved, in the order of the courses, and the
+    first browser's driver, a new one when the given driver was lost.
+    """
+    course_queue = CourseQueue(courses)
+    course_queue.close()
+    pool = BrowserPool(credentials, settings, course_queue, log, progress, questionnaire, timer, journal)
+    pool.share_cookies(driver.get_cookies())
+
+    if workers > 1:
+        log(f"Menjalankan {workers} browser secara paralel...")
+    threads = pool.start(range(2, workers + 1))
+    driver = pool.work(1 if workers > 1 else None, driver)
+    for thread in threads:
+        thread.join()
+
+    # Courses left behind when every browser failed
+    for position, course in course_queue.drain():
+        log(f"Tidak terisi: {course['title']}: {course['desc']}")
+    return [pool.saved.get(position, False) for position in range(1, len(courses) + 1)], driver
+
+
+def fill_courses(driver, credentials, settings, courses, log, progress, questionnaire=None, timer=None, journal=None):
+    """Fill the courses with the logged-in driver, adding parallel browsers when the settings ask for them.
+
+    Returns whether each course was saved, in the order of the courses, and
+    the driver to go on with, which replaced the given one if it was lost.
+    """
+    workers = max(1, min(settings.get('workers', 1), len(courses)))
+    # Each browser takes the next course from a shared queue; a single browser
+    # goes through the same pool, so it is replaced as well when it crashes
+    return fill_courses_parallel(driver, credentials, settings, courses, workers, log, progress,
+                                 questionnaire, timer, journal)
@@ -0,0 +1,231 @@
+"""Scan and fill EPBM for many accounts in a bounded pool.
+
+A manifest lists the accounts, as CSV with one row per account:
+
+    username,password_env,engine,workers,courses,dosen_feedback
+    G64190001,PW_G64190001,http,4,,3
+    G64190002,PW_G64190002,selenium,1,KOM201;KOM202,
+
+or as JSON, either a list of account configs or an object with "defaults"
+shared by every account and the "accounts" list. An account config takes
+the keys of run_config; in CSV, rating columns go into "ratings" and
+course patterns are separated by ";".
+
+Each account runs in its own thread with its own browser profiles, which
+are removed when the account is done. The pool size defaults to what the
+machine's CPUs and free memory can carry.
+"""
+
+import csv
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app_paths import create_timestamped, data_dir
+from log_file import prefixed_log
+from portal_pages import HTTP_ENGINE, LoginError
+from questionnaire import load_schema, rating_keys
+from run_config import ConfigError, build_settings, credentials_from, select_courses
+
+BATCH_DIR = "batch"
+
+# Rough footprint of one headless Chrome filling forms, and the share of free memory the pool may use
+BROWSER_MEMORY_MB = 350
+MEMORY_BUDGET = 0.8
+HTTP_ACCOUNTS_PER_CPU = 4
+MAX_HTTP_POOL = 32
+
+TRUE_VALUES = {"1", "true", "yes", "ya", "y"}
+RESULT_FIELDS = ['username', 'status', 'scanned', 'selected', 'saved', 'seconds', 'message']
+
+
+def parse_csv_row(row, ratings):
+    config = {}
+    for key, value in row.items():
+        key = (key or "").strip().lower()
+        value = (value or "").strip()
+        if not key or not value:
+            continue
+        if key in ratings or key == 'workers':
+            try:
+                value = int(value)
+            except ValueError:
+                raise ConfigError(f"Nilai {key} harus bilangan bulat, bukan {value!r}.")
+        if key in ratings:
+            config.setdefault('ratings', {})[key] = value
+        elif key in ('headless', 'remember_session'):
+            config[key] = value.lower() in TRUE_VALUES
+        elif key == 'courses':
+            config[key] = [pattern.strip() for pattern in value.split(";") if pattern.strip()]
+        else:
+            config[key] = value
+    return config
+
+
+def load_manifest(path, schema=None):
+    """The account configs of a CSV or JSON manifest, with the manifest's defaults applied."""
+    schema = schema or load_schema()
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            if path.lower().endswith(".csv"):
+                ratings = set(rating_keys(schema))
+                return [parse_csv_row(row, ratings) for row in csv.DictReader(f)]
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"Gagal membaca manifest {path}: {e}") from e
+
+    if isinstance(manifest, list):
+        manifest = {'accounts': manifest}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('accounts'), list):
+        raise ConfigError(f"Manifest {path} harus berupa daftar akun atau objek dengan 'accounts'.")
+    defaults = manifest.get('defaults', {})
+    accounts = []
+    for account in manifest['accounts']:
+        config = dict(defaults)
+        config.update(account)
+        if isinstance(defaults.get('ratings'), dict) and isinstance(account.get('ratings'), dict):
+            config['ratings'] = {**defaults['ratings'], **account['ratings']}
+        accounts.append(config)
+    return accounts
+
+
+def prepare_accounts(configs, schema=None):
+    """Check every account before anything runs, so a typo doesn't stop the batch halfway."""
+    schema = schema or load_schema()
+    accounts = []
+    for number, config in enumerate(configs, 1):
+        try:
+            accounts.append((config, credentials_from(config), build_settings(config, schema)))
+        except ConfigError as e:
+            raise ConfigError(f"Akun ke-{number} ({config.get('username', '?')}): {e}") from e
+    usernames = [credentials['username'] for _, credentials, _ in accounts]
+    duplicates = sorted({name for name in usernames if usernames.count(name) > 1})
+    if duplicates:
+        raise ConfigError(f"Akun ganda di manifest: {', '.join(duplicates)}")
+    return accounts
+
+
+def available_memory_mb():
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        # Not available on Windows and macOS
+        return None
+
+
+def default_pool_size(accounts):
+    """How many accounts run at once, bounded by the CPUs and the free memory."""
+    cpus = os.cpu_count() or 2
+    browsers = max((settings['workers'] for _, _, settings in accounts if settings['engine'] != HTTP_ENGINE), default=0)
+    if not browsers:
+        # HTTP accounts mostly wait on the network
+        return max(1, min(MAX_HTTP_POOL, cpus * HTTP_ACCOUNTS_PER_CPU, len(accounts)))
+
+    # Each browser keeps about one CPU busy while a page loads
+    size = max(1, cpus // browsers)
+    memory = available_memory_mb()
+    if memory:
+        size = min(size, max(1, int(memory * MEMORY_BUDGET) // (BROWSER_MEMORY_MB * browsers)))
+    return max(1, min(size, len(accounts)))
+
+
+def safe_name(username):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", username)
+
+
+def run_account(config, credentials, settings, log, dry_run=False):
+    """Scan and fill one account, returns its result row."""
+    from runner import fill_selected_courses, open_journal, scan_with_settings
+
+    started = time.perf_counter()
+    result = {'username': credentials['username'], 'status': "failed", 'scanned': 0, 'selected': 0,
+              'saved': 0, 'seconds': 0.0, 'message': ""}
+    settings = dict(settings)
+    if settings['engine'] != HTTP_ENGINE:
+        settings['user_data_dir'] = tempfile.mkdtemp(prefix=f"epbm-{safe_name(credentials['username'])}-")
+    session = None
+    try:
+        # A batch started again picks up every account where its last run stopped
+        journal, resumed = open_journal(credentials, settings, log, resume=not dry_run)
+        if resumed is not None:
+            journal.resume(resumed)
+            courses = selected = resumed
+        else:
+            courses, session = scan_with_settings(credentials, settings, log, keep_session=not dry_run)
+            selected = select_courses(courses, config.get('courses', ()))
+        result.update(scanned=len(courses), selected=len(selected))
+        if not courses:
+            result['message'] = "Tidak ada mata kuliah yang ditemukan."
+        elif not selected:
+            result.update(status="ok", message="Tidak ada mata kuliah yang perlu diisi.")
+        elif dry_run:
+            result.update(status="ok", message=", ".join(course['title'] for course in selected))
+        else:
+            if resumed is None:
+                journal.start(selected)
+            session, claimed = None, session
+            saved = sum(bool(ok) for ok in fill_selected_courses(
+                credentials, settings, selected, log, lambda percent, eta: None, claimed, journal=journal))
+            result['saved'] = saved
+            result['status'] = "ok" if saved == len(selected) else "partial" if saved else "failed"
+    except LoginError as e:
+        result.update(status="login_failed", message=str(e))
+    except Exception as e:
+        result['message'] = f"Error: {e}"
+    finally:
+        if session is not None:
+            session.close()
+        if settings.get('user_data_dir'):
+            shutil.rmtree(settings['user_data_dir'], ignore_errors=True)
+    result['seconds'] = round(time.perf_counter() - started, 2)
+    return result
+
+
+def run_batch(accounts, log, pool_size=None, dry_run=False, on_result=None):
+    """Run every prepared account in a bounded pool, returns the results in manifest order."""
+    pool_size = pool_size or default_pool_size(accounts)
+    log(f"Menjalankan {len(accounts)} akun, {pool_size} sekaligus...")
+    lock = threading.Lock()
+
+    def run(account):
+        config, credentials, settings = account
+        result = run_account(config, credentials, settings, prefixed_log(log, f"[{credentials['username']}]"),
+                             dry_run)
+        if on_result is not None:
+            with lock:
+                on_result(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="account") as pool:
+        return list(pool.map(run, accounts))
+
+
+def summary_lines(results, seconds):
+    statuses = {}
+    for result in results:
+        statuses[result['status']] = statuses.get(result['status'], 0) + 1
+    saved = sum(result['saved'] for result in results)
+    rate = len(results) / seconds * 3600 if seconds > 0 else 0.0
+    return [
+        f"{len(results)} akun selesai dalam {seconds:.1f} dtk (~{rate:.0f} akun/jam), {saved} EPBM tersimpan.",
+        ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())),
+    ]
+
+
+def export_results(results, directory=None):
+    """Write the per-account results as JSON and CSV, returns both paths."""
+    directory = directory or data_dir(BATCH_DIR)
+    with create_timestamped(directory, "batch", ".json") as f:
+        json_path = f.name
+        json.dump(results, f, indent=2)
+    csv_path = os.path.splitext(json_path)[0] + ".csv"
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+    return json_path, csv_path
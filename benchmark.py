@@ -0,0 +1,242 @@
+"""End-to-end benchmark of the filling engines against the local mock portal.
+
+    python benchmark.py --courses 10 --latency 0.1 --modes http:1 http:4 browser:1 browser-fast:4
+
+A mode is ``<engine>:<workers>`` with the engine ``http``, ``browser``,
+``browser-fast`` (the fast browser profile) or ``browser-cdp`` (Chrome over
+DevTools without chromedriver, its commands counted are DevTools commands).
+Every run gets a fresh mock portal and goes through the same steps as the
+app with that engine: scan the Detail page, over HTTP for the HTTP modes
+and with Chrome for the others, then fill every course that is not filled
+yet. The time per form is the fill time divided by the forms, an average
+across all workers rather than how long one form takes.
+"""
+
+import argparse
+import collections
+import json
+import statistics
+import threading
+import time
+
+from http_engine import HttpPortal, fill_courses_http
+from mock_portal import DEFAULT_PASSWORD, DEFAULT_USERNAME, MockPortal, MockPortalConfig
+from portal_pages import CDP_ENGINE, HTTP_ENGINE, SELENIUM_ENGINE, parse_course_cards
+from progress import ProgressTracker
+from questionnaire import compile_questionnaire, load_schema, setting_keys
+from timing import RunTimer
+
+ENGINES = ("http", "browser", "browser-fast", "browser-cdp")
+
+
+class CommandCounter:
+    """Counts the WebDriver commands, or DevTools commands for cdp, sent by every driver in this process."""
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.lock = threading.Lock()
+        self.installed = set()
+
+    def count(self, command):
+        with self.lock:
+            self.counts[command] += 1
+
+    def install(self, engine=SELENIUM_ENGINE):
+        if engine in self.installed:
+            return
+        counter = self
+        if engine == CDP_ENGINE:
+            from cdp_driver import CdpConnection
+
+            original_send = CdpConnection.send
+
+            async def send(connection, method, params=None):
+                counter.count(method)
+                return await original_send(connection, method, params)
+
+            CdpConnection.send = send
+        else:
+            from selenium.webdriver.remote.webdriver import WebDriver
+
+            original = WebDriver.execute
+
+            def execute(driver, driver_command, params=None):
+                counter.count(driver_command)
+                return original(driver, driver_command, params)
+
+            WebDriver.execute = execute
+        self.installed.add(engine)
+
+    def reset(self):
+        with self.lock:
+            self.counts.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+
+def parse_mode(text):
+    engine, _, workers = text.partition(":")
+    if engine not in ENGINES:
+        raise argparse.ArgumentTypeError(f"mesin tidak dikenal: {engine} (pilihan: {', '.join(ENGINES)})")
+    try:
+        workers = int(workers or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"jumlah worker tidak valid: {text}")
+    return engine, max(1, workers)
+
+
+def benchmark_settings(portal_url, engine, workers):
+    settings = {key: 4 for key in setting_keys(load_schema())}
+    settings.update({
+        'saran_dosen': "Terima kasih atas pengajarannya.",
+        'headless': True,
+        'engine': {"http": HTTP_ENGINE, "browser-cdp": CDP_ENGINE}.get(engine, SELENIUM_ENGINE),
+        'browser_profile': "fast" if engine == "browser-fast" else "standard",
+        'workers': workers,
+        'portal_url': portal_url,
+    })
+    return settings
+
+
+def pending(courses):
+    return [course for course in courses if not course['is_completed']]
+
+
+def run_http(mock, settings, credentials, questionnaire, log, timer):
+    started = time.perf_counter()
+    portal = HttpPortal(mock.url)
+    root = portal.open_epbm_detail(credentials, log, timer)
+    with timer.span("scan"):
+        courses = pending(parse_course_cards(root, portal.detail_url))
+    scanned = time.perf_counter()
+
+    # Hand the scan's cookies over, like the app does with the scan browser's
+    cookies = portal.cookies()
+    progress = ProgressTracker(courses, questionnaire, lambda percent, eta: None)
+    fill_courses_http(credentials, settings, courses, log, progress, cookies, questionnaire, timer)
+    return courses, scanned - started, time.perf_counter() - scanned
+
+
+def run_browser(mock, settings, credentials, questionnaire, log, timer):
+    from automation import fill_courses
+    from portal import create_driver, open_epbm_detail, read_course_cards
+
+    started = time.perf_counter()
+    with timer.span("driver_start"):
+        driver = create_driver(True, settings['browser_profile'], mock.url, engine=settings['engine'])
+    try:
+        open_epbm_detail(driver, credentials, log, mock.url, timer)
+        with timer.span("scan"):
+            courses = pending(read_course_cards(driver))
+        scanned = time.perf_counter()
+
+        progress = ProgressTracker(courses, questionnaire, lambda percent, eta: None)
+        _, driver = fill_courses(driver, credentials, settings, courses, log, progress, questionnaire, timer)
+        return courses, scanned - started, time.perf_counter() - scanned
+    finally:
+        driver.quit()
+
+
+def run_mode(engine, workers, args, counter):
+    config = MockPortalConfig(courses=args.courses, completed=args.completed, sarpras=not args.no_sarpras,
+                              lecturers=args.lecturers, latency=args.latency, jitter=args.jitter,
+                              fail_rate=args.fail_rate, session_ttl=args.session_ttl, seed=args.seed)
+    credentials = {'username': DEFAULT_USERNAME, 'password': DEFAULT_PASSWORD}
+    log = print if args.verbose else (lambda message: None)
+
+    with MockPortal(config) as mock:
+        settings = benchmark_settings(mock.url, engine, workers)
+        questionnaire = compile_questionnaire(settings)
+        timer = RunTimer()
+        counter.reset()
+        started = time.perf_counter()
+        if engine == "http":
+            courses, scan_seconds, fill_seconds = run_http(mock, settings, credentials, questionnaire, log, timer)
+        else:
+            counter.install(settings['engine'])
+            courses, scan_seconds, fill_seconds = run_browser(mock, settings, credentials, questionnaire, log, timer)
+        total_seconds = time.perf_counter() - started
+        commands = counter.snapshot()
+
+        return {
+            'mode': f"{engine}:{workers}",
+            'forms': len(courses),
+            'saved': mock.saved_count(),
+            'rejected': len(mock.rejected),
+            'scan_seconds': scan_seconds,
+            'fill_seconds': fill_seconds,
+            # Wall time over all workers, so parallel modes show their throughput
+            'seconds_per_form': fill_seconds / len(courses) if courses else 0.0,
+            'total_seconds': total_seconds,
+            'webdriver_commands': sum(commands.values()),
+            'webdriver_commands_by_type': commands,
+            'http_requests': mock.request_count,
+            'phases': timer.summary(),
+        }
+
+
+def print_table(results):
+    columns = [
+        ("Mode", 'mode', "{}"),
+        ("Form", 'forms', "{}"),
+        ("Tersimpan", 'saved', "{}"),
+        ("Scan (dtk)", 'scan_seconds', "{:.2f}"),
+        ("Rata-rata isi/form (dtk)", 'seconds_per_form', "{:.2f}"),
+        ("Total (dtk)", 'total_seconds', "{:.2f}"),
+        ("Perintah WebDriver", 'webdriver_commands', "{}"),
+        ("Permintaan HTTP", 'http_requests', "{}"),
+    ]
+    rows = [[title for title, _, _ in columns]]
+    rows += [[fmt.format(result[key]) for _, key, fmt in columns] for result in results]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+    for row in rows:
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ukur kecepatan mesin pengisian EPBM terhadap portal tiruan.")
+    parser.add_argument("--modes", nargs="+", type=parse_mode, default=[("http", 1), ("browser", 1)],
+                        help="mode yang diukur, misalnya http:4 browser:1 browser-fast:4")
+    parser.add_argument("--repeat", type=int, default=1, help="jumlah pengulangan tiap mode")
+    parser.add_argument("--courses", type=int, default=6)
+    parser.add_argument("--completed", type=int, default=0)
+    parser.add_argument("--no-sarpras", action="store_true")
+    parser.add_argument("--lecturers", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.05, help="detik tambahan per permintaan")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--session-ttl", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", help="simpan hasil lengkap ke file JSON ini")
+    parser.add_argument("--phases", action="store_true", help="tampilkan p50/p95 tiap tahap")
+    parser.add_argument("--verbose", action="store_true", help="tampilkan log pengisian")
+    args = parser.parse_args()
+
+    counter = CommandCounter()
+    results = []
+    for engine, workers in args.modes:
+        for _ in range(args.repeat):
+            results.append(run_mode(engine, workers, args, counter))
+
+    print_table(results)
+    if args.phases:
+        for result in results:
+            print(f"\n{result['mode']}")
+            for phase, stats in result['phases'].items():
+                print(f"  {phase}: p50 {stats['p50']:.3f} dtk, p95 {stats['p95']:.3f} dtk ({stats['count']}x)")
+    if args.repeat > 1:
+        print()
+        for engine, workers in args.modes:
+            mode = f"{engine}:{workers}"
+            totals = [result['total_seconds'] for result in results if result['mode'] == mode]
+            print(f"{mode}: median total {statistics.median(totals):.2f} dtk dari {len(totals)} kali")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+"""Chrome driven straight over the DevTools Protocol, without chromedriver.
+
+With Selenium every find, click and script is an HTTP request to the
+chromedriver process, which turns it into DevTools commands of its own.
+CdpDriver talks to Chrome's DevTools websocket itself from an asyncio loop
+on a background thread:
+
+- independent commands go out back to back without waiting for each
+  other's replies (see pipeline), e.g. the domains enabled at start-up;
+- page loads and JavaScript dialogs arrive as pushed events instead of
+  being polled;
+- waits run in the page on a MutationObserver and return as soon as the
+  DOM satisfies them (see waits.Waiter), one round trip per wait.
+
+It offers the part of the WebDriver API the scan and the fill loop use,
+so create_driver hands out either backend and the rest of the code
+doesn't know which one it got. The websocket client is a minimal RFC 6455
+client on asyncio streams, enough for a local DevTools endpoint.
+"""
+
+import asyncio
+import base64
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+from urllib.parse import urlparse
+
+from driver_cache import find_chrome
+from portal_pages import FAST_PROFILE, PORTAL_URL, STANDARD_PROFILE
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC11B64"
+# How long Chrome may take to open its DevTools port
+LAUNCH_TIMEOUT = 20
+COMMAND_TIMEOUT = 30
+DEFAULT_PAGE_LOAD_TIMEOUT = 30
+
+CALL_SCRIPT = "(function () {\n%s\n}).apply(null, %s)"
+
+
+class CdpError(Exception):
+    """A DevTools command failed, or the browser went away; recovery sorts it like a WebDriverException."""
+
+
+class WebSocket:
+    """Client end of a websocket: text messages in and out, pings answered."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.send_lock = asyncio.Lock()
+
+    @classmethod
+    async def connect(cls, url):
+        parsed = urlparse(url)
+        reader, writer = await asyncio.open_connection(parsed.hostname, parsed.port or 80)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f"GET {parsed.path or '/'} HTTP/1.1\r\n"
+                      f"Host: {parsed.hostname}:{parsed.port or 80}\r\n"
+                      "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        await writer.drain()
+
+        status = await reader.readline()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        if b" 101 " not in status or headers.get('sec-websocket-accept') != accept:
+            writer.close()
+            raise CdpError(f"DevTools menolak koneksi websocket: {status.decode('latin-1').strip()}")
+        return cls(reader, writer)
+
+    async def send_frame(self, opcode, payload):
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([0x80 | length])
+        elif length < 1 << 16:
+            header += bytes([0x80 | 126]) + struct.pack("!H", length)
+        else:
+            header += bytes([0x80 | 127]) + struct.pack("!Q", length)
+        # Clients must mask every frame; XOR as one big integer instead of byte by byte
+        mask = os.urandom(4)
+        key = (mask * (length // 4 + 1))[:length]
+        masked = (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+        async with self.send_lock:
+            self.writer.write(header + mask + masked)
+            await self.writer.drain()
+
+    async def send(self, text):
+        await self.send_frame(0x1, text.encode())
+
+    async def receive(self):
+        """The next text message, or None once the connection is closed."""
+        message = b""
+        while True:
+            try:
+                first, second = await self.reader.readexactly(2)
+                length = second & 0x7F
+                if length == 126:
+                    length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+                elif length == 127:
+                    length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+                mask = await self.reader.readexactly(4) if second & 0x80 else None
+                payload = await self.reader.readexactly(length)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return None
+            if mask:
+                key = (mask * (length // 4 + 1))[:length]
+                payload = (int.from_bytes(payload, "big") ^ int.from_bytes(key, "big")).to_bytes(length, "big")
+
+            opcode = first & 0x0F
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                await self.send_frame(0xA, payload)
+                continue
+            if opcode in (0x0, 0x1, 0x2):
+                message += payload
+                if first & 0x80:
+                    return message.decode("utf-8", "replace")
+
+    async def close(self):
+        try:
+            await self.send_frame(0x8, b"")
+        except (ConnectionError, RuntimeError):
+            pass
+        self.writer.close()
+
+
+class CdpConnection:
+    """DevTools commands with their replies matched by id, and events handed to listeners."""
+
+    def __init__(self, socket):
+        self.socket = socket
+        self.ids = itertools.count(1)
+        self.pending = {}
+        # method: callbacks taking the event's params
+        self.listeners = {}
+        self.reader = asyncio.ensure_future(self.read_loop())
+
+    async def read_loop(self):
+        while True:
+            text = await self.socket.receive()
+            if text is None:
+                break
+            message = json.loads(text)
+            if 'id' in message:
+                future = self.pending.pop(message['id'], None)
+                if future is None or future.done():
+                    continue
+                if 'error' in message:
+                    future.set_exception(CdpError(message['error'].get('message', "DevTools error")))
+                else:
+                    future.set_result(message.get('result', {}))
+            else:
+                for listener in list(self.listeners.get(message.get('method'), ())):
+                    listener(message.get('params', {}))
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(CdpError("Koneksi DevTools terputus."))
+        self.pending.clear()
+
+    async def send(self, method, params=None):
+        if self.reader.done():
+            raise CdpError("Koneksi DevTools terputus.")
+        command_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[command_id] = future
+        await self.socket.send(json.dumps({'id': command_id, 'method': method, 'params': params or {}}))
+        return await future
+
+    def on(self, method, listener):
+        self.listeners.setdefault(method, []).append(listener)
+
+    def off(self, method, listener):
+        if listener in self.listeners.get(method, ()):
+            self.listeners[method].remove(listener)
+
+    def next_event(self, method):
+        """A future for the next event of this kind; take it before sending the command that causes it."""
+        future = asyncio.get_running_loop().create_future()
+
+        def listener(params):
+            self.off(method, listener)
+            if not future.done():
+                future.set_result(params)
+
+        self.on(method, listener)
+        future.add_done_callback(lambda _: self.off(method, listener))
+        return future
+
+    async def close(self):
+        await self.socket.close()
+        self.reader.cancel()
+
+
+class CdpElement:
+    """A DOM element held by its DevTools object id."""
+
+    def __init__(self, driver, object_id):
+        self.driver = driver
+        self.object_id = object_id
+
+    def call(self, function, *args):
+        return self.driver.run(self.driver.call_on(self.object_id, function, args))
+
+    def click(self):
+        self.call("function () { this.scrollIntoView({block: 'center'}); this.click(); }")
+
+    def clear(self):
+        self.call("function () { this.value = ''; this.dispatchEvent(new Event('input', {bubbles: true})); }")
+
+    def send_keys(self, text):
+        # Inserted like typed text, the form sees the usual input events
+        self.call("function () { this.focus(); }")
+        self.driver.execute_cdp_cmd("Input.insertText", {'text': text})
+
+    def get_attribute(self, name):
+        return self.call("function (name) { return this.getAttribute(name); }", name)
+
+    @property
+    def text(self):
+        return self.call("function () { return this.innerText; }") or ""
+
+
+class CdpDriver:
+    """One Chrome page under direct DevTools control, with the WebDriver calls the portal code makes."""
+
+    # Scripts may return promises, Waiter lets the page push the end of a wait
+    awaits_promises = True
+
+    def __init__(self, process, profile_dir, owns_profile, loop, connection, eager=False):
+        self.process = process
+        self.profile_dir = profile_dir
+        self.owns_profile = owns_profile
+        self.loop = loop
+        self.connection = connection
+        # The fast profile goes on once the DOM is ready, like Selenium's eager strategy
+        self.load_event = "Page.domContentEventFired" if eager else "Page.loadEventFired"
+        self.page_load_timeout = DEFAULT_PAGE_LOAD_TIMEOUT
+        connection.on("Page.javascriptDialogOpening", self.accept_dialog)
+
+    @classmethod
+    def launch(cls, headless=True, profile=STANDARD_PROFILE, portal_url=PORTAL_URL, user_data_dir=None):
+        from portal import BLOCKED_URL_PATTERNS, portal_hosts
+
+        chrome = find_chrome()
+        if chrome is None:
+            raise CdpError("Google Chrome tidak ditemukan.")
+        owns_profile = not user_data_dir
+        profile_dir = tempfile.mkdtemp(prefix="chrome-", dir=user_data_dir or None)
+        fast = profile == FAST_PROFILE
+        command = [chrome, f"--user-data-dir={profile_dir}", "--remote-debugging-port=0", "--no-first-run",
+                   "--no-default-browser-check", "--start-maximized"]
+        if headless:
+            command.append("--headless=new")
+        if fast:
+            rules = ", ".join(["MAP * ~NOTFOUND"] + [f"EXCLUDE {host}" for host in portal_hosts(portal_url)])
+            command += [f"--host-resolver-rules={rules}", "--blink-settings=imagesEnabled=false"]
+        command.append("about:blank")
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True, name="cdp").start()
+        try:
+            page_url = cls.page_websocket(process, profile_dir)
+            connection = asyncio.run_coroutine_threadsafe(cls.open_connection(page_url), loop).result(LAUNCH_TIMEOUT)
+        except Exception:
+            process.kill()
+            loop.call_soon_threadsafe(loop.stop)
+            if owns_profile:
+                shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+
+        driver = cls(process, profile_dir, owns_profile, loop, connection, eager=fast)
+        # Independent set-up commands, sent together
+        commands = [("Page.enable", {}), ("Network.enable", {})]
+        if fast:
+            commands.append(("Network.setBlockedURLs", {'urls': BLOCKED_URL_PATTERNS}))
+        driver.pipeline(commands)
+        return driver
+
+    @staticmethod
+    def page_websocket(process, profile_dir):
+        """The DevTools websocket URL of the browser's first page."""
+        deadline = time.monotonic() + LAUNCH_TIMEOUT
+        port_file = os.path.join(profile_dir, "DevToolsActivePort")
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CdpError("Chrome berhenti sebelum DevTools siap.")
+            try:
+                with open(port_file, encoding="utf-8") as f:
+                    port = int(f.readline())
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/json/list", timeout=2) as response:
+                    targets = json.load(response)
+            except (OSError, ValueError):
+                time.sleep(0.05)
+                continue
+            for target in targets:
+                if target.get('type') == 'page' and target.get('webSocketDebuggerUrl'):
+                    return target['webSocketDebuggerUrl']
+            time.sleep(0.05)
+        raise CdpError(f"Chrome tidak membuka DevTools dalam {LAUNCH_TIMEOUT} detik.")
+
+    @staticmethod
+    async def open_connection(url):
+        return CdpConnection(await WebSocket.connect(url))
+
+    def run(self, coroutine, timeout=COMMAND_TIMEOUT):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise CdpError(f"Perintah DevTools melebihi {timeout} detik.")
+
+    def execute_cdp_cmd(self, method, params=None):
+        return self.run(self.connection.send(method, params))
+
+    def pipeline(self, commands):
+        """Send independent (method, params) commands without waiting in between, returns their results."""
+        async def send_all():
+            return await asyncio.gather(*(self.connection.send(method, params) for method, params in commands))
+        return self.run(send_all())
+
+    def accept_dialog(self, params):
+        # alert/confirm would block every script until answered
+        asyncio.ensure_future(self.connection.send("Page.handleJavaScriptDialog", {'accept': True}))
+
+    async def evaluate(self, expression, by_value=True):
+        reply = await self.connection.send("Runtime.evaluate", {
+            'expression': expression, 'returnByValue': by_value, 'awaitPromise': True, 'userGesture': True})
+        if 'exceptionDetails' in reply:
+            details = reply['exceptionDetails']
+            raise CdpError(details.get('exception', {}).get('description') or details.get('text', "Script error"))
+        return reply['result']
+
+    async def call_on(self, object_id, function, args=()):
+        reply = await self.connection.send("Runtime.callFunctionOn", {
+            'objectId': object_id, 'functionDeclaration': function, 'returnByValue': True,
+            'arguments': [{'value': arg} for arg in args]})
+        if 'exceptionDetails' in reply:
+            raise CdpError(reply['exceptionDetails'].get('text', "Script error"))
+        return reply['result'].get('value')
+
+    def execute_script(self, script, *args, timeout=COMMAND_TIMEOUT):
+        """Run a WebDriver-style script body (arguments[i], return); a returned promise is awaited."""
+        result = self.run(self.evaluate(CALL_SCRIPT % (script, json.dumps(list(args)))), timeout)
+        return result.get('value')
+
+    def get(self, url):
+        async def navigate():
+            loaded = self.connection.next_event(self.load_event)
+            reply = await self.connection.send("Page.navigate", {'url': url})
+            if reply.get('errorText'):
+                loaded.cancel()
+                raise CdpError(f"Gagal membuka {url}: {reply['errorText']}")
+            try:
+                await asyncio.wait_for(loaded, self.page_load_timeout)
+            except asyncio.TimeoutError:
+                raise CdpError(f"Halaman tidak selesai dimuat dalam {self.page_load_timeout} detik: {url}")
+        self.run(navigate(), self.page_load_timeout + 5)
+
+    def set_page_load_timeout(self, seconds):
+        self.page_load_timeout = seconds
+
+    @property
+    def current_url(self):
+        return self.run(self.evaluate("location.href"))['value']
+
+    @property
+    def page_source(self):
+        return self.run(self.evaluate("document.documentElement.outerHTML"))['value']
+
+    def find_elements(self, by, value):
+        css = f'[id="{value}"]' if by == "id" else value
+
+        async def find():
+            array = await self.evaluate(f"Array.from(document.querySelectorAll({json.dumps(css)}))", by_value=False)
+            reply = await self.connection.send("Runtime.getProperties",
+                                               {'objectId': array['objectId'], 'ownProperties': True})
+            return [prop['value']['objectId'] for prop in reply['result']
+                    if prop['name'].isdigit() and prop.get('value', {}).get('objectId')]
+
+        return [CdpElement(self, object_id) for object_id in self.run(find())]
+
+    def find_element(self, by, value):
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise CdpError(f"Elemen tidak ditemukan: {value}")
+        return elements[0]
+
+    def get_cookies(self):
+        cookies = self.execute_cdp_cmd("Network.getCookies")['cookies']
+        converted = []
+        for cookie in cookies:
+            entry = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly')}
+            if not cookie.get('session') and cookie.get('expires', -1) > 0:
+                entry['expiry'] = int(cookie['expires'])
+            converted.append(entry)
+        return converted
+
+    def add_cookie(self, cookie):
+        params = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly')
+                  if key in cookie}
+        if 'expiry' in cookie:
+            params['expires'] = cookie['expiry']
+        if 'domain' not in params:
+            params['url'] = self.current_url
+        if not self.execute_cdp_cmd("Network.setCookie", params).get('success', True):
+            raise CdpError(f"Cookie {cookie.get('name')} ditolak.")
+
+    def quit(self):
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        try:
+            self.run(self.connection.send("Browser.close"), 5)
+        except Exception:
+            pass
+        try:
+            self.run(self.connection.close(), 5)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        try:
+            process.wait(5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        if self.owns_profile:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
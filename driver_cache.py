@@ -0,0 +1,144 @@
+"""Chromedriver resolution without a network lookup on every run.
+
+The chromedriver path resolved by webdriver_manager is remembered together
+with the Chrome version it was resolved for. As long as the driver is still
+on disk and the installed Chrome has the same major version, the cached path
+is used directly; webdriver_manager is only asked again after a Chrome major
+upgrade.
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from app_paths import data_dir
+
+CACHE_FILE = "chromedriver.json"
+
+VERSION_PATTERN = re.compile(r"(\d+)\.(\d+)\.(\d+)\.(\d+)")
+
+CHROME_COMMANDS = {
+    "darwin": [["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome", "--version"]],
+    "linux": [["google-chrome", "--version"], ["google-chrome-stable", "--version"],
+              ["chromium", "--version"], ["chromium-browser", "--version"]],
+}
+
+CHROME_PATHS = {
+    "win32": [r"%ProgramFiles%\Google\Chrome\Application\chrome.exe",
+              r"%ProgramFiles(x86)%\Google\Chrome\Application\chrome.exe",
+              r"%LocalAppData%\Google\Chrome\Application\chrome.exe"],
+    "darwin": ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"],
+}
+
+_resolved_path = None
+_resolve_lock = threading.Lock()
+
+
+def installed_chrome_version():
+    """Version of the locally installed Chrome, read without going online."""
+    if sys.platform == "win32":
+        import winreg
+        for hive in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+            try:
+                with winreg.OpenKey(hive, r"Software\Google\Chrome\BLBeacon") as key:
+                    return winreg.QueryValueEx(key, "version")[0]
+            except OSError:
+                continue
+        return None
+
+    platform = "darwin" if sys.platform == "darwin" else "linux"
+    for command in CHROME_COMMANDS[platform]:
+        try:
+            output = subprocess.run(command, capture_output=True, text=True, timeout=5).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = VERSION_PATTERN.search(output)
+        if match:
+            return match.group(0)
+    return None
+
+
+def find_chrome():
+    """Path of the installed Chrome executable, for starting it without chromedriver."""
+    for path in CHROME_PATHS.get(sys.platform, ()):
+        path = os.path.expandvars(path)
+        if os.path.isfile(path):
+            return path
+    for command in CHROME_COMMANDS["linux"]:
+        path = shutil.which(command[0])
+        if path:
+            return path
+    return None
+
+
+def major_version(version):
+    return version.split(".")[0] if version else None
+
+
+def cache_path():
+    return os.path.join(data_dir(), CACHE_FILE)
+
+
+def load_entry():
+    try:
+        with open(cache_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_entry(chrome_version, driver_path):
+    entry = {
+        'chrome_version': chrome_version,
+        'chrome_major': major_version(chrome_version),
+        'driver_path': driver_path,
+        'resolved_at': time.time(),
+    }
+    # Write to a temporary file first so a crash never leaves a broken cache
+    temp_path = cache_path() + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+    os.replace(temp_path, cache_path())
+
+
+def is_usable(entry, chrome_major):
+    if not entry or not os.path.isfile(entry.get('driver_path', "")):
+        return False
+    # Without a detectable Chrome version there is nothing to invalidate against
+    return chrome_major is None or entry.get('chrome_major') == chrome_major
+
+
+def resolve_driver_path():
+    """Path to a chromedriver matching the installed Chrome, or None to let Selenium find one."""
+    global _resolved_path
+    with _resolve_lock:
+        if _resolved_path is not None and os.path.isfile(_resolved_path):
+            return _resolved_path
+
+        chrome_version = installed_chrome_version()
+        entry = load_entry()
+        if is_usable(entry, major_version(chrome_version)):
+            _resolved_path = entry['driver_path']
+            return _resolved_path
+
+        try:
+            from webdriver_manager.chrome import ChromeDriverManager
+            driver_path = ChromeDriverManager().install()
+        except Exception:
+            # Offline or blocked: an older driver still beats not starting at all
+            if entry and os.path.isfile(entry.get('driver_path', "")):
+                _resolved_path = entry['driver_path']
+                return _resolved_path
+            return None
+
+        try:
+            save_entry(chrome_version, driver_path)
+        except OSError:
+            pass
+        _resolved_path = driver_path
+        return _resolved_path
@@ -5,26 +5,48 @@ import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QLabel, QLineEdit, QSpinBox, QTextEdit, QPushButton, QTabWidget, 
                             QGroupBox, QFormLayout, QProgressBar, QMessageBox, QCheckBox,
-                            QComboBox, QScrollArea, QListWidget, QListWidgetItem, QDialog,
+                            QComboBox, QScrollArea, QListWidget, QListWidgetItem, QListView, QDialog,
                             QSplitter, QFrame, QSizePolicy, QToolButton, QGridLayout)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, pyqtSlot, QSize, QPropertyAnimation, QEasingCurve
-from PyQt5.QtGui import QFont, QIcon, QPixmap, QColor, QPalette, QTextCursor, QTextCharFormat
+from PyQt5.QtCore import Qt, QSettings, QSortFilterProxyModel, QThread, QTimer, pyqtSignal, pyqtSlot, QSize, QPropertyAnimation, QEasingCurve
+from PyQt5.QtGui import (QFont, QIcon, QPixmap, QColor, QPalette, QTextCursor, QTextCharFormat, QStandardItem,
+                         QStandardItemModel)
 import qdarkstyle
 
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_cache import resolve_driver_path
+from journal import RunJournal
+from log_file import LogFile
+from pipeline import DEFAULT_POLICY, SELECTION_POLICIES, run_pipeline
+from portal_pages import (CDP_ENGINE, FAST_PROFILE, HTTP_ENGINE, PORTAL_URL, SELENIUM_ENGINE, STANDARD_PROFILE,
+                          LoginError)
+from progress import format_eta
+from runner import (fill_selected_courses, open_journal, report_timings, scan_courses, scan_courses_http,
+                    session_cache_for)
+from timing import RunTimer
+from warm_browser import WarmBrowser
+
+# Lines kept in the log panel, the full log goes to the log file
+MAX_LOG_LINES = 5000
+LOG_FLUSH_INTERVAL_MS = 100
+
+# Item data role holding a course's dict in the selection model
+COURSE_ROLE = Qt.UserRole + 1
 
 class CourseSelectionDialog(QDialog):
-    def __init__(self, courses, parent=None):
+    """Checkable, filterable course list; the selection is the set of the checked courses' links.
+
+    The list view only creates what is on screen, so opening it and
+    editing the selection stays instant with hundreds of courses.
+    """
+    
+    def __init__(self, courses, parent=None, selected_hrefs=None):
         super().__init__(parent)
         self.setWindowTitle("Pilih Mata Kuliah")
         self.setMinimumSize(600, 400)
-        self.selected_courses = []
+        # Courses in scan order, and the links of the checked ones
+        self.courses = []
+        self.selected_hrefs = set()
+        # None selects every unfinished course as it is added
+        self.preselected = selected_hrefs
         
         # Apply light mode style
         self.setStyleSheet("""
@@ -34,20 +56,22 @@ class CourseSelectionDialog(QDialog):
             QLabel {
                 color: #333333;
             }
-            QCheckBox {
+            QListView {
                 color: #333333;
-                spacing: 8px;
             }
-            QCheckBox::indicator {
+            QListView::item {
+                padding: 3px;
+            }
+            QListView::indicator {
                 width: 18px;
                 height: 18px;
                 border-radius: 4px;
                 border: 1px solid #b3d4fc;
             }
-            QCheckBox::indicator:unchecked {
+            QListView::indicator:unchecked {
                 background-color: #ffffff;
             }
-            QCheckBox::indicator:checked {
+            QListView::indicator:checked {
                 background-color: #2c75b3;
             }
             QPushButton {
@@ -64,7 +88,7 @@ class CourseSelectionDialog(QDialog):
             QPushButton:pressed {
                 background-color: #1b5493;
             }
-            QScrollArea {
+            QListView, QLineEdit {
                 border: 1px solid #b3d4fc;
                 border-radius: 5px;
                 background-color: #ffffff;
@@ -74,37 +98,30 @@ class CourseSelectionDialog(QDialog):
         layout = QVBoxLayout(self)
         
         # Label instructions
-        label = QLabel("Pilih mata kuliah yang ingin diisi EPBM-nya:")
-        layout.addWidget(label)
-        
-        # Course list with checkboxes
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_widget = QWidget()
-        scroll_area.setWidget(scroll_widget)
-        scroll_layout = QVBoxLayout(scroll_widget)
-        
-        # Create checkboxes for each course
-        self.checkboxes = []
-        for i, course in enumerate(courses):
-            # For completed courses, show them as disabled with info
-            if course.get('is_completed', False):
-                checkbox = QCheckBox(f"{course['title']}: {course['desc']} [Sudah Diisi]")
-                checkbox.setChecked(False)
-                checkbox.setEnabled(False)
-                checkbox.setStyleSheet("color: #999999;")
-                info_label = QLabel("  ↳ EPBM untuk mata kuliah ini sudah diisi sebelumnya.")
-                info_label.setStyleSheet("color: #999999; font-style: italic;")
-                scroll_layout.addWidget(checkbox)
-                scroll_layout.addWidget(info_label)
-            else:
-                checkbox = QCheckBox(f"{course['title']}: {course['desc']}")
-                checkbox.setChecked(True)  # Default select all unfinished courses
-                checkbox.course_data = course
-                scroll_layout.addWidget(checkbox)
-                self.checkboxes.append(checkbox)
-            
-        layout.addWidget(scroll_area)
+        self.instructions_label = QLabel("Pilih mata kuliah yang ingin diisi EPBM-nya:")
+        layout.addWidget(self.instructions_label)
+        
+        # Type to narrow the list down by code or name
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Cari kode atau nama mata kuliah...")
+        self.filter_input.setClearButtonEnabled(True)
+        layout.addWidget(self.filter_input)
+        
+        # Checkable course list
+        self.model = QStandardItemModel(self)
+        self.model.itemChanged.connect(self.item_changed)
+        self.proxy = QSortFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.filter_input.textChanged.connect(self.proxy.setFilterFixedString)
+        self.list_view = QListView()
+        self.list_view.setModel(self.proxy)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setEditTriggers(QListView.NoEditTriggers)
+        layout.addWidget(self.list_view)
+        
+        for course in courses:
+            self.add_course(course)
         
         # Quick selection buttons
         buttons_layout = QHBoxLayout()
@@ -121,47 +138,93 @@ class CourseSelectionDialog(QDialog):
         
         # OK and Cancel buttons
         button_box = QHBoxLayout()
-        ok_button = QPushButton("OK")
-        ok_button.clicked.connect(self.accept)
+        self.ok_button = QPushButton("OK")
+        self.ok_button.clicked.connect(self.accept)
         cancel_button = QPushButton("Batal")
         cancel_button.clicked.connect(self.reject)
         
-        button_box.addWidget(ok_button)
+        button_box.addWidget(self.ok_button)
         button_box.addWidget(cancel_button)
         layout.addLayout(button_box)
         
+    def add_course(self, course):
+        """Append a course, also while the dialog is open and the scan is still finding more."""
+        self.courses.append(course)
+        if course.get('is_completed', False):
+            # Completed courses are listed but can't be selected
+            item = QStandardItem(f"{course['title']}: {course['desc']} [Sudah Diisi]")
+            item.setFlags(Qt.ItemIsSelectable)
+            item.setForeground(QColor("#999999"))
+            item.setToolTip("EPBM untuk mata kuliah ini sudah diisi sebelumnya.")
+        else:
+            item = QStandardItem(f"{course['title']}: {course['desc']}")
+            item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable)
+            # Default select all unfinished courses
+            checked = self.preselected is None or course.get('href') in self.preselected
+            item.setCheckState(Qt.Checked if checked else Qt.Unchecked)
+            if checked:
+                self.selected_hrefs.add(course.get('href'))
+        item.setData(course, COURSE_ROLE)
+        self.model.appendRow(item)
+    
+    def item_changed(self, item):
+        href = item.data(COURSE_ROLE).get('href')
+        if item.checkState() == Qt.Checked:
+            self.selected_hrefs.add(href)
+        else:
+            self.selected_hrefs.discard(href)
+    
+    def set_scanning(self, scanning):
+        self.instructions_label.setText("Pilih mata kuliah yang ingin diisi EPBM-nya"
+                                        + (" (masih mencari...):" if scanning else ":"))
+        # The run takes over the scan's login, which only comes once the scan is done
+        self.ok_button.setEnabled(not scanning)
+    
+    def set_visible_checked(self, checked):
+        # Only the courses the filter shows, so "Pilih Semua" after a search picks the matches
+        state = Qt.Checked if checked else Qt.Unchecked
+        for row in range(self.proxy.rowCount()):
+            item = self.model.itemFromIndex(self.proxy.mapToSource(self.proxy.index(row, 0)))
+            if item.isCheckable() and item.checkState() != state:
+                item.setCheckState(state)
+    
     def select_all(self):
-        for checkbox in self.checkboxes:
-            checkbox.setChecked(True)
+        self.set_visible_checked(True)
             
     def deselect_all(self):
-        for checkbox in self.checkboxes:
-            checkbox.setChecked(False)
+        self.set_visible_checked(False)
             
     def get_selected_courses(self):
-        selected = []
-        for checkbox in self.checkboxes:
-            if checkbox.isChecked():
-                selected.append(checkbox.course_data)
-        return selected
+        return [course for course in self.courses
+                if not course.get('is_completed', False) and course.get('href') in self.selected_hrefs]
 
 class CourseFinderWorker(QThread):
     update_signal = pyqtSignal(str)
-    courses_found_signal = pyqtSignal(list)
+    session_signal = pyqtSignal(object)
+    # Each course as soon as it is parsed, the scan may still be running
+    course_found_signal = pyqtSignal(dict)
     finished_signal = pyqtSignal(bool, str)
     
-    def __init__(self, credentials):
+    def __init__(self, credentials, profile=STANDARD_PROFILE, portal_url=PORTAL_URL, remember_session=False,
+                 warm_browser=None, engine=SELENIUM_ENGINE):
         super().__init__()
         self.credentials = credentials
+        self.profile = profile
+        self.portal_url = portal_url
+        self.remember_session = remember_session
+        self.warm_browser = warm_browser
+        self.engine = engine
+        self.timer = RunTimer()
         
     def run(self):
         try:
             courses = self.find_courses()
             if courses:
-                self.courses_found_signal.emit(courses)
                 self.finished_signal.emit(True, f"Ditemukan {len(courses)} mata kuliah.")
             else:
                 self.finished_signal.emit(False, "Tidak ditemukan mata kuliah yang perlu diisi EPBM.")
+        except LoginError as e:
+            self.finished_signal.emit(False, str(e))
         except Exception as e:
             self.finished_signal.emit(False, f"Error: {str(e)}")
             
@@ -169,638 +232,75 @@ class CourseFinderWorker(QThread):
         self.update_signal.emit(message)
             
     def find_courses(self):
-        username = self.credentials['username']
-        password = self.credentials['password']
-        
-        # Setup Chrome driver
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")  # Always use headless for scanning
-        chrome_options.add_argument("--start-maximized")
-        
-        # Initialize the Chrome driver
-        self.log("Menginisialisasi Chrome driver...")
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-        
-        try:
-            # Open the IPB student portal
-            self.log("Membuka portal mahasiswa IPB...")
-            driver.get("https://studentportal.ipb.ac.id/Akademik/EPBM/Detail")
-            
-            # Check if login page is displayed and handle login
-            if "login" in driver.current_url.lower() or driver.find_elements(By.ID, "Username"):
-                self.log("Halaman login terdeteksi, melakukan login...")
-                
-                # Wait for username field to be visible
-                username_field = WebDriverWait(driver, 10).until(
-                    EC.visibility_of_element_located((By.ID, "Username"))
-                )
-                username_field.clear()
-                username_field.send_keys(username)
-                
-                # Enter password
-                password_field = driver.find_element(By.ID, "Password")
-                password_field.clear()
-                password_field.send_keys(password)
-                
-                # Click login button
-                login_button = driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
-                login_button.click()
-                
-                # Wait for login to complete
-                self.log("Menunggu proses login selesai...")
-                time.sleep(3)
-                
-                # Check if login failed
-                error_alerts = driver.find_elements(By.CSS_SELECTOR, ".alert.alert-danger")
-                for alert in error_alerts:
-                    if "Login gagal" in alert.text or "password Anda salah" in alert.text:
-                        self.log("Login gagal: Username atau password salah.")
-                        self.finished_signal.emit(False, "Login gagal: Username atau password Anda salah. Silakan periksa kembali.")
-                        return []
-            
-            # Check if we're still on the login page after clicking login button
-            if "login" in driver.current_url.lower():
-                self.log("Masih berada di halaman login. Kemungkinan username atau password salah.")
-                self.finished_signal.emit(False, "Login gagal: Gagal masuk ke portal. Silakan periksa kembali username dan password.")
-                return []
-            
-            # Wait for page to load after login
-            self.log("Menunggu halaman EPBM dimuat...")
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".btn.card.small-box"))
-            )
-            
-            # Get all EPBM cards
-            epbm_cards = driver.find_elements(By.CSS_SELECTOR, ".btn.card.small-box")
-            self.log(f"Ditemukan {len(epbm_cards)} kartu EPBM yang perlu diisi.")
-            
-            # Parse course information
-            courses = []
-            for i, card in enumerate(epbm_cards):
-                try:
-                    # Get card information
-                    header = card.find_element(By.CSS_SELECTOR, ".card-header")
-                    href = card.get_attribute("href")
-                    
-                    # Get course information
-                    card_title = "Untitled"
-                    card_desc = ""
-                    
-                    try:
-                        card_title = header.find_element(By.TAG_NAME, "h4").text
-                    except:
-                        pass
-                    
-                    try:
-                        card_texts = header.find_elements(By.TAG_NAME, "p")
-                        if card_texts:
-                            card_desc = card_texts[0].text
-                    except:
-                        pass
-                    
-                    # Detect if this is sarpras
-                    is_sarpras = "Sarana dan Prasarana" in card_title or "sarpras" in href.lower()
-                    
-                    # Check if the EPBM form has already been filled (look for the check icon)
-                    is_completed = False
-                    try:
-                        # Find check icon inside card
-                        check_icons = card.find_elements(By.CSS_SELECTOR, ".fa-check-circle.text-success")
-                        if check_icons:
-                            is_completed = True
-                            self.log(f"Terdeteksi {card_title}: {card_desc} sudah diisi sebelumnya.")
-                    except:
-                        pass
-                    
-                    # Add to courses list
-                    courses.append({
-                        'title': card_title,
-                        'desc': card_desc,
-                        'href': href,
-                        'is_sarpras': is_sarpras,
-                        'is_completed': is_completed,
-                        'index': i
-                    })
-                    
-                    self.log(f"Ditemukan: {card_title}: {card_desc}{' (Sudah diisi)' if is_completed else ''}")
-                    
-                except Exception as e:
-                    self.log(f"Error parsing course card: {e}")
-            
-            return courses
-            
-        except Exception as e:
-            self.log(f"Terjadi error: {e}")
-            return []
-        finally:
-            # Close the browser
-            driver.quit()
+        session_cache = session_cache_for(self.remember_session, self.log)
+        if self.engine == HTTP_ENGINE:
+            # The HTTP engine needs no browser, and its scan hands over each card while the page downloads
+            courses, session = scan_courses_http(self.credentials, self.log, self.portal_url, self.timer,
+                                                 session_cache, self.course_found_signal.emit)
+        else:
+            warm_session = (self.warm_browser.claim(self.profile, self.portal_url, self.engine)
+                            if self.warm_browser else None)
+            courses, session = scan_courses(self.credentials, self.log, self.profile, self.portal_url, self.timer,
+                                            session_cache=session_cache, warm_session=warm_session,
+                                            on_course=self.course_found_signal.emit, engine=self.engine)
+        # Keep the logged-in session, browser or HTTP, for the automation run
+        if session is not None:
+            self.session_signal.emit(session)
+        return courses
 
 class EPBMAutomationWorker(QThread):
     update_signal = pyqtSignal(str)
-    progress_signal = pyqtSignal(int)
+    progress_signal = pyqtSignal(float, float)  # percent, ETA in seconds (-1 while unknown)
     finished_signal = pyqtSignal(bool, str)
     
-    def __init__(self, credentials, settings, selected_courses):
+    def __init__(self, credentials, settings, selected_courses, session=None, scan_timer=None, resume=False,
+                 warm_browser=None, policy=None):
         super().__init__()
         self.credentials = credentials
         self.settings = settings
         self.selected_courses = selected_courses
+        self.session = session
+        self.resume = resume
+        self.warm_browser = warm_browser
+        # In auto mode the courses come from a streaming scan picking them by this policy
+        self.policy = policy
+        # The run's timings start with those of the scan that preceded it
+        self.timer = RunTimer(scan_timer.spans if scan_timer is not None else ())
         
     def run(self):
+        success, message = True, "Otomasi selesai dengan sukses!"
+        session, self.session = self.session, None
         try:
-            self.fill_epbm_portal()
-            self.finished_signal.emit(True, "Otomasi selesai dengan sukses!")
+            # Without the scan's browser, e.g. when resuming, a warm one still saves the start-up
+            if session is None and self.warm_browser is not None and self.settings.get('engine') != HTTP_ENGINE:
+                session = self.warm_browser.claim(self.settings['browser_profile'],
+                                                  self.settings.get('portal_url', PORTAL_URL), self.settings['engine'])
+            
+            # Every page and save goes to the journal, so a crashed run can be resumed
+            journal, pending = open_journal(self.credentials, self.settings, self.log, self.resume)
+            if self.policy is not None:
+                # The pipeline scans and fills, there is nothing left to fill afterwards
+                queued, _ = run_pipeline(self.credentials, self.settings, self.policy, self.log,
+                                         self.progress_signal.emit, self.timer, journal, warm_session=session)
+                if not queued:
+                    message = "Tidak ada mata kuliah yang perlu diisi."
+            else:
+                if pending is not None:
+                    journal.resume(self.selected_courses)
+                else:
+                    journal.start(self.selected_courses)
+                fill_selected_courses(self.credentials, self.settings, self.selected_courses,
+                                      self.log, self.progress_signal.emit, session, self.timer, journal)
+        except LoginError as e:
+            success, message = False, str(e)
         except Exception as e:
-            self.finished_signal.emit(False, f"Error: {str(e)}")
+            success, message = False, f"Error: {str(e)}"
+        
+        report_timings(self.timer, self.log)
+        self.finished_signal.emit(success, message)
             
     def log(self, message):
         self.update_signal.emit(message)
-            
-    def fill_epbm_portal(self):
-        username = self.credentials['username']
-        password = self.credentials['password']
-        
-        # Setup Chrome driver
-        chrome_options = Options()
-        if self.settings['headless']:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--start-maximized")
-        
-        # Initialize the Chrome driver
-        self.log("Menginisialisasi Chrome driver...")
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-        
-        try:
-            # Open the IPB student portal
-            self.log("Membuka portal mahasiswa IPB...")
-            driver.get("https://studentportal.ipb.ac.id/Akademik/EPBM/Detail")
-            
-            # Check if login page is displayed and handle login
-            if "login" in driver.current_url.lower() or driver.find_elements(By.ID, "Username"):
-                self.log("Halaman login terdeteksi, melakukan login...")
-                
-                # Wait for username field to be visible
-                username_field = WebDriverWait(driver, 10).until(
-                    EC.visibility_of_element_located((By.ID, "Username"))
-                )
-                username_field.clear()
-                username_field.send_keys(username)
-                
-                # Enter password
-                password_field = driver.find_element(By.ID, "Password")
-                password_field.clear()
-                password_field.send_keys(password)
-                
-                # Click login button
-                login_button = driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
-                login_button.click()
-                
-                # Wait for login to complete
-                self.log("Menunggu proses login selesai...")
-                time.sleep(3)
-                
-                # Check if login failed
-                error_alerts = driver.find_elements(By.CSS_SELECTOR, ".alert.alert-danger")
-                for alert in error_alerts:
-                    if "Login gagal" in alert.text or "password Anda salah" in alert.text:
-                        self.log("Login gagal: Username atau password salah.")
-                        self.finished_signal.emit(False, "Login gagal: Username atau password Anda salah. Silakan periksa kembali.")
-                        return
-                
-                # Check if we're still on the login page after clicking login button
-                if "login" in driver.current_url.lower():
-                    self.log("Masih berada di halaman login. Kemungkinan username atau password salah.")
-                    self.finished_signal.emit(False, "Login gagal: Gagal masuk ke portal. Silakan periksa kembali username dan password.")
-                    return
-            
-            # Wait for page to load after login
-            self.log("Menunggu halaman EPBM dimuat...")
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".btn.card.small-box"))
-            )
-            
-            # Get all EPBM cards that match our selected courses
-            epbm_cards = driver.find_elements(By.CSS_SELECTOR, ".btn.card.small-box")
-            total_cards = len(self.selected_courses)
-            
-            self.log(f"Akan mengisi {total_cards} kartu EPBM yang dipilih.")
-            
-            # Initialize progress tracking
-            total_steps = total_cards * 5  # Each course has about 5 steps (click, fill, checkbox, save, return)
-            current_step = 0
-            
-            # Update initial progress
-            self.progress_signal.emit(0)
-            
-            # Set page load timeout to prevent hanging and make it faster
-            driver.set_page_load_timeout(15)  # Reduced from 30 to 15 seconds
-            
-            # Loop through each selected course
-            for i, course in enumerate(self.selected_courses):
-                try:
-                    # Card found - update progress
-                    current_step += 1
-                    progress = min(int((current_step / total_steps) * 100), 99)  # Keep under 100% until fully complete
-                    self.progress_signal.emit(progress)
-                    
-                    # Find the course card again (in case the page was refreshed)
-                    epbm_cards = driver.find_elements(By.CSS_SELECTOR, ".btn.card.small-box")
-                    
-                    if 0 <= course['index'] < len(epbm_cards):
-                        card = epbm_cards[course['index']]
-                    else:
-                        self.log(f"Error: Kartu dengan indeks {course['index']} tidak ditemukan. Melewati...")
-                        continue
-                    
-                    self.log(f"\nMengisi EPBM untuk {course['title']}: {course['desc']} ({i+1}/{total_cards})")
-                    
-                    # Click on the card
-                    try:
-                        card.click()
-                    except:
-                        # Sometimes the click fails - use JavaScript if that happens
-                        self.log("Menggunakan JavaScript untuk mengklik kartu...")
-                        driver.execute_script("arguments[0].click();", card)
-                        
-                    # Wait with shorter timeout for better performance
-                    time.sleep(0.5)  # Reduced from 1 second to 0.5 seconds
-                    
-                    # Clicked card - update progress
-                    current_step += 1
-                    progress = min(int((current_step / total_steps) * 100), 99)
-                    self.progress_signal.emit(progress)
-                    
-                    # Check if this is the Sarana Prasarana form
-                    is_sarpras = course['is_sarpras']
-                    
-                    if is_sarpras:
-                        # Handle Sarana Prasarana form directly (single page)
-                        self.log("Mengisi kuesioner Sarana dan Prasarana...")
-                        # Fill star ratings
-                        try:
-                            star_ratings = WebDriverWait(driver, 3).until(  # Reduced from 5 to 3 seconds
-                                EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".b-rating"))
-                            )
-                            
-                            for j, rating in enumerate(star_ratings):
-                                # Determine which rating to use based on the question (1-3)
-                                if j == 0:  # Kenyamanan kelas
-                                    star_value = self.settings['sarpras_kenyamanan']
-                                elif j == 1:  # Fasilitas internet
-                                    star_value = self.settings['sarpras_internet']
-                                elif j == 2:  # Toilet
-                                    star_value = self.settings['sarpras_toilet']
-                                else:
-                                    star_value = 4  # Default
-                                    
-                                # Get all stars in the current rating
-                                stars = rating.find_elements(By.CSS_SELECTOR, ".b-rating-star")
-                                
-                                # Click on the star based on the rating (1-4)
-                                if len(stars) >= star_value and star_value > 0:
-                                    try:
-                                        stars[star_value - 1].click()
-                                    except:
-                                        # Use JavaScript if regular click fails
-                                        driver.execute_script("arguments[0].click();", stars[star_value - 1])
-                                    
-                                    # Reduce delay between clicks for faster processing
-                                    time.sleep(0.1)  # Reduced from 0.2 to 0.1 seconds
-                        except Exception as e:
-                            self.log(f"Error pada pengisian rating: {str(e)}")
-                        
-                        # After filling stars - update progress
-                        current_step += 1
-                        progress = min(int((current_step / total_steps) * 100), 99)
-                        self.progress_signal.emit(progress)
-                        
-                        # Find and click checkbox if it exists
-                        try:
-                            # Wait for checkboxes to be available
-                            checkboxes = WebDriverWait(driver, 3).until(
-                                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "input[type='checkbox']"))
-                            )
-                            
-                            for checkbox in checkboxes:
-                                try:
-                                    if not checkbox.is_selected():
-                                        # Try direct click first
-                                        try:
-                                            checkbox.click()
-                                        except:
-                                            # If that fails, try JavaScript click
-                                            driver.execute_script("arguments[0].click();", checkbox)
-                                            
-                                        self.log("Mengklik checkbox pernyataan...")
-                                except Exception as e:
-                                    self.log(f"Gagal mengklik checkbox: {e}")
-                        except Exception as e:
-                            self.log(f"Error pada checkbox: {str(e)}")
-                        
-                        # After clicking checkbox - update progress
-                        current_step += 1
-                        progress = min(int((current_step / total_steps) * 100), 99)
-                        self.progress_signal.emit(progress)
-                        
-                        # Click simpan EPBM button
-                        try:
-                            # Find and click the save button
-                            save_buttons = WebDriverWait(driver, 3).until(
-                                EC.presence_of_all_elements_located((By.XPATH, "//button[contains(text(), 'Simpan EPBM')]"))
-                            )
-                            
-                            if save_buttons:
-                                self.log("Menyimpan EPBM Sarana dan Prasarana...")
-                                # Try normal click first
-                                try:
-                                    save_buttons[0].click()
-                                except:
-                                    # If that fails, try JavaScript click
-                                    driver.execute_script("arguments[0].click();", save_buttons[0])
-                                
-                                # Handling modals that may appear after saving
-                                try:
-                                    # Look for modal dialog or success message
-                                    WebDriverWait(driver, 3).until(
-                                        EC.presence_of_element_located((By.CLASS_NAME, "modal-dialog"))
-                                    )
-                                    self.log("Dialog modal terdeteksi setelah menyimpan")
-                                    
-                                    # Find and click OK/Close button on modal
-                                    modal_buttons = driver.find_elements(By.CSS_SELECTOR, ".modal-footer button, .modal button.btn, .modal .close")
-                                    if modal_buttons:
-                                        try:
-                                            modal_buttons[0].click()
-                                            self.log("Mengklik tombol pada modal dialog")
-                                        except:
-                                            driver.execute_script("arguments[0].click();", modal_buttons[0])
-                                except:
-                                    # No modal found or timeout, that's fine
-                                    pass
-                                
-                                # Navigate back to main page
-                                try:
-                                    driver.get("https://studentportal.ipb.ac.id/Akademik/EPBM/Detail")
-                                    WebDriverWait(driver, 8).until(
-                                        EC.presence_of_element_located((By.CSS_SELECTOR, ".btn.card.small-box"))
-                                    )
-                                    self.log("EPBM Sarana dan Prasarana berhasil disimpan!")
-                                except:
-                                    # If navigate fails, try once more
-                                    driver.get("https://studentportal.ipb.ac.id/Akademik/EPBM/Detail")
-                                    time.sleep(2)
-                                    self.log("Kembali ke halaman utama setelah menyimpan")
-                        except Exception as e:
-                            self.log(f"Error ketika menyimpan data (akan mencoba kembali ke halaman utama): {str(e)}")
-                            try:
-                                driver.get("https://studentportal.ipb.ac.id/Akademik/EPBM/Detail")
-                                time.sleep(2)
-                            except:
-                                self.log("Gagal kembali ke halaman utama setelah error")
-                        
-                        # After saving - update progress for this course completion
-                        current_step += 1
-                        progress = min(int((current_step / total_steps) * 100), 99)
-                        self.progress_signal.emit(progress)
-                    
-                    else:
-                        # Regular mata kuliah EPBM
-                        # Wait for the form page to load with a shorter timeout
-                        try:
-                            WebDriverWait(driver, 3).until(  # Reduced from 5 to 3 seconds
-                                EC.presence_of_element_located((By.CSS_SELECTOR, ".b-rating"))
-                            )
-                            self.log("Halaman form EPBM telah dimuat.")
-                        except:
-                            self.log("Timeout pada loading halaman, mencoba melanjutkan...")
-                        
-                        # Process all form pages with progress updates
-                        page_count = 0
-                        while True:
-                            # Check the current page heading
-                            try:
-                                page_headings = driver.find_elements(By.TAG_NAME, "h5")
-                                current_page = ""
-                                for heading in page_headings:
-                                    heading_text = heading.text
-                                    current_page = heading_text
-                                    self.log(f"Mengisi halaman: {heading_text}")
-                                    break
-                            except:
-                                self.log("Tidak dapat menemukan heading halaman")
-                            
-                            # Fill star ratings (if available)
-                            try:
-                                star_ratings = driver.find_elements(By.CSS_SELECTOR, ".b-rating")
-                                if star_ratings:
-                                    self.log(f"Mengisi {len(star_ratings)} pertanyaan...")
-                                    
-                                    for j, rating in enumerate(star_ratings):
-                                        # Determine which rating to use based on the page
-                                        star_value = 4  # Default
-                                        
-                                        if "1. Pertanyaan terkait mata kuliah" in current_page:
-                                            if j == 0:  # Proses pembelajaran sesuai harapan
-                                                star_value = self.settings['matkul_sesuai_harapan']
-                                            elif j == 1:  # Proses pembelajaran menyenangkan
-                                                star_value = self.settings['matkul_menyenangkan']
-                                            elif j == 2:  # Proses asesmen terbuka
-                                                star_value = self.settings['matkul_asesmen']
-                                            elif j == 3:  # Kesempatan hardskill/softskill
-                                                star_value = self.settings['matkul_hardskill']
-                                            elif j == 4:  # Dokumen ajar
-                                                star_value = self.settings['matkul_dokumen']
-                                        elif "2. Dosen memberikan kuliah dengan metode ceramah" in current_page:
-                                            star_value = self.settings['dosen_ceramah']
-                                        elif "3. Dosen menyampaikan kuliah dengan menjadi mentor" in current_page:
-                                            star_value = self.settings['dosen_mentor']
-                                        elif "4. Dosen memberikan contoh/ilustrasi" in current_page:
-                                            star_value = self.settings['dosen_ilustrasi']
-                                        elif "5. Dosen menfaatkan ketersediaan teknologi" in current_page:
-                                            star_value = self.settings['dosen_teknologi']
-                                        elif "6. Dosen memberikan umpan balik" in current_page:
-                                            star_value = self.settings['dosen_feedback']
-                                        
-                                        # Get all stars in the current rating
-                                        stars = rating.find_elements(By.CSS_SELECTOR, ".b-rating-star")
-                                        
-                                        # Click on the star based on the rating (1-4)
-                                        if len(stars) >= star_value and star_value > 0:
-                                            try:
-                                                stars[star_value - 1].click()
-                                            except:
-                                                # Use JavaScript if click fails
-                                                try:
-                                                    driver.execute_script("arguments[0].click();", stars[star_value - 1])
-                                                except:
-                                                    self.log("Gagal mengklik rating")
-                                                    
-                                            # Reduce delay between clicks for faster processing
-                                            time.sleep(0.1)  # Reduced from 0.2 to 0.1 seconds
-                            except Exception as e:
-                                self.log(f"Error pada pengisian rating: {str(e)}")
-                            
-                            # After filling a page - update progress
-                            if page_count % 2 == 0:  # Update every other page to avoid too frequent updates
-                                current_step += 1
-                                progress = min(int((current_step / total_steps) * 100), 99)
-                                self.progress_signal.emit(progress)
-                            
-                            page_count += 1
-                            
-                            # Check if we're on the saran page
-                            if "7. Berikan saran untuk masing-masing dosen pengajar" in current_page:
-                                # Fill suggestion text areas
-                                try:
-                                    text_areas = driver.find_elements(By.TAG_NAME, "textarea")
-                                    for text_area in text_areas:
-                                        try:
-                                            text_area.clear()  # Clear first to ensure text is properly entered
-                                            text_area.send_keys(self.settings['saran_dosen'])
-                                            self.log("Mengisi saran untuk dosen...")
-                                        except Exception as e:
-                                            # Try JavaScript alternative if direct input fails
-                                            try:
-                                                js_text = self.settings['saran_dosen'].replace("'", "\\'")
-                                                driver.execute_script(f"arguments[0].value = '{js_text}';", text_area)
-                                                self.log("Menggunakan JavaScript untuk mengisi saran...")
-                                            except:
-                                                self.log(f"Gagal mengisi saran: {e}")
-                                except Exception as e:
-                                    self.log(f"Error mencari textarea: {str(e)}")
-                            
-                            # Check for the checkbox at the final page
-                            try:
-                                checkboxes = driver.find_elements(By.CSS_SELECTOR, "input[type='checkbox']")
-                                for checkbox in checkboxes:
-                                    try:
-                                        if not checkbox.is_selected():
-                                            try:
-                                                checkbox.click()
-                                            except:
-                                                # Use JavaScript if click fails
-                                                driver.execute_script("arguments[0].click();", checkbox)
-                                                
-                                            self.log("Mengklik checkbox pernyataan...")
-                                    except Exception as e:
-                                        self.log(f"Gagal mengklik checkbox: {e}")
-                            except Exception as e:
-                                self.log(f"Error pada checkbox: {str(e)}")
-                            
-                            # Check if there's a "Simpan EPBM" button (final page)
-                            save_buttons = driver.find_elements(By.XPATH, "//button[contains(text(), 'Simpan EPBM')]")
-                            if save_buttons:
-                                self.log("Halaman terakhir terdeteksi.")
-                                try:
-                                    self.log("Menyimpan EPBM...")
-                                    # Try normal click first
-                                    try:
-                                        save_buttons[0].click()
-                                    except:
-                                        # If that fails, try JavaScript click
-                                        driver.execute_script("arguments[0].click();", save_buttons[0])
-                                    
-                                    # Handling modals that may appear
-                                    try:
-                                        # Wait for any modal dialog
-                                        WebDriverWait(driver, 3).until(
-                                            EC.presence_of_element_located((By.CLASS_NAME, "modal-dialog"))
-                                        )
-                                        self.log("Dialog modal terdeteksi setelah menyimpan")
-                                        
-                                        # Find and click any button in the modal
-                                        modal_buttons = driver.find_elements(By.CSS_SELECTOR, ".modal-footer button, .modal button.btn, .modal .close")
-                                        if modal_buttons:
-                                            try:
-                                                modal_buttons[0].click()
-                                                self.log("Mengklik tombol pada modal dialog")
-                                            except:
-                                                # Use JavaScript if click fails
-                                                driver.execute_script("arguments[0].click();", modal_buttons[0])
-                                    except:
-                                        # No modal found or timeout, that's fine
-                                        pass
-                                    
-                                    # Navigate back to main page
-                                    try:
-                                        # Wait for completion with shorter timeouts
-                                        driver.get("https://studentportal.ipb.ac.id/Akademik/EPBM/Detail")
-                                        WebDriverWait(driver, 8).until(
-                                            EC.presence_of_element_located((By.CSS_SELECTOR, ".btn.card.small-box"))
-                                        )
-                                        self.log("EPBM berhasil disimpan!")
-                                    except:
-                                        # If wait fails, just wait a bit and continue
-                                        driver.get("https://studentportal.ipb.ac.id/Akademik/EPBM/Detail")
-                                        time.sleep(2)
-                                        self.log("EPBM kemungkinan berhasil disimpan.")
-                                except Exception as e:
-                                    # If there's an error during save, try to recover
-                                    self.log(f"Terjadi error saat simpan: {str(e)}")
-                                    self.log("Mencoba kembali ke halaman utama...")
-                                    
-                                    # If error has stacktrace, don't show it in the log
-                                    if "Stacktrace:" in str(e):
-                                        self.log("Error tersebut umum terjadi dan biasanya tidak mempengaruhi hasil pengisian.")
-                                    
-                                    try:
-                                        driver.get("https://studentportal.ipb.ac.id/Akademik/EPBM/Detail")
-                                        time.sleep(2)
-                                    except:
-                                        self.log("Gagal kembali ke halaman utama")
-                                break
-                            
-                            # Otherwise, click "Selanjutnya" to go to the next page
-                            try:
-                                next_buttons = driver.find_elements(By.XPATH, "//button[contains(text(), 'Selanjutnya')]")
-                                if next_buttons:
-                                    self.log("Menuju halaman selanjutnya...")
-                                    try:
-                                        next_buttons[0].click()
-                                    except:
-                                        # Use JavaScript if click fails
-                                        driver.execute_script("arguments[0].click();", next_buttons[0])
-                                        
-                                    # Shorter wait time for faster processing
-                                    time.sleep(0.3)  # Reduced from 0.7 to 0.3 seconds
-                                else:
-                                    self.log("Tidak menemukan tombol Selanjutnya atau Simpan EPBM.")
-                                    break
-                            except Exception as e:
-                                self.log(f"Error saat mencoba ke halaman selanjutnya: {str(e)}")
-                                break
-                    
-                    self.log("Kembali ke halaman utama EPBM.")
-                    
-                except Exception as e:
-                    self.log(f"Terjadi error saat mengisi EPBM: {str(e)}")
-                    
-                    # Don't show stacktrace in the log to keep it clean
-                    if "Stacktrace:" in str(e):
-                        self.log("Error tersebut umum terjadi dan biasanya tidak mempengaruhi hasil pengisian.")
-                    
-                    # Always try to go back to the main page
-                    try:
-                        driver.get("https://studentportal.ipb.ac.id/Akademik/EPBM/Detail")
-                        time.sleep(2)
-                    except:
-                        self.log("Gagal kembali ke halaman utama, mencoba lagi...")
-                        try:
-                            driver.get("https://studentportal.ipb.ac.id/Akademik/EPBM/Detail")
-                            time.sleep(3)
-                        except:
-                            self.log("Gagal kembali ke halaman utama setelah beberapa percobaan")
-            
-            # Set final progress to 100% when everything is done
-            self.progress_signal.emit(100)
-            self.log("\nProses pengisian EPBM selesai!")
-            
-        except Exception as e:
-            self.log(f"Terjadi error pada proses keseluruhan: {e}")
-        finally:
-            # Close the browser
-            driver.quit()
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -1010,9 +510,10 @@ class MainWindow(QMainWindow):
         progress_layout.addWidget(self.status_label)
         
         self.progress_bar = QProgressBar()
-        self.progress_bar.setRange(0, 100)
+        # Tenths of a percent, the label shows the exact percentage
+        self.progress_bar.setRange(0, 1000)
         self.progress_bar.setValue(0)
-        self.progress_bar.setFormat("%p% (%v/%m)")
+        self.progress_bar.setFormat("0.0%")
         self.progress_bar.setStyleSheet("""
             QProgressBar {
                 border: 1px solid #b3d4fc;
@@ -1146,6 +647,8 @@ class MainWindow(QMainWindow):
                 padding: 5px;
             }
         """)
+        # Oldest lines are dropped once the panel is full
+        self.log_text.document().setMaximumBlockCount(MAX_LOG_LINES)
         log_layout.addWidget(self.log_text)
         
         # Log control buttons
@@ -1211,6 +714,30 @@ class MainWindow(QMainWindow):
         # Worker threads
         self.finder_worker = None
         self.automation_worker = None
+        # Selection dialog of the running scan, opened with its first course
+        self.selection_dialog = None
+        # Until the scan is done its session hasn't been handed over, a run started now would log in again
+        self.scanning = False
+        
+        # Logged-in browser from the last scan, handed over to the automation run
+        self.portal_session = None
+        # Timings of the last scan, reported with the next run's
+        self.scan_timer = None
+        self.resume_run = False
+        # Headless browser started while the credentials are typed, claimed by the first scan
+        self.warm_browser = WarmBrowser()
+        
+        # Resolve chromedriver in the background so the first scan doesn't wait for it
+        threading.Thread(target=resolve_driver_path, daemon=True).start()
+        
+        # Log lines are buffered and written to the panel and the log file in batches
+        self.log_buffer = []
+        self.log_file = LogFile()
+        self.log_formats = self.create_log_formats()
+        self.log_flush_timer = QTimer(self)
+        self.log_flush_timer.setSingleShot(True)
+        self.log_flush_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self.log_flush_timer.timeout.connect(self.flush_log)
         
         # Add welcome message
         self.update_log("Selamat datang di AutoEPBM StudentPortal!", "success")
@@ -1316,6 +843,7 @@ class MainWindow(QMainWindow):
                 border: 1px solid #2c75b3;
             }
         """)
+        self.username_input.textEdited.connect(self.prewarm_browser)
         username_layout.addWidget(self.username_input)
         
         credentials_layout.addRow("Username:", username_layout)
@@ -1363,6 +891,67 @@ class MainWindow(QMainWindow):
         headless_layout.addWidget(headless_info, 1)
         options_layout.addLayout(headless_layout)
         
+        # Throughput-oriented browser profile for slow connections
+        fast_layout = QHBoxLayout()
+        self.fast_profile_checkbox = QCheckBox("Mode cepat")
+        self.fast_profile_checkbox.setChecked(False)
+        self.fast_profile_checkbox.toggled.connect(self.prewarm_browser)
+        fast_layout.addWidget(self.fast_profile_checkbox)
+        fast_info = QLabel("Tidak memuat gambar, font, dan situs selain portal")
+        fast_info.setStyleSheet("color: #7f8c8d; font-style: italic;")
+        fast_layout.addWidget(fast_info, 1)
+        options_layout.addLayout(fast_layout)
+        
+        # Opt-in, the cookies are stored encrypted with the password
+        remember_layout = QHBoxLayout()
+        self.remember_session_checkbox = QCheckBox("Ingat sesi login")
+        self.remember_session_checkbox.setChecked(False)
+        remember_layout.addWidget(self.remember_session_checkbox)
+        remember_info = QLabel("Lewati login berikutnya, sesi disimpan terenkripsi")
+        remember_info.setStyleSheet("color: #7f8c8d; font-style: italic;")
+        remember_layout.addWidget(remember_info, 1)
+        options_layout.addLayout(remember_layout)
+        
+        # The Detail page is checked once after the run, this fills what it doesn't show again
+        requeue_layout = QHBoxLayout()
+        self.requeue_checkbox = QCheckBox("Isi ulang yang belum terkonfirmasi")
+        self.requeue_checkbox.setChecked(False)
+        requeue_layout.addWidget(self.requeue_checkbox)
+        requeue_info = QLabel("Mata kuliah tanpa centang di halaman Detail diisi sekali lagi")
+        requeue_info.setStyleSheet("color: #7f8c8d; font-style: italic;")
+        requeue_layout.addWidget(requeue_info, 1)
+        options_layout.addLayout(requeue_layout)
+        
+        # Filling engine, the HTTP engine submits the forms without opening Chrome
+        engine_layout = QHBoxLayout()
+        engine_layout.addWidget(QLabel("Mesin pengisian:"))
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItem("Browser (Chrome)", SELENIUM_ENGINE)
+        self.engine_combo.addItem("HTTP langsung (tanpa browser)", HTTP_ENGINE)
+        self.engine_combo.addItem("Chrome DevTools (tanpa chromedriver)", CDP_ENGINE)
+        self.engine_combo.currentIndexChanged.connect(self.prewarm_browser)
+        engine_layout.addWidget(self.engine_combo, 1)
+        options_layout.addLayout(engine_layout)
+        
+        # Unattended runs: the scan hands each course the policy picks straight to the fillers
+        preferences = QSettings("AutoEPBM", "AutoEPBM")
+        auto_layout = QHBoxLayout()
+        self.auto_mode_checkbox = QCheckBox("Mode otomatis")
+        self.auto_mode_checkbox.setChecked(preferences.value("auto_mode", False, type=bool))
+        self.auto_mode_checkbox.setToolTip("Langsung mengisi selagi mencari, tanpa memilih mata kuliah")
+        auto_layout.addWidget(self.auto_mode_checkbox)
+        self.policy_combo = QComboBox()
+        for name, (label, _) in SELECTION_POLICIES.items():
+            self.policy_combo.addItem(label, name)
+        self.policy_combo.setCurrentIndex(max(0, self.policy_combo.findData(
+            preferences.value("policy", DEFAULT_POLICY))))
+        self.policy_combo.setEnabled(self.auto_mode_checkbox.isChecked())
+        self.auto_mode_checkbox.toggled.connect(self.policy_combo.setEnabled)
+        self.auto_mode_checkbox.toggled.connect(self.save_auto_mode)
+        self.policy_combo.currentIndexChanged.connect(self.save_auto_mode)
+        auto_layout.addWidget(self.policy_combo, 1)
+        options_layout.addLayout(auto_layout)
+        
         options_group.setLayout(options_layout)
         layout.addWidget(options_group)
         
@@ -1516,6 +1105,19 @@ class MainWindow(QMainWindow):
         preset_group.setLayout(preset_layout)
         layout.addWidget(preset_group)
         
+        # Speed settings group
+        speed_group = QGroupBox("Pengaturan Kecepatan")
+        speed_layout = QFormLayout()
+        
+        self.parallel_browsers = QSpinBox()
+        self.parallel_browsers.setRange(1, 8)
+        self.parallel_browsers.setValue(1)
+        self.parallel_browsers.setToolTip("Setiap browser mengisi mata kuliah yang berbeda secara bersamaan")
+        speed_layout.addRow("Jumlah browser paralel:", self.parallel_browsers)
+        
+        speed_group.setLayout(speed_layout)
+        layout.addWidget(speed_group)
+        
         # Light mode spinboxes
         spinbox_style = """
             QSpinBox {
@@ -1543,7 +1145,7 @@ class MainWindow(QMainWindow):
             self.matkul_hardskill, self.matkul_dokumen, self.dosen_ceramah,
             self.dosen_mentor, self.dosen_ilustrasi, self.dosen_teknologi,
             self.dosen_feedback, self.sarpras_kenyamanan, self.sarpras_internet,
-            self.sarpras_toilet
+            self.sarpras_toilet, self.parallel_browsers
         ]:
             spinbox.setStyleSheet(spinbox_style)
         
@@ -1562,10 +1164,26 @@ class MainWindow(QMainWindow):
             }
         """)
     
+    def browser_profile(self):
+        return FAST_PROFILE if self.fast_profile_checkbox.isChecked() else STANDARD_PROFILE
+    
+    def prewarm_browser(self, *args):
+        # Only once the user starts on the credentials, and again for another profile or engine
+        engine = self.engine_combo.currentData()
+        if self.username_input.text() and engine != HTTP_ENGINE:
+            self.warm_browser.start(self.browser_profile(), PORTAL_URL, engine)
+    
+    def save_auto_mode(self, *args):
+        preferences = QSettings("AutoEPBM", "AutoEPBM")
+        preferences.setValue("auto_mode", self.auto_mode_checkbox.isChecked())
+        preferences.setValue("policy", self.policy_combo.currentData())
+    
     def toggle_autoscroll(self, enabled):
         self.autoscroll_enabled = enabled
     
     def clear_log(self):
+        # Pending lines still go to the log file
+        self.flush_log()
         self.log_text.clear()
         # Update style for log text to match light theme
         self.log_text.setStyleSheet("""
@@ -1605,29 +1223,47 @@ class MainWindow(QMainWindow):
             spinbox.setValue(3)
         self.update_log("Semua nilai diatur ke 3 (sedang).", "info")
     
+    def create_log_formats(self):
+        # Format based on message level - update colors for light theme
+        formats = {}
+        for level, color, bold in [
+            ("success", "#27ae60", True),   # Darker green for light background
+            ("info", "#2980b9", False),     # Darker blue for light background
+            ("warning", "#d35400", False),  # Darker orange for light background
+            ("error", "#c0392b", True),     # Darker red for light background
+            ("normal", "#333333", False),   # Default text color for light background
+        ]:
+            format = QTextCharFormat()
+            format.setForeground(QColor(color))
+            if bold:
+                format.setFontWeight(QFont.Bold)
+            formats[level] = format
+        return formats
+    
     @pyqtSlot(str)
     def update_log(self, message, level="normal"):
-        # Format based on message level - update colors for light theme
-        cursor = self.log_text.textCursor()
-        format = QTextCharFormat()
-        
-        if level == "success":
-            format.setForeground(QColor("#27ae60"))  # Darker green for light background
-            format.setFontWeight(QFont.Bold)
-        elif level == "info":
-            format.setForeground(QColor("#2980b9"))  # Darker blue for light background
-        elif level == "warning":
-            format.setForeground(QColor("#d35400"))  # Darker orange for light background
-        elif level == "error":
-            format.setForeground(QColor("#c0392b"))  # Darker red for light background
-            format.setFontWeight(QFont.Bold)
-        else:
-            format.setForeground(QColor("#333333"))  # Default text color for light background
+        # Only queue the line, the timer writes everything queued in one go
+        self.log_buffer.append((time.strftime("[%H:%M:%S] "), message, level))
+        if not self.log_flush_timer.isActive():
+            self.log_flush_timer.start()
+    
+    def flush_log(self):
+        if not self.log_buffer:
+            return
+        lines, self.log_buffer = self.log_buffer, []
         
+        cursor = self.log_text.textCursor()
         cursor.movePosition(QTextCursor.End)
-        cursor.insertText(time.strftime("[%H:%M:%S] "))
+        plain = QTextCharFormat()
+        
+        # A single edit block, so the document is laid out once per batch
+        cursor.beginEditBlock()
+        for timestamp, message, level in lines:
+            cursor.insertText(timestamp, plain)
+            cursor.insertText(message + "\n", self.log_formats.get(level, self.log_formats["normal"]))
+        cursor.endEditBlock()
         
-        cursor.insertText(message + "\n", format)
+        self.log_file.write([timestamp + message for timestamp, message, level in lines])
         
         # Auto-scroll if enabled
         if self.autoscroll_enabled:
@@ -1643,6 +1279,29 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Input Error", "Mohon masukkan username dan password!")
             return
             
+        # Offer to finish a run that stopped halfway instead of scanning again
+        journal = RunJournal.for_user(username, PORTAL_URL)
+        pending = journal.pending()
+        self.resume_run = False
+        if pending is not None:
+            courses, _ = pending
+            answer = QMessageBox.question(self, "Lanjutkan Pengisian",
+                                          f"Pengisian sebelumnya terhenti dengan {len(courses)} mata kuliah "
+                                          "yang belum tersimpan.\nLanjutkan tanpa memindai ulang?",
+                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+            if answer == QMessageBox.Yes:
+                self.resume_run = True
+                self.selected_courses = courses
+                self.update_selected_courses_counter()
+                self.update_log(f"Melanjutkan pengisian sebelumnya: {len(courses)} mata kuliah belum tersimpan.",
+                                "info")
+                return
+            journal.discard()
+        
+        if self.auto_mode_checkbox.isChecked():
+            self.start_auto_run({'username': username, 'password': password})
+            return
+        
         # Disable buttons
         self.find_courses_button.setEnabled(False)
         self.find_courses_button.setText("Mencari Mata Kuliah...")
@@ -1658,54 +1317,99 @@ class MainWindow(QMainWindow):
         self.clear_log()
         self.update_log("Memulai pencarian mata kuliah...", "info")
         
+        # A new scan starts its own browser session
+        self.release_portal_session()
+        
+        # The list fills up while the scan runs
+        self.available_courses = []
+        self.course_list.clear()
+        self.found_counter.setText("0")
+        self.completed_counter.setText("0")
+        self.selection_dialog = None
+        self.scanning = True
+        self.update_selected_courses_counter()
+        
         # Create and start finder worker thread
-        self.finder_worker = CourseFinderWorker(credentials)
+        self.finder_worker = CourseFinderWorker(credentials, self.browser_profile(),
+                                                remember_session=self.remember_session_checkbox.isChecked(),
+                                                warm_browser=self.warm_browser,
+                                                engine=self.engine_combo.currentData())
+        self.scan_timer = self.finder_worker.timer
         self.finder_worker.update_signal.connect(lambda msg: self.update_log(msg))
-        self.finder_worker.courses_found_signal.connect(self.show_course_selection)
+        self.finder_worker.session_signal.connect(self.store_portal_session)
+        self.finder_worker.course_found_signal.connect(self.add_found_course)
         self.finder_worker.finished_signal.connect(self.finder_finished)
         self.finder_worker.start()
     
-    def show_course_selection(self, courses):
-        self.available_courses = courses
-        
-        # Update counters
-        total_courses = len(courses)
-        completed_courses = sum(1 for c in courses if c.get('is_completed', False))
-        
-        self.found_counter.setText(str(total_courses))
-        self.completed_counter.setText(str(completed_courses))
-        
-        # Clear course list
-        self.course_list.clear()
+    def start_auto_run(self, credentials):
+        """Scan and fill in one go, with the courses the selected policy picks."""
+        self.find_courses_button.setEnabled(False)
+        self.find_courses_button.setText("Mengisi Otomatis...")
+        self.start_button.setEnabled(False)
+        self.start_button.setText("Sedang Berjalan...")
+        self.centralWidget().findChild(QTabWidget).setCurrentIndex(2)
+        self.clear_log()
+        self.release_portal_session()
+        self.scan_timer = None
         
-        # Add courses to list with status indicators
-        for course in courses:
-            title = course['title']
-            desc = course['desc']
-            status = "[Sudah Diisi]" if course.get('is_completed', False) else ""
-            
-            item_text = f"{title}: {desc} {status}"
-            item = QListWidgetItem(item_text)
-            
-            if course.get('is_completed', False):
-                item.setForeground(QColor("#f39c12"))  # Orange for completed
-            else:
-                item.setForeground(QColor("#2ecc71"))  # Green for available
-                
-            self.course_list.addItem(item)
+        self.automation_worker = EPBMAutomationWorker(credentials, self.collect_settings(), None,
+                                                      warm_browser=self.warm_browser,
+                                                      policy=self.policy_combo.currentData())
+        self.automation_worker.update_signal.connect(self.update_log)
+        self.automation_worker.progress_signal.connect(self.update_progress)
+        self.automation_worker.finished_signal.connect(self.automation_finished)
+        self.automation_worker.start()
+    
+    def store_portal_session(self, session):
+        self.release_portal_session()
+        self.portal_session = session
+    
+    def release_portal_session(self):
+        if self.portal_session is not None:
+            session = self.portal_session
+            self.portal_session = None
+            # Quitting Chrome can take a moment, keep it off the UI thread
+            threading.Thread(target=session.close, daemon=True).start()
+    
+    @pyqtSlot(dict)
+    def add_found_course(self, course):
+        self.available_courses.append(course)
         
-        # Create course selection dialog
-        dialog = CourseSelectionDialog(courses, self)
-        if dialog.exec_():
-            self.selected_courses = dialog.get_selected_courses()
-            self.update_selected_courses_counter()
+        # Update counters
+        self.found_counter.setText(str(len(self.available_courses)))
+        if course.get('is_completed', False):
+            self.completed_counter.setText(str(int(self.completed_counter.text()) + 1))
+        
+        # Add the course to the list with its status indicator
+        status = "[Sudah Diisi]" if course.get('is_completed', False) else ""
+        item = QListWidgetItem(f"{course['title']}: {course['desc']} {status}")
+        if course.get('is_completed', False):
+            item.setForeground(QColor("#f39c12"))  # Orange for completed
+        else:
+            item.setForeground(QColor("#2ecc71"))  # Green for available
+        self.course_list.addItem(item)
+        
+        # The selection dialog opens with the first course and keeps filling while the scan goes on
+        if self.selection_dialog is None:
+            self.selection_dialog = CourseSelectionDialog([], self)
+            self.selection_dialog.set_scanning(self.scanning)
+            self.selection_dialog.accepted.connect(self.course_selection_accepted)
+            self.selection_dialog.add_course(course)
+            self.selection_dialog.open()
+        else:
+            self.selection_dialog.add_course(course)
+    
+    def course_selection_accepted(self):
+        self.selected_courses = self.selection_dialog.get_selected_courses()
+        self.update_selected_courses_counter()
             
     def update_selected_courses_counter(self):
         if self.selected_courses:
             self.selected_counter.setText(str(len(self.selected_courses)))
-            self.start_button.setEnabled(True)
+            self.start_button.setEnabled(not self.scanning)
             self.edit_courses_button.setEnabled(True)
-            self.status_label.setText(f"Siap mengisi {len(self.selected_courses)} mata kuliah")
+            self.status_label.setText(f"{len(self.selected_courses)} mata kuliah dipilih, menunggu pencarian selesai"
+                                      if self.scanning else f"Siap mengisi {len(self.selected_courses)} mata kuliah")
         else:
             self.selected_counter.setText("0")
             self.start_button.setEnabled(False)
@@ -1713,9 +1417,15 @@ class MainWindow(QMainWindow):
             self.status_label.setText("Belum ada mata kuliah yang dipilih")
     
     def finder_finished(self, success, message):
+        # The scan's session, if any, arrived before this, a run may start now
+        self.scanning = False
+        self.update_selected_courses_counter()
+        
         # Re-enable finder button
         self.find_courses_button.setEnabled(True)
         self.find_courses_button.setText("Cari Mata Kuliah")
+        if self.selection_dialog is not None:
+            self.selection_dialog.set_scanning(False)
         
         # Show message if error
         if not success:
@@ -1747,9 +1457,36 @@ class MainWindow(QMainWindow):
             'username': username,
             'password': password
         }
+        settings = self.collect_settings()
+        
+        # Switch to log tab
+        self.centralWidget().findChild(QTabWidget).setCurrentIndex(2)
+        
+        # Clear log
+        self.clear_log()
+        
+        # Hand the browser from the scan over to the worker, it owns it from now on
+        session = self.portal_session
+        self.portal_session = None
+        scan_timer, self.scan_timer = self.scan_timer, None
         
-        settings = {
+        # Create and start worker thread
+        resume, self.resume_run = self.resume_run, False
+        self.automation_worker = EPBMAutomationWorker(credentials, settings, self.selected_courses,
+                                                      session, scan_timer, resume, self.warm_browser)
+        self.automation_worker.update_signal.connect(self.update_log)
+        self.automation_worker.progress_signal.connect(self.update_progress)
+        self.automation_worker.finished_signal.connect(self.automation_finished)
+        self.automation_worker.start()
+        
+    def collect_settings(self):
+        return {
             'headless': self.headless_checkbox.isChecked(),
+            'engine': self.engine_combo.currentData(),
+            'browser_profile': self.browser_profile(),
+            'remember_session': self.remember_session_checkbox.isChecked(),
+            'requeue_unconfirmed': self.requeue_checkbox.isChecked(),
+            'workers': self.parallel_browsers.value(),
             # Remove test_mode setting, make it always save
             'matkul_sesuai_harapan': self.matkul_sesuai_harapan.value(),
             'matkul_menyenangkan': self.matkul_menyenangkan.value(),
@@ -1767,46 +1504,43 @@ class MainWindow(QMainWindow):
             'sarpras_toilet': self.sarpras_toilet.value()
         }
         
-        # Switch to log tab
-        self.centralWidget().findChild(QTabWidget).setCurrentIndex(2)
-        
-        # Clear log
-        self.clear_log()
-        
-        # Create and start worker thread
-        self.automation_worker = EPBMAutomationWorker(credentials, settings, self.selected_courses)
-        self.automation_worker.update_signal.connect(self.update_log)
-        self.automation_worker.progress_signal.connect(self.update_progress)
-        self.automation_worker.finished_signal.connect(self.automation_finished)
-        self.automation_worker.start()
-        
-    @pyqtSlot(int)
-    def update_progress(self, value):
+    @pyqtSlot(float, float)
+    def update_progress(self, percent, eta):
         # Update the progress bar with a smooth animation
-        self.progress_bar.setValue(value)
+        self.progress_bar.setValue(int(percent * 10))
+        self.progress_bar.setFormat(f"{percent:.1f}%")
         
         # Also update the status label based on progress
-        if value < 10:
-            self.status_label.setText("Memulai proses...")
-        elif value < 30:
-            self.status_label.setText("Mengisi data mata kuliah...")
-        elif value < 60:
-            self.status_label.setText("Mengisi data dosen...")
-        elif value < 90:
-            self.status_label.setText("Menyelesaikan pengisian...")
-        elif value < 100:
-            self.status_label.setText("Hampir selesai...")
+        if percent < 10:
+            status = "Memulai proses..."
+        elif percent < 30:
+            status = "Mengisi data mata kuliah..."
+        elif percent < 60:
+            status = "Mengisi data dosen..."
+        elif percent < 90:
+            status = "Menyelesaikan pengisian..."
+        elif percent < 100:
+            status = "Hampir selesai..."
         else:
-            self.status_label.setText("Pengisian selesai!")
-            
+            status = "Pengisian selesai!"
+        
+        # Only repaint the labels when their text changes
+        if status != self.status_label.text():
+            self.status_label.setText(status)
+        
         # Update the status bar as well
-        self.statusBar().showMessage(f"Pengisian EPBM: {value}% selesai")
+        eta_text = format_eta(eta) if percent < 100 else ""
+        message = f"Pengisian EPBM: {percent:.1f}% selesai" + (f" ({eta_text})" if eta_text else "")
+        if message != self.statusBar().currentMessage():
+            self.statusBar().showMessage(message)
         
     @pyqtSlot(bool, str)
     def automation_finished(self, success, message):
         # Re-enable start button
-        self.start_button.setEnabled(True)
+        self.start_button.setEnabled(bool(self.selected_courses))
         self.start_button.setText("Mulai Otomasi")
+        self.find_courses_button.setEnabled(True)
+        self.find_courses_button.setText("Cari Mata Kuliah")
         
         # Show message
         if success:
@@ -1820,21 +1554,25 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Perhatian", "Daftar mata kuliah tidak tersedia. Silakan cari mata kuliah terlebih dahulu.")
             return
             
-        # Create course selection dialog with pre-selected courses
-        dialog = CourseSelectionDialog(self.available_courses, self)
-        
-        # Pre-select the currently selected courses
-        selected_ids = [course['index'] for course in self.selected_courses]
-        for checkbox in dialog.checkboxes:
-            if 'course_data' in dir(checkbox) and checkbox.course_data.get('index') in selected_ids:
-                checkbox.setChecked(True)
-            else:
-                checkbox.setChecked(False)
-                
+        # Pre-select the currently selected courses, keyed by their link which stays
+        # stable when completed cards change order
+        dialog = CourseSelectionDialog(self.available_courses, self,
+                                       {course['href'] for course in self.selected_courses})
+        
         if dialog.exec_():
             self.selected_courses = dialog.get_selected_courses()
             self.update_selected_courses_counter()
             self.update_log(f"Pilihan mata kuliah diperbarui: {len(self.selected_courses)} mata kuliah terpilih.", "info")
+    
+    def closeEvent(self, event):
+        # Don't leave a headless Chrome behind when the window is closed
+        if self.portal_session is not None:
+            self.portal_session.close()
+            self.portal_session = None
+        self.warm_browser.release()
+        self.flush_log()
+        self.log_file.close()
+        super().closeEvent(event)
 
 # Main application entry point
 def main():
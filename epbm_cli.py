@@ -0,0 +1,284 @@
+"""Command-line entry point: scan and fill EPBM without the window.
+
+    python epbm_cli.py check -c epbm.json
+    python epbm_cli.py scan -c epbm.json
+    python epbm_cli.py run -c epbm.json --engine http --workers 4
+    python epbm_cli.py run -c epbm.json --stream --policy unfinished_courses
+    python epbm_cli.py run -c epbm.json --requeue
+    python epbm_cli.py batch -m accounts.csv --pool 8
+
+Options on the command line override the config file (see run_config).
+The scan and fill modules are only imported by the commands that use them,
+so --help and check don't pay for the browser and HTTP stacks.
+"""
+
+import argparse
+import sys
+import time
+
+from portal_pages import ENGINES
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_CONFIG = 2
+
+
+def positive_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bukan bilangan bulat: {text}")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"harus minimal 1: {text}")
+    return value
+
+
+class ProgressPrinter:
+    """Prints the run's progress in steps of ten percent."""
+
+    def __init__(self, step=10):
+        self.step = step
+        self.printed = -1
+
+    def __call__(self, percent, eta):
+        reached = int(percent // self.step) * self.step
+        if reached <= self.printed:
+            return
+        self.printed = reached
+        from progress import format_eta
+        print(f"Progres {reached}%{' - ' + format_eta(eta) if eta >= 0 and reached < 100 else ''}", flush=True)
+
+
+def log(message):
+    print(message, flush=True)
+
+
+def command_line_overrides(args):
+    overrides = {
+        'username': args.username,
+        'password_env': args.password_env,
+        'engine': args.engine,
+        'workers': args.workers,
+        'portal_url': args.portal_url,
+        'policy': getattr(args, 'policy', None),
+    }
+    overrides = {key: value for key, value in overrides.items() if value is not None}
+    if args.fast:
+        overrides['browser_profile'] = "fast"
+    if args.show_browser:
+        overrides['headless'] = False
+    if args.remember_session:
+        overrides['remember_session'] = True
+    if args.courses:
+        overrides['courses'] = args.courses
+    if getattr(args, 'requeue', False):
+        overrides['requeue_unconfirmed'] = True
+    return overrides
+
+
+def read_config(args):
+    from run_config import build_settings, credentials_from, load_config
+
+    config = load_config(args.config) if args.config else {}
+    config.update(command_line_overrides(args))
+    return config, credentials_from(config), build_settings(config)
+
+
+def command_check(args):
+    from questionnaire import compile_questionnaire
+
+    config, credentials, settings = read_config(args)
+    compile_questionnaire(settings)
+    print(f"Konfigurasi valid untuk {credentials['username']}: mesin {settings['engine']}, "
+          f"{settings['workers']} worker, profil {settings['browser_profile']}.")
+    return EXIT_OK
+
+
+def command_scan(args):
+    from portal_pages import LoginError
+    from runner import scan_with_settings
+
+    config, credentials, settings = read_config(args)
+    try:
+        courses, _ = scan_with_settings(credentials, settings, log, keep_session=False)
+    except LoginError as e:
+        print(e, file=sys.stderr)
+        return EXIT_FAILED
+    return EXIT_OK if courses else EXIT_FAILED
+
+
+def command_run(args):
+    from portal_pages import LoginError
+    from run_config import select_courses
+    from runner import fill_selected_courses, open_journal, report_timings, scan_with_settings
+    from timing import RunTimer
+
+    if args.stream and not args.dry_run:
+        return command_stream(args)
+
+    config, credentials, settings = read_config(args)
+    timer = RunTimer()
+    session = None
+    try:
+        # A resumed run takes its courses from the journal instead of scanning again
+        journal, selected = open_journal(credentials, settings, log, resume=args.resume and not args.dry_run)
+        if selected is not None:
+            journal.resume(selected)
+        else:
+            if journal.pending() is not None:
+                log("Pengisian sebelumnya belum selesai, gunakan --resume untuk melanjutkannya.")
+            courses, session = scan_with_settings(credentials, settings, log, timer, keep_session=not args.dry_run)
+            selected = select_courses(courses, config.get('courses', ()), args.include_completed)
+            if not selected:
+                log("Tidak ada mata kuliah yang perlu diisi.")
+                return EXIT_OK if courses else EXIT_FAILED
+
+            if args.dry_run:
+                log(f"\nAkan diisi ({len(selected)}):")
+                for course in selected:
+                    log(f"- {course['title']}: {course['desc']}")
+                return EXIT_OK
+            journal.start(selected)
+
+        session, claimed = None, session
+        saved = fill_selected_courses(credentials, settings, selected, log, ProgressPrinter(), claimed, timer,
+                                      journal)
+    except LoginError as e:
+        print(e, file=sys.stderr)
+        return EXIT_FAILED
+    finally:
+        if session is not None:
+            session.close()
+        report_timings(timer, log)
+    return EXIT_OK if all(saved) else EXIT_FAILED
+
+
+def command_stream(args):
+    from pipeline import run_pipeline
+    from portal_pages import LoginError
+    from runner import fill_selected_courses, open_journal, report_timings
+    from timing import RunTimer
+
+    config, credentials, settings = read_config(args)
+    timer = RunTimer()
+    try:
+        journal, selected = open_journal(credentials, settings, log, resume=args.resume)
+        if selected is not None:
+            # Nothing left to scan for, the journal already knows the courses
+            journal.resume(selected)
+            saved = fill_selected_courses(credentials, settings, selected, log, ProgressPrinter(), None, timer,
+                                          journal)
+        else:
+            if journal.pending() is not None:
+                log("Pengisian sebelumnya belum selesai, gunakan --resume untuk melanjutkannya.")
+            selected, saved = run_pipeline(credentials, settings, settings['policy'], log, ProgressPrinter(), timer,
+                                           journal, config.get('courses', ()))
+            if not selected:
+                log("Tidak ada mata kuliah yang perlu diisi.")
+    except LoginError as e:
+        print(e, file=sys.stderr)
+        return EXIT_FAILED
+    finally:
+        report_timings(timer, log)
+    return EXIT_OK if all(saved) else EXIT_FAILED
+
+
+def command_batch(args):
+    from batch import export_results, load_manifest, prepare_accounts, run_batch, summary_lines
+    from log_file import LogFile
+    from run_config import load_config
+
+    base = load_config(args.config) if args.config else {}
+    overrides = command_line_overrides(args)
+    configs = [{**base, **account, **overrides} for account in load_manifest(args.manifest)]
+    accounts = prepare_accounts(configs)
+    if not accounts:
+        log("Manifest tidak berisi akun.")
+        return EXIT_OK
+
+    # The full log of every account goes to the log file, the terminal gets one line per account
+    log_file = LogFile()
+
+    def batch_log(message):
+        log_file.write([message])
+        if args.verbose:
+            log(message)
+
+    def report(result):
+        log(f"{result['username']}: {result['status']}, {result['saved']}/{result['selected']} tersimpan "
+            f"({result['seconds']:.1f} dtk){' - ' + result['message'] if result['message'] else ''}")
+
+    started = time.perf_counter()
+    try:
+        results = run_batch(accounts, batch_log, args.pool, args.dry_run, report)
+    finally:
+        log_file.close()
+    for line in summary_lines(results, time.perf_counter() - started):
+        log(line)
+    json_path, csv_path = export_results(results)
+    log(f"Hasil per akun disimpan di {json_path} dan {csv_path}, log lengkap di {log_file.path}")
+    return EXIT_OK if all(result['status'] == "ok" for result in results) else EXIT_FAILED
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="epbm_cli", description="Isi EPBM StudentPortal IPB tanpa jendela aplikasi.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    options = argparse.ArgumentParser(add_help=False)
+    options.add_argument("-c", "--config", help="file konfigurasi JSON")
+    options.add_argument("--username")
+    options.add_argument("--password-env", help="variabel lingkungan yang berisi password")
+    options.add_argument("--engine", choices=ENGINES,
+                         help="cdp mengendalikan Chrome lewat DevTools tanpa chromedriver")
+    options.add_argument("--workers", type=int, help="jumlah browser/koneksi paralel (1-8)")
+    options.add_argument("--fast", action="store_true", help="gunakan profil browser cepat")
+    options.add_argument("--show-browser", action="store_true", help="tampilkan jendela browser saat mengisi")
+    options.add_argument("--remember-session", action="store_true",
+                         help="simpan sesi login terenkripsi agar run berikutnya tidak perlu login")
+    options.add_argument("--portal-url", help=argparse.SUPPRESS)
+    options.add_argument("--courses", nargs="+", help="kode atau nama mata kuliah yang diisi (boleh memakai * dan ?)")
+
+    commands.add_parser("check", parents=[options], help="periksa konfigurasi tanpa membuka portal") \
+        .set_defaults(handler=command_check)
+    commands.add_parser("scan", parents=[options], help="tampilkan mata kuliah di portal") \
+        .set_defaults(handler=command_scan)
+    run = commands.add_parser("run", parents=[options], help="pindai lalu isi mata kuliah yang dipilih")
+    run.add_argument("--dry-run", action="store_true", help="hanya tampilkan mata kuliah yang akan diisi")
+    run.add_argument("--include-completed", action="store_true", help="isi ulang mata kuliah yang sudah diisi")
+    run.add_argument("--resume", action="store_true",
+                     help="lanjutkan pengisian yang terhenti tanpa memindai ulang")
+    run.add_argument("--stream", action="store_true",
+                     help="mulai mengisi selagi pemindaian berjalan, tanpa menunggu daftar lengkap")
+    run.add_argument("--policy", help="mata kuliah yang diisi oleh --stream: unfinished (bawaan) "
+                                      "atau unfinished_courses (tanpa Sarana dan Prasarana)")
+    run.add_argument("--requeue", action="store_true",
+                     help="isi sekali lagi mata kuliah yang belum tercentang di halaman Detail setelah pengisian")
+    run.set_defaults(handler=command_run)
+    batch = commands.add_parser("batch", parents=[options], help="isi EPBM banyak akun dari sebuah manifest")
+    batch.add_argument("-m", "--manifest", required=True, help="daftar akun, CSV atau JSON")
+    batch.add_argument("--pool", type=positive_int, help="jumlah akun yang berjalan sekaligus (bawaan: sesuai CPU dan memori)")
+    batch.add_argument("--dry-run", action="store_true", help="hanya pindai, tanpa mengisi")
+    batch.add_argument("--verbose", action="store_true", help="tampilkan log lengkap setiap akun")
+    batch.set_defaults(handler=command_batch)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    from run_config import ConfigError
+    from questionnaire import SchemaError
+
+    try:
+        return args.handler(args)
+    except (ConfigError, SchemaError) as e:
+        print(e, file=sys.stderr)
+        return EXIT_CONFIG
+    except KeyboardInterrupt:
+        return EXIT_FAILED
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
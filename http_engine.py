@@ -0,0 +1,305 @@
+"""Browserless EPBM engine: logs in and submits the questionnaire forms over plain HTTP."""
+
+import codecs
+import http.cookiejar
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from portal_pages import (EPBM_DETAIL_PATH, PORTAL_URL, CardStreamParser, LoginError, form_fields, is_login_html,
+                          is_saved_html, login_error_message, parse_course_cards, parse_epbm_form, parse_html)
+from questionnaire import compile_questionnaire
+from recovery import PAGE, SESSION, SESSION_EXPIRED, RecoveryPolicy, SessionExpired
+from timing import timed
+
+STREAM_CHUNK = 16 * 1024
+
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/120.0 Safari/537.36")
+
+
+class HttpPortal:
+    """StudentPortal session over plain HTTP, sharing one cookie jar."""
+
+    def __init__(self, base_url=PORTAL_URL, timeout=15):
+        self.base_url = base_url.rstrip("/")
+        self.detail_url = self.base_url + EPBM_DETAIL_PATH
+        self.timeout = timeout
+        self.cookie_jar = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookie_jar))
+        self.opener.addheaders = [("User-Agent", USER_AGENT)]
+
+    def request(self, url, fields=None):
+        """GET the url, or POST the fields form-encoded. Returns the final url and the page."""
+        data = urllib.parse.urlencode(fields).encode() if fields is not None else None
+        with self.opener.open(url, data=data, timeout=self.timeout) as response:
+            charset = response.headers.get_content_charset() or "utf-8"
+            return response.geturl(), response.read().decode(charset, errors="replace")
+
+    def add_cookies(self, cookies):
+        # Selenium cookie dicts, e.g. from the browser used for the course scan
+        default_domain = urllib.parse.urlparse(self.base_url).hostname
+        for cookie in cookies:
+            domain = cookie.get('domain') or default_domain
+            expiry = cookie.get('expiry')
+            self.cookie_jar.set_cookie(http.cookiejar.Cookie(
+                version=0, name=cookie['name'], value=cookie['value'],
+                port=None, port_specified=False,
+                domain=domain, domain_specified=True, domain_initial_dot=domain.startswith("."),
+                path=cookie.get('path', "/"), path_specified=True,
+                secure=cookie.get('secure', False),
+                expires=int(expiry) if expiry is not None else None,
+                discard=expiry is None, comment=None, comment_url=None,
+                rest={'HttpOnly': None} if cookie.get('httpOnly') else {}))
+
+    def cookies(self):
+        """The session cookies as Selenium cookie dicts."""
+        cookies = []
+        for cookie in self.cookie_jar:
+            entry = {'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path,
+                     'secure': cookie.secure, 'httpOnly': cookie.has_nonstandard_attr('HttpOnly')}
+            if cookie.expires is not None:
+                entry['expiry'] = cookie.expires
+            cookies.append(entry)
+        return cookies
+
+    def open_epbm_detail(self, credentials, log, timer=None):
+        """Load the Detail page, logging in first if the session is missing or expired."""
+        with timed(timer, "open_detail"):
+            log("Membuka portal mahasiswa IPB...")
+            url, html = self.request(self.detail_url)
+            root = parse_html(html)
+
+            if is_login_html(url, root):
+                with timed(timer, "login"):
+                    self.login(url, root, credentials, log)
+                url, html = self.request(self.detail_url)
+                root = parse_html(html)
+                if is_login_html(url, root):
+                    raise LoginError("Login gagal: Gagal masuk ke portal. Silakan periksa kembali username dan password.")
+            return root
+
+    def read_course_cards(self, credentials, log, timer=None):
+        """Load the Detail page and read all its cards, e.g. to check the saves of a run."""
+        return parse_course_cards(self.open_epbm_detail(credentials, log, timer), self.detail_url)
+
+    def stream_course_cards(self, credentials, log, timer=None):
+        """Yield the Detail page's cards while the page is still downloading, logging in first if needed."""
+        for attempt in range(2):
+            with timed(timer, "open_detail"):
+                log("Membuka portal mahasiswa IPB...")
+                response = self.opener.open(self.detail_url, timeout=self.timeout)
+            with response:
+                url = response.geturl()
+                parser = CardStreamParser(url)
+                decoder = codecs.getincrementaldecoder(response.headers.get_content_charset() or "utf-8")("replace")
+                found = 0
+                while True:
+                    chunk = response.read1(STREAM_CHUNK)
+                    for course in parser.feed_cards(decoder.decode(chunk, final=not chunk)):
+                        found += 1
+                        yield course
+                    if not chunk:
+                        break
+                parser.close()
+                for course in parser.ready:
+                    found += 1
+                    yield course
+
+            if found or not is_login_html(url, parser.root):
+                return
+            if attempt:
+                raise LoginError("Login gagal: Gagal masuk ke portal. Silakan periksa kembali username dan password.")
+            with timed(timer, "login"):
+                self.login(url, parser.root, credentials, log)
+
+    def login(self, url, root, credentials, log):
+        log("Halaman login terdeteksi, melakukan login...")
+
+        username_input = next((element for element in root.iter("input")
+                               if element.attrs.get("id") == "Username"), None)
+        password_input = next((element for element in root.iter("input")
+                               if element.attrs.get("id") == "Password"), None)
+        form = next((form for form in root.iter("form")
+                     if username_input is not None and username_input in form.iter("input")), None)
+        if form is None or password_input is None:
+            raise LoginError("Login gagal: Form login tidak ditemukan di portal.")
+
+        # Keep the hidden fields (anti-forgery token, return url) the page would post
+        username_name = username_input.attrs.get("name", "Username")
+        password_name = password_input.attrs.get("name", "Password")
+        fields = [(name, value) for name, value in form_fields(form)
+                  if name not in (username_name, password_name)]
+        fields += [(username_name, credentials['username']), (password_name, credentials['password'])]
+        action = urllib.parse.urljoin(url, form.attrs.get("action", "")) or url
+
+        log("Menunggu proses login selesai...")
+        url, html = self.request(action, fields)
+
+        if login_error_message(parse_html(html)):
+            log("Login gagal: Username atau password salah.")
+            raise LoginError("Login gagal: Username atau password Anda salah. Silakan periksa kembali.")
+
+        if "login" in url.lower():
+            log("Masih berada di halaman login. Kemungkinan username atau password salah.")
+            raise LoginError("Login gagal: Gagal masuk ke portal. Silakan periksa kembali username dan password.")
+
+
+class HttpSession:
+    """The logged-in portal of an HTTP scan, handed over to the fill run like a browser PortalSession."""
+
+    def __init__(self, portal, username):
+        self.portal = portal
+        self.username = username
+
+    def cookies(self):
+        return self.portal.cookies()
+
+    def claim(self, credentials, headless, profile, log, engine=None):
+        # There is no browser to hand over, a browser run starts its own
+        return None
+
+    def close(self):
+        pass
+
+
+class HttpCourseFiller:
+    """Submits each course's questionnaire in one POST, like the portal's own form does.
+
+    Opening a form is retried on server errors and timeouts, and after
+    logging in again when the session expired, given the credentials. The
+    POST itself is never sent twice.
+    """
+
+    def __init__(self, portal, settings, log, progress, questionnaire=None, timer=None, journal=None,
+                 credentials=None):
+        self.portal = portal
+        self.settings = settings
+        self.log = log
+        self.progress = progress
+        self.questionnaire = questionnaire or compile_questionnaire(settings)
+        self.timer = timer
+        self.journal = journal
+        self.credentials = credentials
+        self.recovery = RecoveryPolicy(log, timer)
+        # Parallel fillers finding the session expired log in once
+        self.login_lock = threading.Lock()
+
+    def open_form(self, href):
+        url, html = self.portal.request(href)
+        root = parse_html(html)
+        if is_login_html(url, root):
+            raise SessionExpired("Halaman login muncul saat membuka form.")
+        return url, root
+
+    def recover(self, kind):
+        if kind == SESSION_EXPIRED:
+            if self.credentials is None:
+                return False
+            with self.login_lock:
+                self.portal.open_epbm_detail(self.credentials, self.log, self.timer)
+        return True
+
+    def fill_course(self, course, position, total):
+        self.log(f"\nMengisi EPBM untuk {course['title']}: {course['desc']} ({position}/{total})")
+        try:
+            return self.recovery.attempt(lambda: self.submit(course), SESSION, course, recover=self.recover)
+        except SessionExpired:
+            self.log("Sesi login berakhir, mata kuliah ini dilewati.")
+            return False
+        except Exception as e:
+            # Like the browser's CourseFiller, an error fails just this course, not its worker
+            self.log(f"Terjadi error saat mengisi EPBM: {str(e)}")
+            return False
+        finally:
+            # All pages of the form go in the one POST
+            self.progress.course_done(course)
+
+    def submit(self, course):
+        """One go at a course: open its form and post the answers."""
+        with timed(self.timer, "open_form", course):
+            url, root = self.recovery.attempt(lambda: self.open_form(course['href']), PAGE, course)
+
+        model = parse_epbm_form(root, url)
+        if model is None:
+            self.log("Form EPBM tidak ditemukan. Melewati...")
+            return False
+
+        fields = list(model['fields'])
+
+        # Star ratings, with the same values the browser engine clicks
+        self.log(f"Mengisi {len(model['ratings'])} pertanyaan...")
+        for rating in model['ratings']:
+            if self.questionnaire.find_page(rating['page'], course['is_sarpras']) is None:
+                self.questionnaire.report_unknown(rating['page'], self.log)
+            star_value = self.questionnaire.rating_value(rating['page'], rating['index'], course['is_sarpras'])
+            if star_value > 0 and (not rating['stars'] or star_value <= rating['stars']):
+                fields.append((rating['name'], str(star_value)))
+
+        if model['textareas']:
+            self.log("Mengisi saran untuk dosen...")
+            # Only the text areas of a page the schema gives a text for, the others go empty like in a browser
+            for textarea in model['textareas']:
+                text = self.questionnaire.text_value(textarea['page'], course['is_sarpras'])
+                if text is None:
+                    self.questionnaire.report_unknown_text(textarea['page'], self.log)
+                fields.append((textarea['name'], text or ""))
+
+        if model['checkboxes']:
+            self.log("Mengklik checkbox pernyataan...")
+            # Checked values go before the hidden "false" companions, as a browser posts them
+            fields[:0] = model['checkboxes']
+
+        self.log("Menyimpan EPBM...")
+        try:
+            with timed(self.timer, "save", course):
+                url, html = self.portal.request(model['action'], fields)
+                root = parse_html(html)
+        except (urllib.error.URLError, OSError) as e:
+            # Not retried, the portal may have taken the answers before the error
+            self.log(f"Terjadi error saat simpan: {str(e)}")
+            return False
+
+        if is_login_html(url, root):
+            # Nothing was saved, so the whole course can go again after logging in
+            raise SessionExpired("Sesi login berakhir sebelum EPBM tersimpan.")
+
+        if not is_saved_html(url, root):
+            # E.g. the form again with the portal's validation errors; the Detail page has the last word
+            self.log("Portal tidak mengonfirmasi penyimpanan EPBM, diperiksa lagi di halaman Detail.")
+            if self.journal is not None:
+                self.journal.unconfirmed(course)
+            return False
+
+        self.log("EPBM berhasil disimpan!")
+        if self.journal is not None:
+            self.journal.saved(course)
+        return True
+
+
+def fill_courses_http(credentials, settings, courses, log, progress, cookies=None, questionnaire=None, timer=None,
+                      journal=None, portal=None):
+    portal = portal or HttpPortal(settings.get('portal_url', PORTAL_URL))
+    if cookies:
+        portal.add_cookies(cookies)
+
+    # Reuses the scan's cookies when given, logs in otherwise
+    portal.open_epbm_detail(credentials, log, timer)
+
+    filler = HttpCourseFiller(portal, settings, log, progress, questionnaire, timer, journal, credentials)
+    total = len(courses)
+
+    def fill(item):
+        position, course = item
+        with timed(timer, "course", course):
+            return filler.fill_course(course, position, total)
+
+    workers = max(1, min(settings.get('workers', 1), total))
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(fill, enumerate(courses, 1)))
+    else:
+        results = [fill(item) for item in enumerate(courses, 1)]
+    return results
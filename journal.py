@@ -0,0 +1,145 @@
+"""Append-only journal of a fill run, to resume it after a crash.
+
+Every run of an account appends to its own JSON-lines file: the selected
+courses when it starts, or one by one as a streaming scan finds them,
+each questionnaire page that was filled, each save the portal
+confirmed and each save the Detail page didn't show afterwards. Every record is flushed to disk before the run
+goes on, so Chrome crashing or the machine going to sleep loses at most
+the step in progress. A run that saved every course removes its journal.
+
+A restarted run reads the journal instead of scanning again and only
+fills the courses without a confirmed save. The portal keeps nothing of a
+form before it is saved, so such a course starts again from its first
+page; the page records only show how far it got.
+"""
+
+import json
+import os
+import threading
+import time
+
+from app_paths import account_file_name, data_dir
+
+JOURNAL_DIR = "journal"
+COURSE_KEYS = ('title', 'desc', 'href', 'is_completed', 'is_sarpras')
+
+
+class RunJournal:
+    """The journal of one account's runs on one portal."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def for_user(cls, username, portal_url, directory=None):
+        return cls(os.path.join(directory or data_dir(JOURNAL_DIR), account_file_name(username, portal_url, ".jsonl")))
+
+    def records(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # The line being written when the run died
+                continue
+        return records
+
+    def pending(self):
+        """The unfinished run: its courses without a confirmed save, and the pages filled per course.
+
+        Returns None when there is nothing to resume.
+        """
+        courses, saved, pages = None, set(), {}
+        for record in self.records():
+            event = record.get('event')
+            if event == 'start':
+                courses, saved, pages = list(record['courses']), set(), {}
+            elif event == 'course' and courses is not None:
+                courses.append(record['course'])
+            elif event == 'page':
+                pages[record['href']] = max(pages.get(record['href'], 0), record['page'])
+            elif event == 'saved':
+                saved.add(record['href'])
+            elif event == 'unconfirmed':
+                saved.discard(record['href'])
+        if not courses:
+            return None
+        remaining = [course for course in courses if course['href'] not in saved]
+        return (remaining, pages) if remaining else None
+
+    def ends_with_newline(self):
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() == 0:
+                    return True
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) == b"\n"
+        except OSError:
+            return True
+
+    def append(self, record):
+        record['time'] = round(time.time(), 3)
+        line = json.dumps(record) + "\n"
+        with self.lock:
+            try:
+                if self.file is None:
+                    # Don't glue the first record onto a line cut short by a crash
+                    if not self.ends_with_newline():
+                        line = "\n" + line
+                    self.file = open(self.path, "a", encoding="utf-8")
+                self.file.write(line)
+                self.file.flush()
+                os.fsync(self.file.fileno())
+            except OSError:
+                # The run itself matters more than being able to resume it
+                pass
+
+    def start(self, courses):
+        """Begin a new run, replacing whatever an older run left behind."""
+        self.close()
+        self.discard()
+        self.append({'event': 'start',
+                     'courses': [{key: course.get(key) for key in COURSE_KEYS} for course in courses]})
+
+    def add(self, course):
+        """A course queued after the start, by a scan that streams its cards."""
+        self.append({'event': 'course', 'course': {key: course.get(key) for key in COURSE_KEYS}})
+
+    def resume(self, courses):
+        self.append({'event': 'resume', 'hrefs': [course['href'] for course in courses]})
+
+    def page_done(self, course, page):
+        self.append({'event': 'page', 'href': course['href'], 'page': page})
+
+    def saved(self, course):
+        self.append({'event': 'saved', 'href': course['href']})
+
+    def unconfirmed(self, course):
+        """A save the Detail page doesn't show, the course is filled again when resuming."""
+        self.append({'event': 'unconfirmed', 'href': course['href']})
+
+    def finish(self):
+        """Close the journal, removing it once nothing is left to resume."""
+        self.close()
+        if self.pending() is None:
+            self.discard()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
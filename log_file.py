@@ -0,0 +1,62 @@
+"""Full session logs on disk, next to the capped log shown in the window."""
+
+import os
+import threading
+
+from app_paths import create_timestamped, data_dir
+
+LOG_DIR = "logs"
+KEEP_LOGS = 20
+
+
+class LogFile:
+    """Appends every log line of one session to its own file under the data directory."""
+
+    def __init__(self, directory=None, keep=KEEP_LOGS):
+        directory = directory or data_dir(LOG_DIR)
+        self.remove_old_logs(directory, keep - 1)
+        self.path = None
+        self.file = None
+        self.lock = threading.Lock()
+        try:
+            self.file = create_timestamped(directory, "epbm", ".log")
+            self.path = self.file.name
+        except OSError:
+            # Logging to disk is best effort, the window still shows the log
+            pass
+
+    @staticmethod
+    def remove_old_logs(directory, keep):
+        try:
+            logs = sorted(name for name in os.listdir(directory)
+                          if name.startswith("epbm-") and name.endswith(".log"))
+            for name in logs[:max(0, len(logs) - keep)]:
+                os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+    def write(self, lines):
+        """Write a batch of already formatted lines with a single flush."""
+        if self.file is None or not lines:
+            return
+        try:
+            with self.lock:
+                self.file.write("".join(line + "\n" for line in lines))
+                self.file.flush()
+        except OSError:
+            pass
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def prefixed_log(log, prefix):
+    def prefixed(message):
+        # Keep the blank line that separates courses in front of the prefix
+        if message.startswith("\n"):
+            log(f"\n{prefix} {message[1:]}")
+        else:
+            log(f"{prefix} {message}")
+    return prefixed
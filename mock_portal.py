@@ -0,0 +1,451 @@
+"""Local stand-in for the StudentPortal EPBM pages.
+
+Serves the login form, the Detail page with its course cards and the
+questionnaire forms with the markup the automation relies on, so both
+engines can be run and timed without a portal account:
+
+    python mock_portal.py --courses 8 --latency 0.2
+
+then point the ``portal_url`` setting at the printed address. Page headings
+and questions come from questionnaire_schema.json. Latency, failures and
+session expiry can be injected to exercise the slow and unhappy paths.
+"""
+
+import argparse
+import html
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, quote, urlparse
+
+from portal_pages import EPBM_DETAIL_PATH
+from questionnaire import load_schema
+
+LOGIN_PATH = "/Account/Login"
+COURSE_PATH = "/Akademik/EPBM/Isi/"
+SARPRAS_PATH = "/Akademik/EPBM/Sarpras/"
+SAVE_PATH = "/Akademik/EPBM/Simpan/"
+STATIC_PATH = "/static/"
+
+DEFAULT_USERNAME = "mahasiswa"
+DEFAULT_PASSWORD = "rahasia"
+
+PAGE_SCRIPT = """
+const form = document.getElementById('epbm-form');
+const holder = document.getElementById('pages');
+const store = document.getElementById('page-store');
+const nav = document.getElementById('nav');
+const pages = Array.from(document.querySelectorAll('.epbm-page'));
+let current = 0;
+
+// Like the portal's app, only the current page is in the document
+pages.forEach(page => page.remove());
+
+function button(text, cls, onClick) {
+    const b = document.createElement('button');
+    b.type = 'button';
+    b.className = 'btn ' + cls;
+    b.textContent = text;
+    b.addEventListener('click', onClick);
+    return b;
+}
+
+function render() {
+    holder.replaceChildren(pages[current]);
+    const buttons = [];
+    if (current > 0) buttons.push(button('Sebelumnya', 'btn-secondary', () => { current--; render(); }));
+    if (current < pages.length - 1) buttons.push(button('Selanjutnya', 'btn-primary', () => { current++; render(); }));
+    else buttons.push(button('Simpan EPBM', 'btn-success', save));
+    nav.replaceChildren(...buttons);
+}
+
+document.addEventListener('click', event => {
+    const star = event.target.closest('.b-rating-star');
+    if (!star) return;
+    const rating = star.closest('.b-rating');
+    const value = Number(star.dataset.value);
+    rating.querySelector('input').value = value;
+    rating.querySelectorAll('.b-rating-star').forEach(s => s.classList.toggle('b-rating-star-full', Number(s.dataset.value) <= value));
+});
+
+function showModal(text) {
+    const modal = document.createElement('div');
+    modal.className = 'modal d-block';
+    modal.innerHTML = '<div class="modal-dialog"><div class="modal-content"><div class="modal-body"></div>' +
+        '<div class="modal-footer"><button type="button" class="btn btn-primary">OK</button></div></div></div>';
+    modal.querySelector('.modal-body').textContent = text;
+    modal.querySelector('button').addEventListener('click', () => { location.href = DETAIL_URL; });
+    document.body.append(modal);
+}
+
+function save() {
+    // Every page's answers, not only the current one
+    store.append(...pages);
+    const body = new URLSearchParams(new FormData(form));
+    fetch(form.action, {method: 'POST', body: body, credentials: 'same-origin'}).then(response => {
+        if (response.ok) {
+            showModal('EPBM berhasil disimpan');
+        } else {
+            const alert = document.createElement('div');
+            alert.className = 'alert alert-danger';
+            alert.textContent = 'Gagal menyimpan EPBM (' + response.status + ')';
+            form.prepend(alert);
+        }
+    });
+}
+
+render();
+"""
+
+STYLESHEET = """
+body { font-family: 'Portal Sans', sans-serif; margin: 2rem; }
+.card { display: inline-block; border: 1px solid #ccc; margin: .5rem; padding: .5rem; width: 14rem; }
+.b-rating-star { cursor: pointer; font-size: 1.5rem; color: #ccc; }
+.b-rating-star-full { color: #f5a623; }
+.modal { position: fixed; inset: 0; background: rgba(0, 0, 0, .4); }
+.modal-dialog { background: white; margin: 10% auto; padding: 1rem; width: 20rem; }
+.d-none { display: none; }
+"""
+
+
+class MockPortalConfig:
+    """What the mock portal serves and how badly it behaves."""
+
+    def __init__(self, courses=6, completed=0, sarpras=True, lecturers=2, latency=0.0, jitter=0.0,
+                 fail_rate=0.0, session_ttl=None, asset_kb=64, username=DEFAULT_USERNAME,
+                 password=DEFAULT_PASSWORD, seed=None):
+        self.courses = courses
+        self.completed = completed
+        self.sarpras = sarpras
+        self.lecturers = lecturers
+        # Seconds added to every response, plus up to jitter seconds at random
+        self.latency = latency
+        self.jitter = jitter
+        # Chance that opening or saving a form answers 500
+        self.fail_rate = fail_rate
+        # Seconds before a login session expires, None to keep it forever
+        self.session_ttl = session_ttl
+        # Size of each image and font the pages reference
+        self.asset_kb = asset_kb
+        self.username = username
+        self.password = password
+        self.seed = seed
+
+
+class MockPortal:
+    """A running mock portal with its state, on a free local port."""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or MockPortalConfig()
+        self.schema = load_schema()
+        self.random = random.Random(self.config.seed)
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.submissions = {}
+        self.rejected = []
+        self.request_count = 0
+        self.courses = self.build_courses()
+        self.asset = bytes(self.config.asset_kb * 1024)
+
+        handler = type("Handler", (MockPortalHandler,), {'portal': self})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def build_courses(self):
+        courses = []
+        for number in range(1, self.config.courses + 1):
+            courses.append({
+                'id': str(number),
+                'title': f"KOM{100 + number}",
+                'desc': f"Mata Kuliah Contoh {number}",
+                'sarpras': False,
+                'completed': number <= self.config.completed,
+            })
+        if self.config.sarpras:
+            courses.append({'id': "S1", 'title': "Sarana dan Prasarana", 'desc': "Kuesioner fasilitas kampus",
+                            'sarpras': True, 'completed': False})
+        return courses
+
+    def course(self, course_id):
+        return next((course for course in self.courses if course['id'] == course_id), None)
+
+    def saved_count(self):
+        with self.lock:
+            return len(self.submissions)
+
+    def delay(self):
+        if self.config.latency or self.config.jitter:
+            time.sleep(self.config.latency + self.random.uniform(0, self.config.jitter))
+
+    def fails(self):
+        with self.lock:
+            return self.random.random() < self.config.fail_rate
+
+    def new_session(self):
+        session_id = secrets.token_hex(16)
+        with self.lock:
+            self.sessions[session_id] = time.monotonic()
+        return session_id
+
+    def session_valid(self, session_id):
+        with self.lock:
+            started = self.sessions.get(session_id)
+        if started is None:
+            return False
+        ttl = self.config.session_ttl
+        return ttl is None or time.monotonic() - started < ttl
+
+    # Pages
+
+    def layout(self, title, body, script=""):
+        return (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{html.escape(title)}</title>"
+                f"<link rel=\"stylesheet\" href=\"{STATIC_PATH}site.css\">"
+                f"<style>@font-face {{ font-family: 'Portal Sans'; src: url('{STATIC_PATH}portal.woff2'); }}</style>"
+                f"</head><body><img src=\"{STATIC_PATH}logo.png\" alt=\"IPB\" width=\"120\">{body}"
+                f"{script}</body></html>")
+
+    def login_page(self, return_url, error=None):
+        alert = f"<div class=\"alert alert-danger\">{html.escape(error)}</div>" if error else ""
+        body = (f"<h3>Login Portal Mahasiswa</h3>{alert}"
+                f"<form method=\"post\" action=\"{LOGIN_PATH}?ReturnUrl={quote(return_url, safe='')}\">"
+                f"<input type=\"hidden\" name=\"__RequestVerificationToken\" value=\"{secrets.token_hex(8)}\">"
+                "<input id=\"Username\" name=\"Username\" type=\"text\">"
+                "<input id=\"Password\" name=\"Password\" type=\"password\">"
+                "<button type=\"submit\" class=\"btn btn-primary\">Masuk</button></form>")
+        return self.layout("Login", body)
+
+    def detail_page(self):
+        cards = []
+        for course in self.courses:
+            path = (SARPRAS_PATH if course['sarpras'] else COURSE_PATH) + course['id']
+            check = "<i class=\"fa fa-check-circle text-success\"></i>" if course['completed'] else ""
+            cards.append(f"<a class=\"btn card small-box\" href=\"{path}\"><div class=\"card-header\">"
+                         f"<h4>{html.escape(course['title'])}</h4><p>{html.escape(course['desc'])}</p>{check}"
+                         "</div></a>")
+        return self.layout("EPBM", "<h3>Evaluasi Proses Belajar Mengajar</h3>" + "".join(cards))
+
+    def form_pages(self, course):
+        """Heading, ratings as (name, label), textareas and statement checkbox of every page of a form."""
+        if course['sarpras']:
+            questions = self.schema['forms']['sarpras']['pages'][0]['questions']
+            return [{'heading': "Kuesioner Sarana dan Prasarana",
+                     'ratings': [(f"S{index}", question['label']) for index, question in enumerate(questions)],
+                     'textareas': [], 'statement': False}]
+
+        lecturers = range(self.config.lecturers)
+        pages = []
+        for number, page in enumerate(self.schema['forms']['course']['pages']):
+            if page.get('per_lecturer'):
+                ratings = [(f"P{number}D{lecturer}", f"Dosen {lecturer + 1}") for lecturer in lecturers]
+            else:
+                ratings = [(f"P{number}Q{index}", question['label']) for index, question in enumerate(page['questions'])]
+            is_saran = bool(page.get('text_setting'))
+            pages.append({'heading': page['fingerprint'], 'ratings': ratings,
+                          'textareas': [f"Saran{lecturer}" for lecturer in lecturers] if is_saran else [],
+                          'statement': is_saran})
+        return pages
+
+    def render_page(self, page):
+        parts = [f"<div class=\"epbm-page\"><h5>{html.escape(page['heading'])}</h5>"]
+        stars = "".join(f"<span class=\"b-rating-star\" data-value=\"{value}\">&#9733;</span>"
+                        for value in range(1, 5))
+        for name, label in page['ratings']:
+            parts.append(f"<div class=\"question\"><label>{html.escape(label)}</label>"
+                         f"<output class=\"b-rating form-control\">{stars}"
+                         f"<input type=\"hidden\" name=\"{name}\" value=\"\"></output></div>")
+        for number, name in enumerate(page['textareas'], 1):
+            parts.append(f"<label>Dosen {number}</label><textarea name=\"{name}\"></textarea>")
+        if page['statement']:
+            parts.append("<label><input type=\"checkbox\" name=\"Pernyataan\" value=\"true\">"
+                         "Saya mengisi kuesioner ini dengan jujur</label>"
+                         "<input type=\"hidden\" name=\"Pernyataan\" value=\"false\">")
+        parts.append("</div>")
+        return "".join(parts)
+
+    def form_page(self, course):
+        pages = "".join(self.render_page(page) for page in self.form_pages(course))
+        body = (f"<h3>{html.escape(course['title'])}: {html.escape(course['desc'])}</h3>"
+                f"<form id=\"epbm-form\" method=\"post\" action=\"{SAVE_PATH}{course['id']}\">"
+                f"<input type=\"hidden\" name=\"__RequestVerificationToken\" value=\"{secrets.token_hex(8)}\">"
+                f"<input type=\"hidden\" name=\"Id\" value=\"{course['id']}\">"
+                f"<div id=\"pages\"></div><div id=\"page-store\" class=\"d-none\">{pages}</div>"
+                "<div id=\"nav\"></div></form>")
+        script = f"<script>const DETAIL_URL = '{EPBM_DETAIL_PATH}';{PAGE_SCRIPT}</script>"
+        return self.layout("Isi EPBM", body, script)
+
+    def submission_errors(self, course, fields):
+        """Why the portal would reject the posted answers, empty when they are complete."""
+        values = {}
+        for name, value in fields:
+            values.setdefault(name, []).append(value)
+
+        errors = []
+        for page in self.form_pages(course):
+            for name, _ in page['ratings']:
+                if values.get(name, [""])[0] not in ("1", "2", "3", "4"):
+                    errors.append(f"{name} belum dinilai")
+            for name in page['textareas']:
+                if not values.get(name, [""])[0].strip():
+                    errors.append(f"{name} kosong")
+            if page['statement'] and "true" not in values.get("Pernyataan", []):
+                errors.append("Pernyataan belum dicentang")
+        return errors
+
+    def save(self, course, fields):
+        errors = self.submission_errors(course, fields)
+        with self.lock:
+            if errors:
+                self.rejected.append((course['id'], errors))
+                return False
+            self.submissions[course['id']] = fields
+            course['completed'] = True
+            return True
+
+
+class MockPortalHandler(BaseHTTPRequestHandler):
+    portal = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, status=200, content_type="text/html; charset=utf-8", headers=()):
+        data = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def redirect(self, location, headers=()):
+        self.send_body("", 302, headers=[("Location", location)] + list(headers))
+
+    def session_id(self):
+        for part in (self.headers.get("Cookie") or "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "EpbmSession":
+                return value
+        return None
+
+    def authenticated(self):
+        return self.portal.session_valid(self.session_id())
+
+    def read_fields(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return parse_qsl(self.rfile.read(length).decode(), keep_blank_values=True)
+
+    def do_GET(self):
+        portal = self.portal
+        with portal.lock:
+            portal.request_count += 1
+        portal.delay()
+        path = urlparse(self.path).path
+
+        if path.startswith(STATIC_PATH):
+            content_type = "text/css" if path.endswith(".css") else "application/octet-stream"
+            return self.send_body(STYLESHEET if path.endswith(".css") else portal.asset, content_type=content_type)
+        if path == "/":
+            return self.redirect(EPBM_DETAIL_PATH)
+        if path == LOGIN_PATH:
+            query = dict(parse_qsl(urlparse(self.path).query))
+            return self.send_body(portal.login_page(query.get("ReturnUrl", EPBM_DETAIL_PATH)))
+        if not self.authenticated():
+            return self.redirect(f"{LOGIN_PATH}?ReturnUrl={quote(self.path, safe='')}")
+        if path == EPBM_DETAIL_PATH:
+            return self.send_body(portal.detail_page())
+
+        for prefix in (COURSE_PATH, SARPRAS_PATH):
+            if path.startswith(prefix):
+                course = portal.course(path[len(prefix):])
+                if course is None:
+                    return self.send_body("Tidak ditemukan", 404)
+                if portal.fails():
+                    return self.send_body("Terjadi kesalahan pada server", 500)
+                return self.send_body(portal.form_page(course))
+        return self.send_body("Tidak ditemukan", 404)
+
+    def do_POST(self):
+        portal = self.portal
+        with portal.lock:
+            portal.request_count += 1
+        portal.delay()
+        fields = self.read_fields()
+        url = urlparse(self.path)
+
+        if url.path == LOGIN_PATH:
+            values = dict(fields)
+            return_url = dict(parse_qsl(url.query)).get("ReturnUrl") or EPBM_DETAIL_PATH
+            if values.get("Username") != portal.config.username or values.get("Password") != portal.config.password:
+                return self.send_body(portal.login_page(
+                    return_url, "Login gagal: Username atau password Anda salah."))
+            session_id = portal.new_session()
+            return self.redirect(return_url, [("Set-Cookie", f"EpbmSession={session_id}; Path=/; HttpOnly")])
+
+        if not self.authenticated():
+            return self.redirect(f"{LOGIN_PATH}?ReturnUrl={quote(EPBM_DETAIL_PATH, safe='')}")
+
+        if url.path.startswith(SAVE_PATH):
+            course = portal.course(url.path[len(SAVE_PATH):])
+            if course is None:
+                return self.send_body("Tidak ditemukan", 404)
+            if portal.fails():
+                return self.send_body("Terjadi kesalahan pada server", 500)
+            if not portal.save(course, fields):
+                return self.send_body("Jawaban belum lengkap", 400)
+            return self.redirect(EPBM_DETAIL_PATH)
+        return self.send_body("Tidak ditemukan", 404)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jalankan portal EPBM tiruan secara lokal.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--courses", type=int, default=6, help="jumlah mata kuliah")
+    parser.add_argument("--completed", type=int, default=0, help="mata kuliah yang sudah terisi")
+    parser.add_argument("--no-sarpras", action="store_true", help="tanpa kuesioner Sarana dan Prasarana")
+    parser.add_argument("--lecturers", type=int, default=2, help="dosen per mata kuliah")
+    parser.add_argument("--latency", type=float, default=0.0, help="detik tambahan per permintaan")
+    parser.add_argument("--jitter", type=float, default=0.0, help="tambahan acak maksimum, dalam detik")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="peluang form gagal dibuka/disimpan (0-1)")
+    parser.add_argument("--session-ttl", type=float, default=None, help="umur sesi login, dalam detik")
+    args = parser.parse_args()
+
+    config = MockPortalConfig(courses=args.courses, completed=args.completed, sarpras=not args.no_sarpras,
+                              lecturers=args.lecturers, latency=args.latency, jitter=args.jitter,
+                              fail_rate=args.fail_rate, session_ttl=args.session_ttl)
+    portal = MockPortal(config, port=args.port)
+    print(f"Portal tiruan berjalan di {portal.url} (login: {config.username} / {config.password})")
+    try:
+        portal.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        portal.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
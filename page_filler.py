@@ -0,0 +1,84 @@
+"""Fills a whole questionnaire page in one script call.
+
+Replaces the per-rating and per-star WebDriver lookups and clicks: the plan
+from Questionnaire.plan is sent along with the script, which picks the
+values for the visible page, clicks the stars, types the suggestion with the
+input events the form listens to, ticks the statement checkbox and reports
+what it did.
+"""
+
+FILL_PAGE_SCRIPT = """
+const plan = arguments[0];
+const clickNext = arguments[1];
+const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+const normalize = text => text.replace(/\\s+/g, ' ').trim();
+const buttonWith = text => Array.from(document.querySelectorAll('button')).find(b => b.textContent.includes(text));
+
+const headings = Array.from(document.querySelectorAll('h5'));
+const headingElement = headings.find(visible) || headings[0];
+const heading = headingElement ? normalize(headingElement.textContent) : '';
+const page = plan.pages.find(p => heading.includes(p.match)) || null;
+
+const result = {
+    heading: heading, known_page: page !== null, ratings: 0, rated: 0,
+    textareas: 0, checkboxes: 0, save: false, next: false, clicked_next: false
+};
+
+document.querySelectorAll('.b-rating').forEach((rating, index) => {
+    result.ratings++;
+    let value = plan.default;
+    if (page !== null) {
+        if (index < page.values.length) value = page.values[index];
+        else if (page.repeat) value = page.values[0];
+    }
+    const stars = rating.querySelectorAll('.b-rating-star');
+    if (value > 0 && stars.length >= value) {
+        stars[value - 1].click();
+        result.rated++;
+    }
+});
+
+if (plan.saran_page !== null && heading.includes(plan.saran_page)) {
+    // Go through the native setter so v-model sees the new value
+    const setValue = Object.getOwnPropertyDescriptor(HTMLTextAreaElement.prototype, 'value').set;
+    document.querySelectorAll('textarea').forEach(textarea => {
+        setValue.call(textarea, plan.saran);
+        textarea.dispatchEvent(new Event('input', {bubbles: true}));
+        textarea.dispatchEvent(new Event('change', {bubbles: true}));
+        result.textareas++;
+    });
+}
+
+document.querySelectorAll("input[type='checkbox']").forEach(checkbox => {
+    if (!checkbox.checked) {
+        checkbox.click();
+        result.checkboxes++;
+    }
+});
+
+const save = buttonWith('Simpan EPBM');
+const next = buttonWith('Selanjutnya');
+result.save = save !== undefined;
+result.next = next !== undefined;
+if (clickNext && !result.save && result.next) {
+    next.click();
+    result.clicked_next = true;
+}
+return result;
+"""
+
+CLICK_BUTTON_SCRIPT = """
+const button = Array.from(document.querySelectorAll('button')).find(b => b.textContent.includes(arguments[0]));
+if (button === undefined) return false;
+button.click();
+return true;
+"""
+
+
+def fill_page(driver, plan, click_next=True):
+    """Apply the plan to the current page and, unless it is the last one, move to the next page."""
+    return driver.execute_script(FILL_PAGE_SCRIPT, plan, click_next)
+
+
+def click_button(driver, text):
+    return driver.execute_script(CLICK_BUTTON_SCRIPT, text)
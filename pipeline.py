@@ -0,0 +1,261 @@
+"""Scan and fill as one pipeline, for unattended runs.
+
+Instead of scanning every card, asking the user and only then filling,
+the scan queues each card its selection policy picks as soon as the card
+is parsed, and the fillers take courses from that queue while the scan
+is still going:
+
+- over HTTP the Detail page is parsed while it downloads, and the fillers
+  submit the first form before the rest of the page has arrived;
+- with Chrome the extra browsers start and wait for the login cookies
+  while the first one logs in and reads the cards, which it then helps
+  to fill.
+"""
+
+import queue
+import threading
+
+from portal_pages import HTTP_ENGINE, PORTAL_URL, SELENIUM_ENGINE, STANDARD_PROFILE, LoginError
+from progress import ProgressTracker
+from questionnaire import compile_questionnaire
+from timing import timed
+from verification import verify_run
+
+# name: (label, does the policy pick the course)
+SELECTION_POLICIES = {
+    'unfinished': ("Semua yang belum diisi", lambda course: not course['is_completed']),
+    'unfinished_courses': ("Belum diisi, tanpa Sarana dan Prasarana",
+                           lambda course: not course['is_completed'] and not course['is_sarpras']),
+}
+DEFAULT_POLICY = 'unfinished'
+
+
+class CourseQueue:
+    """Courses handed to the fillers as they are found, closed once the scan is done."""
+
+    def __init__(self, courses=()):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.count = 0
+        for course in courses:
+            self.put(course)
+
+    def put(self, course):
+        with self.lock:
+            self.count += 1
+            self.queue.put((self.count, course))
+
+    def close(self):
+        # One end marker wakes every waiting filler, each puts it back for the next
+        self.queue.put(None)
+
+    def get(self):
+        """The next (position, course), or None once the queue is closed and empty."""
+        item = self.queue.get()
+        if item is None:
+            self.queue.put(None)
+        return item
+
+    def drain(self):
+        """Whatever the fillers left behind."""
+        left = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return left
+            if item is not None:
+                left.append(item)
+
+
+def course_picker(policy, patterns=()):
+    """Whether the policy, and the course patterns when given, pick a scanned course."""
+    from run_config import select_courses
+
+    if policy not in SELECTION_POLICIES:
+        raise ValueError(f"Kebijakan pemilihan tidak dikenal: {policy}")
+    picks = SELECTION_POLICIES[policy][1]
+    return lambda course: picks(course) and bool(select_courses([course], patterns, include_completed=True))
+
+
+class Pipeline:
+    """One streaming run: the producer side shared by both engines."""
+
+    def __init__(self, credentials, settings, picker, log, emit_progress, timer=None, journal=None):
+        self.credentials = credentials
+        self.settings = settings
+        self.picker = picker
+        self.log = log
+        self.timer = timer
+        self.journal = journal
+        self.questionnaire = compile_questionnaire(settings)
+        self.progress = ProgressTracker([], self.questionnaire, emit_progress)
+        self.course_queue = CourseQueue()
+        self.found = []
+        self.queued = []
+
+    def offer(self, course):
+        """A card fresh from the scan, queued for filling when the policy picks it."""
+        self.found.append(course)
+        picked = self.picker(course)
+        self.log(f"Ditemukan: {course['title']}: {course['desc']}"
+                 f"{' (Sudah diisi)' if course['is_completed'] else ''}{'' if picked else ' - dilewati'}")
+        if not picked:
+            return
+        self.queued.append(course)
+        self.progress.add_course(course)
+        if self.journal is not None:
+            self.journal.add(course)
+        self.course_queue.put(course)
+
+    def results(self, saved):
+        """Whether each queued course was saved, in the order they were queued."""
+        return [saved.get(position, False) for position in range(1, len(self.queued) + 1)]
+
+    def verify(self, saved, read_cards, refill):
+        """Confirm the saves against one read of the Detail page, see verification."""
+        return verify_run(self.queued, saved, read_cards, refill, self.settings, self.log, self.timer, self.journal)
+
+    def run_http(self):
+        from http_engine import HttpCourseFiller, HttpPortal
+        from runner import session_cache_for
+
+        portal_url = self.settings.get('portal_url', PORTAL_URL)
+        portal = HttpPortal(portal_url)
+        session_cache = session_cache_for(self.settings.get('remember_session'), self.log)
+        cookies = session_cache.load(self.credentials, portal_url) if session_cache is not None else []
+        if cookies:
+            self.log("Memakai sesi login yang tersimpan...")
+            portal.add_cookies(cookies)
+
+        filler = HttpCourseFiller(portal, self.settings, self.log, self.progress, self.questionnaire, self.timer,
+                                  self.journal, self.credentials)
+        saved = {}
+
+        def refill(courses):
+            return [filler.fill_course(course, position, len(courses)) for position, course in enumerate(courses, 1)]
+
+        def work():
+            while True:
+                item = self.course_queue.get()
+                if item is None:
+                    return
+                position, course = item
+                with timed(self.timer, "course", course):
+                    saved[position] = filler.fill_course(course, position, self.course_queue.count)
+
+        workers = [threading.Thread(target=work, daemon=True) for _ in range(self.settings.get('workers', 1))]
+        for worker in workers:
+            worker.start()
+        try:
+            for course in portal.stream_course_cards(self.credentials, self.log, self.timer):
+                self.offer(course)
+        except LoginError:
+            if session_cache is not None:
+                session_cache.clear(self.credentials['username'], portal_url)
+            raise
+        finally:
+            self.course_queue.close()
+            for worker in workers:
+                worker.join()
+        if session_cache is not None:
+            session_cache.save(self.credentials, portal_url, portal.cookies())
+        return self.verify(self.results(saved),
+                           lambda: portal.read_course_cards(self.credentials, self.log, self.timer), refill)
+
+    def run_browser(self, warm_session=None):
+        from automation import BrowserPool, fill_courses
+        from portal import create_driver, open_epbm_detail, read_course_cards, read_detail_cards
+        from runner import restore_browser_session, session_cache_for
+
+        settings = self.settings
+        portal_url = settings.get('portal_url', PORTAL_URL)
+        profile = settings.get('browser_profile', STANDARD_PROFILE)
+        engine = settings.get('engine', SELENIUM_ENGINE)
+        session_cache = session_cache_for(settings.get('remember_session'), self.log)
+
+        # The extra browsers start now and wait for the first one to log in
+        pool = BrowserPool(self.credentials, settings, self.course_queue, self.log, self.progress,
+                           self.questionnaire, self.timer, self.journal)
+        extra = pool.start(range(2, settings.get('workers', 1) + 1))
+
+        driver = None
+        try:
+            if warm_session is not None:
+                driver = warm_session.claim(self.credentials, settings['headless'], profile, self.log, engine)
+            if driver is None:
+                self.log("Menginisialisasi Chrome driver...")
+                with timed(self.timer, "driver_start"):
+                    driver = create_driver(settings['headless'], profile, portal_url, settings.get('user_data_dir'),
+                                           engine)
+
+            restore_browser_session(driver, self.credentials, portal_url, session_cache, self.log)
+            open_epbm_detail(driver, self.credentials, self.log, portal_url, self.timer)
+            cookies = driver.get_cookies()
+            pool.share_cookies(cookies)
+            if session_cache is not None:
+                session_cache.save(self.credentials, portal_url, cookies)
+
+            with timed(self.timer, "scan"):
+                courses = read_course_cards(driver)
+            for course in courses:
+                self.offer(course)
+            self.course_queue.close()
+
+            # The scanning browser becomes a filler too, and is replaced when it is lost
+            driver = pool.work(1, driver)
+            for thread in extra:
+                thread.join()
+            for position, course in self.course_queue.drain():
+                self.log(f"Tidak terisi: {course['title']}: {course['desc']}")
+
+            def refill(courses):
+                nonlocal driver
+                saved, driver = fill_courses(driver, self.credentials, settings, courses, self.log, self.progress,
+                                             self.questionnaire, self.timer, self.journal)
+                return saved
+
+            return self.verify(
+                self.results(pool.saved),
+                lambda: read_detail_cards(driver, self.credentials, self.log, portal_url, self.timer), refill)
+        except LoginError:
+            if session_cache is not None:
+                session_cache.clear(self.credentials['username'], portal_url)
+            raise
+        finally:
+            pool.share_cookies(None)
+            self.course_queue.close()
+            for thread in extra:
+                thread.join()
+            if driver is not None:
+                driver.quit()
+
+
+def run_pipeline(credentials, settings, policy=DEFAULT_POLICY, log=print, emit_progress=lambda percent, eta: None,
+                 timer=None, journal=None, patterns=(), warm_session=None):
+    """Scan and fill in one go, returns the courses queued and whether each was saved.
+
+    The journal, when given, is started here; the courses it records are
+    the ones the policy picked.
+    """
+    pipeline = Pipeline(credentials, settings, course_picker(policy, patterns), log, emit_progress, timer, journal)
+    log(f"Mode otomatis: {SELECTION_POLICIES[policy][0].lower()}, pengisian dimulai selama pemindaian.")
+    if journal is not None:
+        journal.start([])
+    try:
+        if settings.get('engine') == HTTP_ENGINE:
+            saved = pipeline.run_http()
+        else:
+            saved = pipeline.run_browser(warm_session)
+    finally:
+        if warm_session is not None:
+            warm_session.close()
+        if journal is not None:
+            journal.finish()
+
+    from runner import report_unknown_pages
+
+    report_unknown_pages(pipeline.questionnaire, log)
+    pipeline.progress.finish()
+    log(f"\nProses pengisian EPBM selesai! {sum(bool(ok) for ok in saved)}/{len(saved)} tersimpan.")
+    return pipeline.queued, saved
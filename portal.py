@@ -0,0 +1,223 @@
+import tempfile
+from urllib.parse import urlparse
+
+from cdp_driver import CdpError
+from driver_cache import resolve_driver_path
+from portal_pages import (BY_CSS, BY_ID, CARD_SELECTOR, CDP_ENGINE, EPBM_DETAIL_PATH, FAST_PROFILE, PORTAL_URL,
+                          SELENIUM_ENGINE, STANDARD_PROFILE, LoginError, parse_course_cards, parse_html)
+from timing import timed
+from waits import Waiter, WaitTimeout, present, text_in, url_not_contains, visible
+
+
+# Resources the automation never looks at, blocked in the fast profile. Stylesheets
+# of the portal itself stay, the visibility checks depend on the page layout.
+BLOCKED_URL_PATTERNS = [
+    "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.svg*", "*.ico*", "*.webp*", "*.bmp*",
+    "*.woff*", "*.ttf*", "*.otf*", "*.eot*",
+    "*.mp4*", "*.webm*", "*.mp3*",
+]
+
+# Selenium is only needed by its own engine
+try:
+    from selenium.common.exceptions import WebDriverException
+    DRIVER_ERRORS = (WebDriverException, CdpError)
+except ImportError:
+    DRIVER_ERRORS = (CdpError,)
+
+
+def portal_hosts(portal_url=PORTAL_URL):
+    return [urlparse(portal_url).hostname]
+
+
+def create_driver(headless=True, profile=STANDARD_PROFILE, portal_url=PORTAL_URL, user_data_dir=None,
+                  engine=SELENIUM_ENGINE):
+    if engine == CDP_ENGINE:
+        # Same browser set-up, driven over DevTools without chromedriver
+        from cdp_driver import CdpDriver
+        return CdpDriver.launch(headless, profile, portal_url, user_data_dir)
+
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--start-maximized")
+    if user_data_dir:
+        # Every browser gets its own profile below the given directory, Chrome locks a profile in use
+        chrome_options.add_argument(f"--user-data-dir={tempfile.mkdtemp(prefix='chrome-', dir=user_data_dir)}")
+
+    fast = profile == FAST_PROFILE
+    if fast:
+        # Any host outside the portal fails to resolve: CDNs, web fonts, analytics
+        hosts = portal_hosts(portal_url)
+        rules = ", ".join(["MAP * ~NOTFOUND"] + [f"EXCLUDE {host}" for host in hosts])
+        chrome_options.add_argument(f"--host-resolver-rules={rules}")
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        # get() returns once the DOM is ready, the waits check for the elements they need
+        chrome_options.page_load_strategy = "eager"
+
+    # Without a cached or resolvable driver, Selenium Manager looks for one itself
+    driver_path = resolve_driver_path()
+    service = Service(driver_path) if driver_path else Service()
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+
+    if fast:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except DRIVER_ERRORS:
+            # Still usable without the blocking, just slower
+            pass
+    return driver
+
+
+def is_login_page(driver):
+    return "login" in driver.current_url.lower() or bool(driver.find_elements(BY_ID, "Username"))
+
+
+def login(driver, credentials, log):
+    log("Halaman login terdeteksi, melakukan login...")
+    waiter = Waiter(driver)
+
+    # Wait for username field to be visible
+    waiter.until(10, username=visible("#Username"))
+    username_field = driver.find_element(BY_ID, "Username")
+    username_field.clear()
+    username_field.send_keys(credentials['username'])
+
+    # Enter password
+    password_field = driver.find_element(BY_ID, "Password")
+    password_field.clear()
+    password_field.send_keys(credentials['password'])
+
+    # Click login button
+    login_button = driver.find_element(BY_CSS, "button[type='submit']")
+    login_button.click()
+
+    # Wait for login to complete: either the portal lets us in or it shows an error
+    log("Menunggu proses login selesai...")
+    try:
+        waiter.until(10,
+                     cards=present(CARD_SELECTOR),
+                     error=text_in(".alert.alert-danger", "Login gagal", "password Anda salah"),
+                     left_login=url_not_contains("login"))
+    except WaitTimeout:
+        pass
+
+    # Check if login failed
+    error_alerts = driver.find_elements(BY_CSS, ".alert.alert-danger")
+    for alert in error_alerts:
+        if "Login gagal" in alert.text or "password Anda salah" in alert.text:
+            log("Login gagal: Username atau password salah.")
+            raise LoginError("Login gagal: Username atau password Anda salah. Silakan periksa kembali.")
+
+    # Check if we're still on the login page after clicking login button
+    if "login" in driver.current_url.lower():
+        log("Masih berada di halaman login. Kemungkinan username atau password salah.")
+        raise LoginError("Login gagal: Gagal masuk ke portal. Silakan periksa kembali username dan password.")
+
+
+def open_epbm_detail(driver, credentials, log, portal_url=PORTAL_URL, timer=None):
+    """Open the EPBM Detail page, logging in first if the session is missing or expired."""
+    with timed(timer, "open_detail"):
+        log("Membuka portal mahasiswa IPB...")
+        driver.get(portal_url.rstrip("/") + EPBM_DETAIL_PATH)
+
+        if is_login_page(driver):
+            with timed(timer, "login"):
+                login(driver, credentials, log)
+
+        # Wait for page to load after login
+        log("Menunggu halaman EPBM dimuat...")
+        Waiter(driver).until(10, cards=present(CARD_SELECTOR))
+
+
+def read_course_cards(driver):
+    """All EPBM cards on the current page, parsed from a single page source snapshot."""
+    return parse_course_cards(parse_html(driver.page_source), driver.current_url)
+
+
+def read_detail_cards(driver, credentials, log, portal_url=PORTAL_URL, timer=None):
+    """Load the Detail page again and read its cards, e.g. to check the saves of a run."""
+    open_epbm_detail(driver, credentials, log, portal_url, timer)
+    return read_course_cards(driver)
+
+
+def add_cookies(driver, cookies, portal_url=PORTAL_URL):
+    # Selenium only accepts cookies for the domain that is currently loaded
+    driver.get(portal_url)
+    for cookie in cookies:
+        cookie = {key: value for key, value in cookie.items()
+                  if key in ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry')}
+        if 'expiry' in cookie:
+            cookie['expiry'] = int(cookie['expiry'])
+        try:
+            driver.add_cookie(cookie)
+        except DRIVER_ERRORS:
+            pass
+
+
+class PortalSession:
+    """Logged-in browser kept alive between the course scan and the automation run.
+
+    A session without a username is a browser started ahead of time that
+    hasn't logged in yet, any user may claim it.
+    """
+
+    def __init__(self, driver, username, headless, profile=STANDARD_PROFILE, portal_url=PORTAL_URL,
+                 user_data_dir=None, engine=SELENIUM_ENGINE):
+        self.driver = driver
+        self.username = username
+        self.headless = headless
+        self.profile = profile
+        self.portal_url = portal_url
+        self.user_data_dir = user_data_dir
+        self.engine = engine
+
+    def cookies(self):
+        return self.driver.get_cookies() if self.is_alive() else []
+
+    def is_alive(self):
+        if self.driver is None:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except DRIVER_ERRORS:
+            return False
+
+    def claim(self, credentials, headless, profile, log, engine=SELENIUM_ENGINE):
+        """Hand the session over to a new owner.
+
+        Returns a driver carrying the portal cookies, or None when the session
+        cannot be reused. The caller still has to open the Detail page, which
+        logs in again if the cookies have expired in the meantime.
+        """
+        if self.username not in (None, credentials['username']) or not self.is_alive():
+            self.close()
+            return None
+
+        if headless == self.headless and profile == self.profile and engine == self.engine:
+            log("Menggunakan browser yang sudah disiapkan..." if self.username is None
+                else "Menggunakan sesi browser dari pencarian mata kuliah...")
+            driver, self.driver = self.driver, None
+            return driver
+
+        # The scan always runs headless; carry the cookies over to a visible browser
+        # or one with another profile or engine
+        cookies = self.driver.get_cookies()
+        self.close()
+        log("Menginisialisasi Chrome driver dengan sesi login sebelumnya...")
+        driver = create_driver(headless, profile, self.portal_url, self.user_data_dir, engine)
+        add_cookies(driver, cookies, self.portal_url)
+        return driver
+
+    def close(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except DRIVER_ERRORS:
+                pass
+            self.driver = None
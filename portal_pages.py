@@ -0,0 +1,277 @@
+"""StudentPortal URLs and HTML parsing that work without a browser."""
+
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+
+PORTAL_URL = "https://studentportal.ipb.ac.id"
+EPBM_DETAIL_PATH = "/Akademik/EPBM/Detail"
+EPBM_DETAIL_URL = PORTAL_URL + EPBM_DETAIL_PATH
+
+CARD_SELECTOR = ".btn.card.small-box"
+
+# Browser profiles: the fast one skips resources the automation never looks at
+STANDARD_PROFILE = "standard"
+FAST_PROFILE = "fast"
+BROWSER_PROFILES = (STANDARD_PROFILE, FAST_PROFILE)
+
+# Engines: Selenium through chromedriver, Chrome's DevTools Protocol directly (cdp_driver),
+# or plain HTTP without a browser (http_engine)
+SELENIUM_ENGINE = "selenium"
+CDP_ENGINE = "cdp"
+HTTP_ENGINE = "http"
+ENGINES = (SELENIUM_ENGINE, HTTP_ENGINE, CDP_ENGINE)
+# Selenium's By values, which both engines take, so the cdp engine runs without Selenium installed
+BY_ID = "id"
+BY_CSS = "css selector"
+
+VOID_ELEMENTS = {"area", "base", "br", "col", "embed", "hr", "img", "input",
+                 "link", "meta", "param", "source", "track", "wbr"}
+
+
+class LoginError(Exception):
+    """Raised when the portal rejects the given credentials."""
+
+
+class Element:
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.attrs = {name: value or "" for name, value in attrs}
+        self.parent = parent
+        self.children = []
+
+    @property
+    def classes(self):
+        return self.attrs.get("class", "").split()
+
+    def matches(self, tag=None, classes=()):
+        if tag is not None and self.tag != tag:
+            return False
+        own_classes = self.classes
+        return all(name in own_classes for name in classes)
+
+    def iter(self, tag=None, classes=()):
+        # Descendants in document order
+        for child in self.children:
+            if isinstance(child, Element):
+                if child.matches(tag, classes):
+                    yield child
+                yield from child.iter(tag, classes)
+
+    def find(self, tag=None, classes=()):
+        return next(self.iter(tag, classes), None)
+
+    def find_all(self, tag=None, classes=()):
+        return list(self.iter(tag, classes))
+
+    @property
+    def text(self):
+        parts = []
+
+        def collect(node):
+            for child in node.children:
+                if isinstance(child, Element):
+                    collect(child)
+                else:
+                    parts.append(child)
+
+        collect(self)
+        return " ".join("".join(parts).split())
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Element("#document", [])
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        element = Element(tag, attrs, self.current)
+        self.current.children.append(element)
+        if tag not in VOID_ELEMENTS:
+            self.current = element
+
+    def handle_startendtag(self, tag, attrs):
+        self.current.children.append(Element(tag, attrs, self.current))
+
+    def handle_endtag(self, tag):
+        # Close up to the matching element, tolerating unclosed children
+        node = self.current
+        while node is not None and node.tag != tag:
+            node = node.parent
+        if node is not None and node.parent is not None:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.children.append(data)
+
+
+def parse_html(html):
+    builder = _TreeBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def is_login_html(url, root):
+    return "login" in url.lower() or any(
+        element.attrs.get("id") == "Username" for element in root.iter("input"))
+
+
+def is_saved_html(url, root):
+    """Whether the portal's answer to a form POST shows the save went in.
+
+    The portal goes back to the Detail page after a save; a page that
+    stays on the form, e.g. with its validation errors, saved nothing.
+    """
+    if urlparse(url).path.rstrip("/").lower() == EPBM_DETAIL_PATH.lower():
+        return True
+    return any("berhasil" in alert.text.lower() for alert in root.iter(classes=("alert-success",)))
+
+
+def login_error_message(root):
+    for alert in root.iter(classes=("alert", "alert-danger")):
+        if "Login gagal" in alert.text or "password Anda salah" in alert.text:
+            return alert.text
+    return None
+
+
+def form_fields(form):
+    """Fields a browser would submit for the form, before any user input."""
+    fields = []
+    for element in form.iter():
+        name = element.attrs.get("name")
+        if not name or "disabled" in element.attrs:
+            continue
+        if element.tag == "input":
+            input_type = element.attrs.get("type", "text").lower()
+            if input_type in ("checkbox", "radio"):
+                if "checked" in element.attrs:
+                    fields.append((name, element.attrs.get("value", "on")))
+            elif input_type not in ("submit", "button", "image", "file", "reset"):
+                fields.append((name, element.attrs.get("value", "")))
+        elif element.tag == "textarea":
+            fields.append((name, element.text))
+    return fields
+
+
+CARD_CLASSES = ("btn", "card", "small-box")
+
+
+def course_from_card(card, index, base_url):
+    """The course dict of one EPBM card element, or None when it has no header or, still open, no link."""
+    header = card.find(classes=("card-header",))
+    if header is None:
+        return None
+
+    title_element = header.find("h4")
+    desc_element = header.find("p")
+    title = title_element.text if title_element is not None else "Untitled"
+    desc = desc_element.text if desc_element is not None else ""
+    is_completed = card.find(classes=("fa-check-circle", "text-success")) is not None
+    link = card.attrs.get("href")
+    if not link and not is_completed:
+        # Joined onto the base URL an empty link is the Detail page itself, there is no form to fill
+        return None
+    href = urljoin(base_url, link) if link else None
+
+    return {
+        'title': title,
+        'desc': desc,
+        'href': href,
+        'is_sarpras': "Sarana dan Prasarana" in title or "sarpras" in (href or "").lower(),
+        'is_completed': is_completed,
+        'index': index
+    }
+
+
+def parse_course_cards(root, base_url):
+    """Course dicts for every EPBM card, in the same shape as the Selenium scan."""
+    courses = []
+    for index, card in enumerate(root.iter(classes=CARD_CLASSES)):
+        course = course_from_card(card, index, base_url)
+        if course is not None:
+            courses.append(course)
+    return courses
+
+
+class CardStreamParser(_TreeBuilder):
+    """Builds the page tree from chunks and hands out each card as soon as its closing tag arrives."""
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+        self.card_count = 0
+        self.ready = []
+
+    def handle_endtag(self, tag):
+        node = self.current
+        while node is not None and node.tag != tag:
+            node = node.parent
+        super().handle_endtag(tag)
+        if node is not None and node.matches(classes=CARD_CLASSES):
+            course = course_from_card(node, self.card_count, self.base_url)
+            self.card_count += 1
+            if course is not None:
+                self.ready.append(course)
+
+    def feed_cards(self, chunk):
+        """Parse the next chunk of the page, returns the cards it completed."""
+        self.feed(chunk)
+        ready, self.ready = self.ready, []
+        return ready
+
+
+def parse_epbm_form(root, base_url):
+    """Read the questionnaire form's data model.
+
+    Returns the submit URL, the fields the page would post untouched, and
+    the rating, textarea and checkbox fields grouped by the ``h5`` heading
+    of the questionnaire page they belong to.
+    """
+    form = None
+    for candidate in root.iter("form"):
+        if candidate.find(classes=("b-rating",)) is not None:
+            form = candidate
+            break
+    if form is None:
+        return None
+
+    model = {
+        'action': urljoin(base_url, form.attrs.get("action", "")),
+        'fields': [],
+        'ratings': [],
+        'textareas': [],
+        'checkboxes': [],
+    }
+
+    page = ""
+    page_ratings = 0
+    for element in form.iter():
+        if element.tag == "h5" and element.text != page:
+            page = element.text
+            page_ratings = 0
+        elif element.matches(classes=("b-rating",)):
+            hidden = element.find("input")
+            if hidden is None or not hidden.attrs.get("name"):
+                continue
+            model['ratings'].append({
+                'name': hidden.attrs["name"],
+                'page': page,
+                'index': page_ratings,
+                'stars': len(element.find_all(classes=("b-rating-star",))),
+            })
+            page_ratings += 1
+        elif element.tag == "textarea" and element.attrs.get("name"):
+            model['textareas'].append({'name': element.attrs["name"], 'page': page})
+        elif element.tag == "input" and element.attrs.get("type", "").lower() == "checkbox" \
+                and element.attrs.get("name"):
+            model['checkboxes'].append((element.attrs["name"], element.attrs.get("value", "on")))
+
+    ratings = {rating['name'] for rating in model['ratings']}
+    textareas = {textarea['name'] for textarea in model['textareas']}
+    checkboxes = {name for name, _ in model['checkboxes']}
+    for name, value in form_fields(form):
+        if name in ratings or name in textareas or (name in checkboxes and value != "false"):
+            continue
+        model['fields'].append((name, value))
+    return model
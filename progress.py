@@ -0,0 +1,88 @@
+"""Page-level progress of a fill run.
+
+Every course counts for the real number of pages of its form (from the
+questionnaire schema), so a seven page course form weighs seven times a
+sarpras form. The ETA comes from the measured time per page, which also
+accounts for browsers working in parallel.
+"""
+
+import threading
+import time
+
+# Emit at most this often unless the shown percentage changes
+MIN_EMIT_INTERVAL = 0.5
+
+
+def format_eta(seconds):
+    if seconds is None or seconds < 0:
+        return ""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"sisa ~{seconds} dtk"
+    return f"sisa ~{seconds // 60} mnt {seconds % 60:02d} dtk"
+
+
+class ProgressTracker:
+    """Counts filled pages across all fillers and reports percentage and ETA."""
+
+    def __init__(self, courses, questionnaire, emit, clock=time.monotonic):
+        # emit(percent, eta_seconds) with eta_seconds -1 while unknown
+        self.emit = emit
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.questionnaire = questionnaire
+        self.course_pages = {self.key(course): len(questionnaire.plan(course['is_sarpras'])['pages'])
+                             for course in courses}
+        self.total = max(1, sum(self.course_pages.values()))
+        self.done_pages = dict.fromkeys(self.course_pages, 0)
+        self.done = 0
+        self.started = clock()
+        self.last_emitted = None
+        self.last_emit_time = 0.0
+        emit(0.0, -1)
+
+    @staticmethod
+    def key(course):
+        return course.get('href') or (course['title'], course['desc'])
+
+    def add_course(self, course):
+        """Count a course found while the run is already going, e.g. by a streaming scan."""
+        with self.lock:
+            key = self.key(course)
+            if key in self.course_pages:
+                return
+            self.course_pages[key] = len(self.questionnaire.plan(course['is_sarpras'])['pages'])
+            self.done_pages[key] = 0
+            self.total = max(1, sum(self.course_pages.values()))
+
+    def page_done(self, course):
+        with self.lock:
+            key = self.key(course)
+            if self.done_pages[key] < self.course_pages[key]:
+                self.done_pages[key] += 1
+                self.done += 1
+            self.report()
+
+    def course_done(self, course):
+        """Count the pages a course didn't go through, e.g. when it failed or was skipped."""
+        with self.lock:
+            key = self.key(course)
+            self.done += self.course_pages[key] - self.done_pages[key]
+            self.done_pages[key] = self.course_pages[key]
+            self.report()
+
+    def report(self):
+        # Called with the lock held, so updates from parallel fillers are emitted in order
+        now = self.clock()
+        # Keep under 100% until the run is finished
+        percent = round(min(self.done / self.total * 100, 99.9), 1)
+        if percent == self.last_emitted and now - self.last_emit_time < MIN_EMIT_INTERVAL:
+            return
+        elapsed = now - self.started
+        eta = (self.total - self.done) * elapsed / self.done if self.done else -1
+        self.last_emitted = percent
+        self.last_emit_time = now
+        self.emit(percent, eta)
+
+    def finish(self):
+        self.emit(100.0, 0)
@@ -0,0 +1,134 @@
+"""Questionnaire layout, loaded from questionnaire_schema.json.
+
+The schema maps each page's heading fingerprint to its questions and the
+settings key that rates them, so a portal wording change means editing the
+schema instead of the fill code. It is compiled once per run, against the
+settings, into the per-page values both engines use.
+"""
+
+import json
+import os
+import threading
+
+from app_paths import data_dir
+
+SCHEMA_VERSION = 1
+SCHEMA_FILE = "questionnaire_schema.json"
+
+
+class SchemaError(ValueError):
+    """The questionnaire schema is missing, malformed or refers to unknown settings."""
+
+
+def schema_paths():
+    # An updated schema in the data directory takes precedence over the bundled one
+    return [os.path.join(data_dir(), SCHEMA_FILE),
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), SCHEMA_FILE)]
+
+
+def load_schema(path=None):
+    candidates = [path] if path else [p for p in schema_paths() if os.path.exists(p)]
+    if not candidates:
+        raise SchemaError(f"File {SCHEMA_FILE} tidak ditemukan.")
+    try:
+        with open(candidates[0], encoding="utf-8") as f:
+            schema = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SchemaError(f"Gagal membaca {candidates[0]}: {e}") from e
+
+    version = schema.get('version')
+    if version != SCHEMA_VERSION:
+        raise SchemaError(f"Versi skema kuesioner {version} tidak didukung (diharapkan {SCHEMA_VERSION}).")
+    return schema
+
+
+def rating_keys(schema):
+    """Settings keys of the star ratings."""
+    return [question['setting'] for form in schema['forms'].values()
+            for page in form['pages'] for question in page['questions']]
+
+
+def text_keys(schema):
+    """Settings keys of the free text answers."""
+    return [page['text_setting'] for form in schema['forms'].values()
+            for page in form['pages'] if page.get('text_setting')]
+
+
+def setting_keys(schema):
+    """Every settings key the schema refers to."""
+    return rating_keys(schema) + text_keys(schema)
+
+
+class Questionnaire:
+    """The schema compiled against one run's settings."""
+
+    def __init__(self, schema, settings):
+        missing = [key for key in setting_keys(schema) if key not in settings]
+        if missing:
+            raise SchemaError(f"Pengaturan tidak ditemukan untuk: {', '.join(missing)}")
+
+        self.default = schema.get('default_rating', 4)
+        self.plans = {False: self.compile_form(schema['forms']['course'], settings),
+                      True: self.compile_form(schema['forms']['sarpras'], settings)}
+        self.unknown_pages = set()
+        self.unknown_texts = set()
+        self.lock = threading.Lock()
+
+    def compile_form(self, form, settings):
+        pages = []
+        saran = saran_page = None
+        for page in form['pages']:
+            pages.append({
+                'match': page['fingerprint'],
+                'values': [settings[question['setting']] for question in page['questions']],
+                # One rating per lecturer, all with the page's single question
+                'repeat': bool(page.get('per_lecturer')),
+                # The free text answer of the page's text areas, None when it has none
+                'text': settings[page['text_setting']] if page.get('text_setting') else None,
+            })
+            if page.get('text_setting'):
+                saran, saran_page = settings[page['text_setting']], page['fingerprint']
+        return {'pages': pages, 'default': self.default, 'saran': saran or "", 'saran_page': saran_page}
+
+    def plan(self, is_sarpras=False):
+        """Everything the page filler needs to fill either form, without further lookups."""
+        return self.plans[is_sarpras]
+
+    def find_page(self, heading, is_sarpras=False):
+        return next((page for page in self.plans[is_sarpras]['pages'] if page['match'] in heading), None)
+
+    def rating_value(self, heading, index, is_sarpras=False):
+        """Star value for the index-th rating on the page with the given heading."""
+        page = self.find_page(heading, is_sarpras)
+        if page is None:
+            return self.default
+        if index < len(page['values']):
+            return page['values'][index]
+        if page['repeat'] and page['values']:
+            return page['values'][0]
+        return self.default
+
+    def text_value(self, heading, is_sarpras=False):
+        """Free text for a text area on the page with the given heading, None when the schema has none for it."""
+        page = self.find_page(heading, is_sarpras)
+        return page['text'] if page is not None else None
+
+    def report_unknown_text(self, heading, log):
+        """Warn, once per run, about text areas on a page the schema has no text for."""
+        with self.lock:
+            if heading in self.unknown_texts:
+                return
+            self.unknown_texts.add(heading)
+        log(f"Peringatan: kolom isian tidak dikenal oleh skema kuesioner, dibiarkan kosong: {heading}")
+
+    def report_unknown(self, heading, log):
+        """Warn, once per run, about a page the schema doesn't describe."""
+        with self.lock:
+            if heading in self.unknown_pages:
+                return
+            self.unknown_pages.add(heading)
+        log(f"Peringatan: halaman tidak dikenal oleh skema kuesioner, diisi nilai default {self.default}: {heading}")
+
+
+def compile_questionnaire(settings, path=None):
+    return Questionnaire(load_schema(path), settings)
@@ -0,0 +1,141 @@
+"""Classifying fill errors and recovering from them with bounded retries.
+
+Every error a filler runs into is sorted into a kind (stale element, click
+intercepted, navigation in progress, timeout, server error, expired login,
+lost browser, failed login). Each kind has a rule: the cheapest level that
+can recover from it, how often to try and the first backoff delay, which
+doubles with every attempt up to MAX_BACKOFF. The levels, from cheap to
+expensive:
+
+- element: repeat the action on the element, or its fallback (a JS click
+  when the native click was intercepted);
+- page: repeat the page step, e.g. the page script or the form request;
+- course: open the course's form again from its link;
+- session: log in again, or start a new browser (see automation.BrowserPool).
+
+A step runs at the level it can repeat itself. An error whose rule needs a
+more expensive level propagates to the caller running at that level; one
+that ran out of attempts propagates without being retried again further
+up. A failed login is never retried. Every recovery is logged and recorded in the
+run's timings as a recover_<level> span, so the summary shows what it cost.
+"""
+
+import socket
+import time
+import urllib.error
+from collections import namedtuple
+
+from timing import timed
+
+ELEMENT, PAGE, COURSE, SESSION = range(4)
+LEVEL_NAMES = ("element", "page", "course", "session")
+LEVEL_LABELS = ("elemen", "halaman", "mata kuliah", "sesi")
+
+STALE_ELEMENT = "stale_element"
+CLICK_INTERCEPTED = "click_intercepted"
+NAVIGATING = "navigating"
+TIMEOUT = "timeout"
+SERVER_ERROR = "server_error"
+SESSION_EXPIRED = "session_expired"
+BROWSER_LOST = "browser_lost"
+LOGIN_FAILED = "login_failed"
+UNKNOWN = "unknown"
+
+# level None: never retried
+Rule = namedtuple("Rule", "level attempts backoff label")
+
+RULES = {
+    STALE_ELEMENT: Rule(ELEMENT, 3, 0.0, "elemen sudah tidak ada di halaman"),
+    CLICK_INTERCEPTED: Rule(ELEMENT, 2, 0.05, "klik terhalang elemen lain"),
+    NAVIGATING: Rule(PAGE, 3, 0.1, "halaman sedang berpindah"),
+    TIMEOUT: Rule(PAGE, 2, 0.25, "waktu tunggu habis"),
+    SERVER_ERROR: Rule(PAGE, 3, 0.5, "portal tidak merespons dengan benar"),
+    SESSION_EXPIRED: Rule(SESSION, 1, 0.0, "sesi login berakhir"),
+    BROWSER_LOST: Rule(SESSION, 1, 0.0, "browser terputus"),
+    LOGIN_FAILED: Rule(None, 0, 0.0, "login gagal"),
+    UNKNOWN: Rule(COURSE, 1, 0.5, "error tak dikenal"),
+}
+MAX_BACKOFF = 5.0
+
+BROWSER_LOST_MESSAGES = ("chrome not reachable", "no such window", "invalid session id", "disconnected",
+                         "session deleted", "target window already closed", "koneksi devtools terputus")
+NAVIGATING_MESSAGES = ("execution context was destroyed", "document unloaded", "inspected target navigated",
+                       "cannot find context")
+# Page loads and DevTools commands that ran out of time, from either driver
+TIMEOUT_MESSAGES = ("timed out", "timeout", "melebihi", "tidak selesai dimuat")
+# Base errors of the two browser engines, sorted further by their message
+DRIVER_ERRORS = {'WebDriverException', 'CdpError'}
+
+
+class SessionExpired(Exception):
+    """The portal answered with its login page in the middle of a run."""
+
+
+def classify(error):
+    """The kind of an error, by its class and message; works without importing Selenium."""
+    names = {cls.__name__ for cls in type(error).__mro__}
+    message = str(error).lower()
+    if 'LoginError' in names:
+        return LOGIN_FAILED
+    if isinstance(error, SessionExpired):
+        return SESSION_EXPIRED
+    if 'StaleElementReferenceException' in names:
+        return STALE_ELEMENT
+    if names & {'ElementClickInterceptedException', 'ElementNotInteractableException'}:
+        return CLICK_INTERCEPTED
+    if names & {'InvalidSessionIdException', 'NoSuchWindowException'} or \
+            (names & DRIVER_ERRORS and any(text in message for text in BROWSER_LOST_MESSAGES)):
+        return BROWSER_LOST
+    if names & DRIVER_ERRORS and any(text in message for text in NAVIGATING_MESSAGES):
+        return NAVIGATING
+    if names & {'TimeoutException', 'WaitTimeout'} or isinstance(error, (socket.timeout, TimeoutError)) or \
+            (names & DRIVER_ERRORS and any(text in message for text in TIMEOUT_MESSAGES)):
+        return TIMEOUT
+    if names & DRIVER_ERRORS and "net::err_" in message:
+        return SERVER_ERROR
+    if isinstance(error, urllib.error.HTTPError):
+        return SERVER_ERROR if error.code >= 500 or error.code == 429 else UNKNOWN
+    if isinstance(error, (urllib.error.URLError, ConnectionError)):
+        return SERVER_ERROR
+    return UNKNOWN
+
+
+class RecoveryPolicy:
+    """Runs steps under the rules, shared by the steps of one filler."""
+
+    def __init__(self, log, timer=None, rules=RULES, sleep=time.sleep):
+        self.log = log
+        self.timer = timer
+        self.rules = rules
+        self.sleep = sleep
+
+    def attempt(self, action, level, course=None, fallback=None, recover=None):
+        """Run action, retrying the errors this level can recover from, and return its result.
+
+        fallback, when given, replaces the action from the first retry on.
+        recover(kind) runs before each retry and returns False when it
+        can't recover after all. Errors for a more expensive level, and
+        those out of attempts, are raised to the caller.
+        """
+        attempts = {}
+        while True:
+            try:
+                return action()
+            except Exception as error:
+                kind = classify(error)
+                rule = self.rules[kind]
+                if rule.level is None or rule.level > level or getattr(error, 'recovery_given_up', False):
+                    raise
+                attempts[kind] = attempts.get(kind, 0) + 1
+                if attempts[kind] > rule.attempts:
+                    self.log(f"Pemulihan ({LEVEL_LABELS[rule.level]}) menyerah: {rule.label}.")
+                    error.recovery_given_up = True
+                    raise
+                self.log(f"Pemulihan ({LEVEL_LABELS[rule.level]}): {rule.label}, "
+                         f"percobaan {attempts[kind]}/{rule.attempts}...")
+                with timed(self.timer, f"recover_{LEVEL_NAMES[rule.level]}", course):
+                    self.sleep(min(rule.backoff * 2 ** (attempts[kind] - 1), MAX_BACKOFF))
+                    if recover is not None and not recover(kind):
+                        raise
+                if fallback is not None:
+                    action = fallback
@@ -0,0 +1,133 @@
+"""Run configuration for runs without the window.
+
+A config is a JSON file with the same choices the window offers:
+
+    {
+        "username": "G64190001",
+        "password_env": "EPBM_PASSWORD",
+        "engine": "http",
+        "workers": 4,
+        "ratings": {"dosen_feedback": 3},
+        "saran_dosen": "Terima kasih atas ilmu yang diberikan.",
+        "remember_session": true,
+        "courses": ["KOM201", "Basis Data"],
+        "policy": "unfinished",
+        "requeue_unconfirmed": true
+    }
+
+Every rating left out gets the schema's default rating. The password can be
+given directly as "password", but reading it from an environment variable
+keeps it out of the file. With "remember_session" the portal cookies are
+cached encrypted (see session_cache) so repeat runs skip the login.
+"policy" picks the courses of a streaming run (see pipeline), which
+fills them while the scan is still going. With "requeue_unconfirmed" the
+courses the Detail page doesn't show as filled after the run are filled
+once more (see verification).
+"""
+
+import fnmatch
+import json
+import os
+
+from pipeline import DEFAULT_POLICY, SELECTION_POLICIES
+from portal_pages import BROWSER_PROFILES, ENGINES, PORTAL_URL, SELENIUM_ENGINE, STANDARD_PROFILE
+from questionnaire import load_schema, rating_keys, text_keys
+
+DEFAULT_SARAN = "Terima kasih atas ilmu yang diberikan. Semoga pembelajaran ke depannya semakin baik."
+MAX_WORKERS = 8
+MIN_RATING, MAX_RATING = 1, 4
+
+
+class ConfigError(ValueError):
+    """The run configuration is missing, malformed or has an invalid value."""
+
+
+def load_config(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"Gagal membaca konfigurasi {path}: {e}") from e
+    if not isinstance(config, dict):
+        raise ConfigError(f"Konfigurasi {path} harus berupa objek JSON.")
+    return config
+
+
+def credentials_from(config, environ=os.environ):
+    username = config.get('username')
+    if not username:
+        raise ConfigError("Username belum diisi.")
+
+    password = config.get('password')
+    if not password and config.get('password_env'):
+        password = environ.get(config['password_env'])
+        if not password:
+            raise ConfigError(f"Variabel lingkungan {config['password_env']} kosong atau tidak ada.")
+    if not password:
+        raise ConfigError("Password belum diisi (gunakan 'password' atau 'password_env').")
+    return {'username': username, 'password': password}
+
+
+def int_option(config, key, default, low, high):
+    value = config.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+        raise ConfigError(f"Nilai {key} harus bilangan bulat {low}-{high}, bukan {value!r}.")
+    return value
+
+
+def build_settings(config, schema=None):
+    """The settings dict the fillers expect, with every value checked."""
+    schema = schema or load_schema()
+    default = schema.get('default_rating', MAX_RATING)
+
+    ratings = config.get('ratings', {})
+    if not isinstance(ratings, dict):
+        raise ConfigError("'ratings' harus berupa objek JSON.")
+    keys = rating_keys(schema)
+    unknown = [key for key in ratings if key not in keys]
+    if unknown:
+        raise ConfigError(f"Penilaian tidak dikenal: {', '.join(unknown)}")
+
+    settings = {key: int_option(ratings, key, default, MIN_RATING, MAX_RATING) for key in keys}
+    for key in text_keys(schema):
+        settings[key] = str(config.get(key, DEFAULT_SARAN))
+
+    engine = config.get('engine', SELENIUM_ENGINE)
+    if engine not in ENGINES:
+        raise ConfigError(f"Mesin tidak dikenal: {engine} (pilihan: {', '.join(ENGINES)})")
+    profile = config.get('browser_profile', STANDARD_PROFILE)
+    if profile not in BROWSER_PROFILES:
+        raise ConfigError(f"Profil browser tidak dikenal: {profile} (pilihan: {', '.join(BROWSER_PROFILES)})")
+    policy = config.get('policy', DEFAULT_POLICY)
+    if policy not in SELECTION_POLICIES:
+        raise ConfigError(f"Kebijakan pemilihan tidak dikenal: {policy} (pilihan: {', '.join(SELECTION_POLICIES)})")
+
+    settings.update({
+        'headless': bool(config.get('headless', True)),
+        'remember_session': bool(config.get('remember_session', False)),
+        'engine': engine,
+        'browser_profile': profile,
+        'workers': int_option(config, 'workers', 1, 1, MAX_WORKERS),
+        'portal_url': config.get('portal_url', PORTAL_URL),
+        'policy': policy,
+        'requeue_unconfirmed': bool(config.get('requeue_unconfirmed', False)),
+    })
+    return settings
+
+
+def select_courses(courses, patterns=(), include_completed=False):
+    """The scanned courses a run fills.
+
+    Without patterns every course not filled yet is selected. A pattern
+    matches the course code or name, case-insensitively, with * and ? as
+    wildcards.
+    """
+    selected = []
+    for course in courses:
+        if course['is_completed'] and not include_completed:
+            continue
+        names = [course['title'].lower(), course['desc'].lower(), f"{course['title']}: {course['desc']}".lower()]
+        if not patterns or any(fnmatch.fnmatch(name, pattern.lower()) or pattern.lower() in name
+                               for pattern in patterns for name in names):
+            selected.append(course)
+    return selected
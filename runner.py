@@ -0,0 +1,297 @@
+"""Scan and fill runs without a window.
+
+The window's workers run these on their threads and the command line runs
+them directly. Log lines and progress go through plain callbacks. The
+browser modules are only imported by the steps that start Chrome, so the
+HTTP engine runs without them.
+"""
+
+from http_engine import HttpPortal, HttpSession, fill_courses_http
+from journal import RunJournal
+from portal_pages import HTTP_ENGINE, PORTAL_URL, SELENIUM_ENGINE, STANDARD_PROFILE, LoginError
+from progress import ProgressTracker
+from questionnaire import compile_questionnaire
+from session_cache import SessionCache
+from timing import timed
+from verification import verify_run
+
+
+def log_found_course(course, log):
+    if course['is_completed']:
+        log(f"Terdeteksi {course['title']}: {course['desc']} sudah diisi sebelumnya.")
+    log(f"Ditemukan: {course['title']}: {course['desc']}{' (Sudah diisi)' if course['is_completed'] else ''}")
+
+
+def report_found_courses(courses, log, on_course=None):
+    """Log every scanned course and hand it to on_course, e.g. to show it while the scan goes on."""
+    for course in courses:
+        log_found_course(course, log)
+        if on_course is not None:
+            on_course(course)
+        yield course
+
+
+def session_cache_for(enabled, log):
+    """The session cache when the user asked to remember the session and it can be used."""
+    if not enabled:
+        return None
+    if not SessionCache.available():
+        log("Paket cryptography belum terpasang, sesi login tidak akan diingat.")
+        return None
+    return SessionCache()
+
+
+def restore_browser_session(driver, credentials, portal_url, session_cache, log):
+    cookies = session_cache.load(credentials, portal_url) if session_cache is not None else []
+    if cookies:
+        from portal import add_cookies
+
+        log("Memakai sesi login yang tersimpan...")
+        add_cookies(driver, cookies, portal_url)
+
+
+def scan_courses(credentials, log, profile=STANDARD_PROFILE, portal_url=PORTAL_URL, timer=None, keep_session=True,
+                 user_data_dir=None, session_cache=None, warm_session=None, on_course=None, engine=SELENIUM_ENGINE):
+    """Read every EPBM card with a headless browser.
+
+    Starts from the warm_session's browser when one is given. Every course
+    goes to on_course as it is read. Returns the courses and the still
+    logged-in PortalSession for the fill run, or None when there is
+    nothing to fill or keep_session is off.
+    """
+    from portal import PortalSession, create_driver, open_epbm_detail, read_course_cards
+
+    driver = warm_session.claim(credentials, True, profile, log, engine) if warm_session is not None else None
+    if driver is None:
+        # Initialize the Chrome driver
+        log("Menginisialisasi Chrome driver...")
+        with timed(timer, "driver_start"):
+            driver = create_driver(True, profile, portal_url, user_data_dir, engine)  # Always use headless for scanning
+    session = None
+
+    try:
+        # Open the IPB student portal and log in if the remembered session is missing or expired
+        restore_browser_session(driver, credentials, portal_url, session_cache, log)
+        open_epbm_detail(driver, credentials, log, portal_url, timer)
+        if session_cache is not None:
+            session_cache.save(credentials, portal_url, driver.get_cookies())
+
+        # Parse every card from one snapshot of the page instead of querying each card
+        with timed(timer, "scan"):
+            courses = read_course_cards(driver)
+        courses = list(report_found_courses(courses, log, on_course))
+        log(f"Ditemukan {len(courses)} kartu EPBM yang perlu diisi.")
+
+        # Keep the logged-in browser alive for the automation run
+        if courses and keep_session:
+            session = PortalSession(driver, credentials['username'], True, profile, portal_url, user_data_dir,
+                                    engine)
+        return courses, session
+
+    except LoginError:
+        if session_cache is not None:
+            session_cache.clear(credentials['username'], portal_url)
+        raise
+    except Exception as e:
+        log(f"Terjadi error: {e}")
+        return [], None
+    finally:
+        # Close the browser unless it was handed over
+        if session is None:
+            driver.quit()
+
+
+def scan_courses_http(credentials, log, portal_url=PORTAL_URL, timer=None, session_cache=None, on_course=None,
+                      keep_session=True):
+    """Read every EPBM card over plain HTTP, without starting Chrome.
+
+    The cards are parsed while the Detail page downloads, each goes to
+    on_course as soon as it is complete. Returns the courses and, like
+    scan_courses, the logged-in HttpSession for the fill run, or None when
+    there is nothing to fill or keep_session is off.
+    """
+    portal = HttpPortal(portal_url)
+    cookies = session_cache.load(credentials, portal_url) if session_cache is not None else []
+    if cookies:
+        log("Memakai sesi login yang tersimpan...")
+        portal.add_cookies(cookies)
+    try:
+        courses = list(report_found_courses(portal.stream_course_cards(credentials, log, timer), log, on_course))
+    except LoginError:
+        if session_cache is not None:
+            session_cache.clear(credentials['username'], portal_url)
+        raise
+    if session_cache is not None:
+        session_cache.save(credentials, portal_url, portal.cookies())
+    log(f"Ditemukan {len(courses)} kartu EPBM yang perlu diisi.")
+    return courses, HttpSession(portal, credentials['username']) if courses and keep_session else None
+
+
+def scan_with_settings(credentials, settings, log, timer=None, keep_session=True, on_course=None):
+    """Scan with the engine of the settings: over HTTP for the HTTP engine, with Chrome otherwise."""
+    session_cache = session_cache_for(settings.get('remember_session'), log)
+    if settings.get('engine') == HTTP_ENGINE:
+        return scan_courses_http(credentials, log, settings.get('portal_url', PORTAL_URL), timer, session_cache,
+                                 on_course, keep_session)
+    return scan_courses(credentials, log, settings.get('browser_profile', STANDARD_PROFILE),
+                        settings.get('portal_url', PORTAL_URL), timer, keep_session, settings.get('user_data_dir'),
+                        session_cache, on_course=on_course, engine=settings.get('engine', SELENIUM_ENGINE))
+
+
+def report_unknown_pages(questionnaire, log):
+    if questionnaire.unknown_pages:
+        log(f"\nTerdapat {len(questionnaire.unknown_pages)} halaman kuesioner yang tidak dikenal. "
+            "Perbarui questionnaire_schema.json agar nilainya sesuai pengaturan.")
+
+
+def report_timings(timer, log):
+    if not timer.spans:
+        return
+    log("\nRingkasan waktu per tahap:")
+    for line in timer.summary_lines():
+        log(line)
+    try:
+        json_path, csv_path = timer.export()
+        log(f"Rincian waktu disimpan di {json_path} dan {csv_path}")
+    except OSError as e:
+        log(f"Gagal menyimpan rincian waktu: {e}")
+
+
+def start_progress(courses, questionnaire, log, emit_progress):
+    log(f"Akan mengisi {len(courses)} kartu EPBM yang dipilih.")
+
+    # Progress counts the real pages of every selected form
+    return ProgressTracker(courses, questionnaire, emit_progress)
+
+
+def fill_via_http(credentials, settings, courses, log, emit_progress, questionnaire, session, timer, journal):
+    # The scan's session, browser or HTTP, is only needed for its cookies
+    cookies = []
+    if session is not None:
+        if session.username == credentials['username']:
+            cookies = session.cookies()
+        session.close()
+    if not cookies:
+        session_cache = session_cache_for(settings.get('remember_session'), log)
+        if session_cache is not None:
+            cookies = session_cache.load(credentials, settings.get('portal_url', PORTAL_URL))
+
+    portal = HttpPortal(settings.get('portal_url', PORTAL_URL))
+    progress = start_progress(courses, questionnaire, log, emit_progress)
+
+    def fill(batch):
+        return fill_courses_http(credentials, settings, batch, log, progress, cookies, questionnaire, timer, journal,
+                                 portal)
+
+    saved = verify_run(courses, fill(courses), lambda: portal.read_course_cards(credentials, log, timer), fill,
+                       settings, log, timer, journal)
+
+    report_unknown_pages(questionnaire, log)
+    progress.finish()
+    log("\nProses pengisian EPBM selesai!")
+    return saved
+
+
+def fill_via_browser(credentials, settings, courses, log, emit_progress, questionnaire, session, timer, journal):
+    from automation import fill_courses
+    from portal import create_driver, open_epbm_detail, read_detail_cards
+
+    portal_url = settings.get('portal_url', PORTAL_URL)
+    profile = settings.get('browser_profile', STANDARD_PROFILE)
+    engine = settings.get('engine', SELENIUM_ENGINE)
+
+    # Reuse the browser from the course scan when possible
+    driver = None
+    if session is not None:
+        driver = session.claim(credentials, settings['headless'], profile, log, engine)
+
+    fresh_driver = driver is None
+    if fresh_driver:
+        # Initialize the Chrome driver
+        log("Menginisialisasi Chrome driver...")
+        with timed(timer, "driver_start"):
+            driver = create_driver(settings['headless'], profile, portal_url, settings.get('user_data_dir'), engine)
+
+    saved = [False] * len(courses)
+    try:
+        if fresh_driver:
+            restore_browser_session(driver, credentials, portal_url,
+                                    session_cache_for(settings.get('remember_session'), log), log)
+
+        # Open the IPB student portal, logging in again if the session has expired
+        open_epbm_detail(driver, credentials, log, portal_url, timer)
+
+        progress = start_progress(courses, questionnaire, log, emit_progress)
+
+        def fill(batch):
+            # Go on with the browser that replaced a lost one
+            nonlocal driver
+            saved, driver = fill_courses(driver, credentials, settings, batch, log, progress, questionnaire, timer,
+                                         journal)
+            return saved
+
+        # One read of the Detail page confirms the saves of every course
+        saved = verify_run(courses, fill(courses),
+                           lambda: read_detail_cards(driver, credentials, log, portal_url, timer), fill, settings,
+                           log, timer, journal)
+
+        report_unknown_pages(questionnaire, log)
+
+        # Set final progress to 100% when everything is done
+        progress.finish()
+        log("\nProses pengisian EPBM selesai!")
+
+    except LoginError:
+        raise
+    except Exception as e:
+        log(f"Terjadi error pada proses keseluruhan: {e}")
+    finally:
+        # Close the browser
+        driver.quit()
+    return saved
+
+
+def fill_selected_courses(credentials, settings, courses, log, emit_progress, session=None, timer=None,
+                          journal=None):
+    """Fill the selected courses with the engine chosen in the settings.
+
+    emit_progress(percent, eta_seconds) receives the progress. The scan's
+    session, when given, is taken over and closed if it can't be reused.
+    The journal, already started or resumed by the caller, records every
+    page and save. Returns whether each course was saved, in the order of
+    the courses.
+    """
+    try:
+        # Checks the schema against the settings before any browser is started
+        questionnaire = compile_questionnaire(settings)
+
+        if settings.get('engine') == HTTP_ENGINE:
+            return fill_via_http(credentials, settings, courses, log, emit_progress, questionnaire, session, timer,
+                                 journal)
+        else:
+            return fill_via_browser(credentials, settings, courses, log, emit_progress, questionnaire, session,
+                                    timer, journal)
+    finally:
+        # A scan browser that was never claimed
+        if session is not None:
+            session.close()
+        if journal is not None:
+            journal.finish()
+
+
+def open_journal(credentials, settings, log, resume=False):
+    """The account's run journal and, when resuming, the courses its last run left unsaved.
+
+    Returns the journal and None when there is nothing to resume.
+    """
+    journal = RunJournal.for_user(credentials['username'], settings.get('portal_url', PORTAL_URL))
+    pending = journal.pending() if resume else None
+    if pending is None:
+        return journal, None
+    courses, pages = pending
+    log(f"Melanjutkan pengisian sebelumnya: {len(courses)} mata kuliah belum tersimpan.")
+    for course in courses:
+        if pages.get(course['href']):
+            log(f"{course['title']}: {course['desc']} berhenti setelah halaman {pages[course['href']]}, "
+                "diisi ulang dari awal karena portal belum menyimpannya.")
+    return journal, courses
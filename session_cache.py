@@ -0,0 +1,110 @@
+"""Encrypted on-disk cache of the portal session cookies, per user.
+
+Opt-in: the cookies of a logged-in session are only written when the user
+asks to remember the session. They are encrypted with a key derived from
+the user's password (PBKDF2 + Fernet), so the file is useless without it,
+and a changed password simply makes the cache unreadable. A cache older
+than MAX_AGE is ignored; the portal decides whether younger cookies still
+work, a stale session just means logging in as before.
+
+Needs the ``cryptography`` package; without it the cache is never used.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+
+from app_paths import account_file_name, data_dir
+
+SESSIONS_DIR = "sessions"
+CACHE_VERSION = 1
+# The portal's cookies don't survive much longer than a day in practice
+MAX_AGE = 24 * 60 * 60
+KDF_ITERATIONS = 200_000
+SALT_BYTES = 16
+
+COOKIE_KEYS = ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry')
+
+
+def fernet_class():
+    try:
+        from cryptography.fernet import Fernet
+    except ImportError:
+        return None
+    return Fernet
+
+
+class SessionCache:
+    """Loads and stores the cookies of one portal per user."""
+
+    def __init__(self, directory=None, max_age=MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+        self.keys = {}
+        self.salts = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def available():
+        return fernet_class() is not None
+
+    def path(self, username, portal_url):
+        return os.path.join(self.directory or data_dir(SESSIONS_DIR), account_file_name(username, portal_url, ".json"))
+
+    def fernet(self, password, salt):
+        # Deriving the key is deliberately slow, do it once per run
+        with self.lock:
+            key = self.keys.get((password, salt))
+            if key is None:
+                raw = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, KDF_ITERATIONS)
+                key = self.keys[(password, salt)] = base64.urlsafe_b64encode(raw)
+        return fernet_class()(key)
+
+    def load(self, credentials, portal_url):
+        """The cached cookies, or an empty list when there are none that can still be used."""
+        if not self.available():
+            return []
+        try:
+            with open(self.path(credentials['username'], portal_url), encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get('version') != CACHE_VERSION:
+                return []
+            salt = base64.b64decode(stored['salt'])
+            self.salts[self.path(credentials['username'], portal_url)] = salt
+            payload = self.fernet(credentials['password'], salt).decrypt(stored['token'].encode(), ttl=self.max_age)
+            cookies = json.loads(payload)
+        except Exception:
+            # Missing, expired, tampered with or encrypted with an old password
+            return []
+
+        now = time.time()
+        return [cookie for cookie in cookies if cookie.get('expiry') is None or cookie['expiry'] > now]
+
+    def save(self, credentials, portal_url, cookies):
+        if not self.available() or not cookies:
+            return
+        cookies = [{key: value for key, value in cookie.items() if key in COOKIE_KEYS} for cookie in cookies]
+        path = self.path(credentials['username'], portal_url)
+        # Keeping the salt of the loaded cache saves deriving the key again
+        salt = self.salts.setdefault(path, os.urandom(SALT_BYTES))
+        token = self.fernet(credentials['password'], salt).encrypt(json.dumps(cookies).encode())
+        stored = {'version': CACHE_VERSION, 'salt': base64.b64encode(salt).decode(), 'token': token.decode()}
+
+        # Write next to the cache and swap, a crash never leaves half a file behind
+        temporary = path + ".tmp"
+        try:
+            descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+                json.dump(stored, f)
+            os.replace(temporary, path)
+        except OSError:
+            pass
+
+    def clear(self, username, portal_url):
+        try:
+            os.remove(self.path(username, portal_url))
+        except OSError:
+            pass
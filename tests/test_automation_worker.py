@@ -0,0 +1,73 @@
+"""The window's automation worker, run on the test's thread against the mock portal."""
+
+import pytest
+
+pytest.importorskip("PyQt5")
+pytest.importorskip("qdarkstyle")
+
+from benchmark import benchmark_settings
+from mock_portal import MockPortal, MockPortalConfig
+
+CREDENTIALS = {'username': "mahasiswa", 'password': "rahasia"}
+
+
+@pytest.fixture
+def epbm(tmp_path, monkeypatch):
+    # Journal, metrics and logs go to a throwaway data directory
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
+    import epbm
+    return epbm
+
+
+def run_worker(worker):
+    finished = []
+    worker.finished_signal.connect(lambda success, message: finished.append((success, message)))
+    worker.run()
+    return finished
+
+
+def test_auto_mode_fills_through_the_pipeline_only(epbm, monkeypatch):
+    fills = []
+    monkeypatch.setattr(epbm, "fill_selected_courses", lambda *args: fills.append(args))
+    with MockPortal(MockPortalConfig(courses=3, completed=1)) as portal:
+        settings = benchmark_settings(portal.url, "http", 2)
+        worker = epbm.EPBMAutomationWorker(CREDENTIALS, settings, None, policy="unfinished")
+        finished = run_worker(worker)
+        saved = portal.saved_count()
+
+    assert finished == [(True, "Otomasi selesai dengan sukses!")]
+    assert fills == []
+    # Three courses plus sarpras, one of the courses already filled
+    assert saved == 3
+
+
+def test_auto_mode_without_courses_to_fill(epbm):
+    with MockPortal(MockPortalConfig(courses=2, completed=2, sarpras=False)) as portal:
+        worker = epbm.EPBMAutomationWorker(CREDENTIALS, benchmark_settings(portal.url, "http", 1), None,
+                                           policy="unfinished")
+        finished = run_worker(worker)
+
+    assert finished == [(True, "Tidak ada mata kuliah yang perlu diisi.")]
+
+
+def test_resumed_run_fills_what_the_journal_left(epbm):
+    from journal import RunJournal
+    from runner import scan_courses_http
+
+    with MockPortal(MockPortalConfig(courses=3, sarpras=False)) as portal:
+        settings = benchmark_settings(portal.url, "http", 1)
+        courses, _ = scan_courses_http(CREDENTIALS, lambda message: None, portal.url, keep_session=False)
+        # A run that crashed after its first save, as the window finds it on the next login
+        journal = RunJournal.for_user(CREDENTIALS['username'], portal.url)
+        journal.start(courses)
+        journal.saved(courses[0])
+        journal.close()
+        pending, _ = journal.pending()
+
+        worker = epbm.EPBMAutomationWorker(CREDENTIALS, settings, pending, resume=True)
+        finished = run_worker(worker)
+        submitted = set(portal.submissions)
+
+    assert finished == [(True, "Otomasi selesai dengan sukses!")]
+    assert len(submitted) == 2
+    assert journal.pending() is None
@@ -0,0 +1,119 @@
+"""The HTTP engine end to end against the mock portal."""
+
+import functools
+
+import pytest
+
+import http_engine
+from benchmark import benchmark_settings
+from http_engine import HttpPortal, fill_courses_http
+from mock_portal import MockPortal, MockPortalConfig
+from portal_pages import is_saved_html, parse_course_cards, parse_html
+from progress import ProgressTracker
+from questionnaire import compile_questionnaire
+from recovery import RecoveryPolicy
+
+CREDENTIALS = {'username': "mahasiswa", 'password': "rahasia"}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(http_engine, "RecoveryPolicy", functools.partial(RecoveryPolicy, sleep=lambda seconds: None))
+
+
+def scan(portal):
+    http = HttpPortal(portal.url)
+    return http.read_course_cards(CREDENTIALS, lambda message: None)
+
+
+def fill(portal, courses, workers=1, log=None, portal_session=None):
+    settings = benchmark_settings(portal.url, "http", workers)
+    questionnaire = compile_questionnaire(settings)
+    progress = ProgressTracker(courses, questionnaire, lambda percent, eta: None)
+    return fill_courses_http(CREDENTIALS, settings, courses, log or (lambda message: None), progress,
+                             questionnaire=questionnaire, portal=portal_session)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_fills_every_course(workers):
+    with MockPortal(MockPortalConfig(courses=4, completed=1)) as portal:
+        courses = [course for course in scan(portal) if not course['is_completed']]
+        saved = fill(portal, courses, workers)
+
+        # Three open courses plus sarpras
+        assert saved == [True] * 4
+        assert portal.saved_count() == 4
+        assert portal.rejected == []
+        assert all(course['is_completed'] for course in scan(portal))
+
+
+def test_server_errors_fail_only_their_course():
+    with MockPortal(MockPortalConfig(courses=6, sarpras=False, fail_rate=0.3, seed=7)) as portal:
+        courses = scan(portal)
+        saved = fill(portal, courses)
+
+        assert sum(saved) == portal.saved_count()
+        assert portal.rejected == []
+
+
+def test_portal_down_saves_nothing():
+    messages = []
+    with MockPortal(MockPortalConfig(courses=2, sarpras=False)) as portal:
+        courses = scan(portal)
+        portal.config.fail_rate = 1.0
+        saved = fill(portal, courses, log=messages.append)
+
+        assert saved == [False, False]
+        assert portal.saved_count() == 0
+        assert portal.rejected == []
+    assert any("menyerah" in message for message in messages)
+
+
+def test_expired_session_logs_in_again():
+    messages = []
+    with MockPortal(MockPortalConfig(courses=4, sarpras=False, session_ttl=0.6, latency=0.05)) as portal:
+        courses = scan(portal)
+        saved = fill(portal, courses, log=messages.append)
+
+        assert saved == [True] * 4
+        assert portal.saved_count() == 4
+        assert portal.rejected == []
+    assert any("sesi login berakhir" in message for message in messages)
+
+
+def test_only_a_return_to_detail_counts_as_saved():
+    with MockPortal(MockPortalConfig(courses=1, sarpras=False)) as portal:
+        course = scan(portal)[0]
+        http = HttpPortal(portal.url)
+        http.open_epbm_detail(CREDENTIALS, lambda message: None)
+        # A portal answering the POST with the form again, as it does with validation errors
+        request = http.request
+        http.request = lambda url, fields=None: request(course['href'] if fields is not None else url)
+        saved = fill(portal, [course], portal_session=http)
+
+        assert saved == [False]
+        assert portal.saved_count() == 0
+
+
+def test_is_saved_html():
+    detail = parse_html("<html><body><div class='card'></div></body></html>")
+    form = parse_html("<html><body><form><div class='alert alert-danger'>Belum lengkap</div></form></body></html>")
+    success = parse_html("<html><body><div class='alert alert-success'>EPBM berhasil disimpan</div></body></html>")
+
+    assert is_saved_html("https://portal/Akademik/EPBM/Detail", detail)
+    assert not is_saved_html("https://portal/Akademik/EPBM/Isi/1", form)
+    assert is_saved_html("https://portal/Akademik/EPBM/Isi/1", success)
+
+
+def test_cards_without_a_link():
+    root = parse_html("""
+        <div class="btn card small-box" href="/Akademik/EPBM/Isi/1"><div class="card-header"><h4>KOM201</h4></div></div>
+        <div class="btn card small-box"><div class="card-header"><h4>KOM202</h4></div></div>
+        <div class="btn card small-box"><div class="card-header"><h4>KOM203</h4></div>
+            <i class="fa fa-check-circle text-success"></i></div>
+    """)
+    courses = parse_course_cards(root, "https://portal/Akademik/EPBM/Detail")
+
+    # An open card without its form's link is left out instead of pointing at the Detail page
+    assert [(course['title'], course['href']) for course in courses] == [
+        ("KOM201", "https://portal/Akademik/EPBM/Isi/1"), ("KOM203", None)]
@@ -0,0 +1,137 @@
+"""Resuming a run from its journal, and the journal going away once the run is done."""
+
+import json
+
+from benchmark import benchmark_settings
+from journal import RunJournal
+from mock_portal import MockPortal, MockPortalConfig
+
+CREDENTIALS = {'username': "mahasiswa", 'password': "rahasia"}
+
+
+def course(number, is_sarpras=False):
+    return {'title': f"KOM20{number}", 'desc': "Kuliah", 'href': f"http://portal/EPBM/Isi/{number}",
+            'is_completed': False, 'is_sarpras': is_sarpras}
+
+
+def hrefs(courses):
+    return [course['href'] for course in courses]
+
+
+def test_pending_without_journal(tmp_path):
+    assert RunJournal(str(tmp_path / "run.jsonl")).pending() is None
+
+
+def test_pending_skips_saved_courses(tmp_path):
+    journal = RunJournal(str(tmp_path / "run.jsonl"))
+    courses = [course(1), course(2), course(3)]
+    journal.start(courses)
+    journal.page_done(courses[0], 1)
+    journal.saved(courses[0])
+    journal.page_done(courses[1], 1)
+    journal.page_done(courses[1], 2)
+    journal.close()
+
+    remaining, pages = RunJournal(journal.path).pending()
+    assert hrefs(remaining) == hrefs(courses[1:])
+    assert pages[courses[1]['href']] == 2
+
+
+def test_unconfirmed_save_is_pending_again(tmp_path):
+    journal = RunJournal(str(tmp_path / "run.jsonl"))
+    courses = [course(1), course(2)]
+    journal.start(courses)
+    journal.saved(courses[0])
+    journal.saved(courses[1])
+    journal.unconfirmed(courses[1])
+    journal.close()
+
+    remaining, _ = RunJournal(journal.path).pending()
+    assert hrefs(remaining) == hrefs(courses[1:])
+
+
+def test_streamed_courses_are_pending(tmp_path):
+    journal = RunJournal(str(tmp_path / "run.jsonl"))
+    journal.start([])
+    journal.add(course(1))
+    journal.add(course(2, is_sarpras=True))
+    journal.saved(course(1))
+    journal.close()
+
+    remaining, _ = RunJournal(journal.path).pending()
+    assert hrefs(remaining) == [course(2)['href']]
+    assert remaining[0]['is_sarpras']
+
+
+def test_start_replaces_the_older_run(tmp_path):
+    journal = RunJournal(str(tmp_path / "run.jsonl"))
+    journal.start([course(1)])
+    journal.start([course(2)])
+    journal.close()
+
+    remaining, _ = RunJournal(journal.path).pending()
+    assert hrefs(remaining) == [course(2)['href']]
+
+
+def test_truncated_line_after_a_crash(tmp_path):
+    journal = RunJournal(str(tmp_path / "run.jsonl"))
+    courses = [course(1), course(2)]
+    journal.start(courses)
+    journal.close()
+    # The record being written when the process died
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({'event': 'saved', 'href': courses[0]['href']})[:20])
+
+    resumed = RunJournal(journal.path)
+    remaining, _ = resumed.pending()
+    assert hrefs(remaining) == hrefs(courses)
+
+    # The next record goes on a line of its own instead of onto the cut one
+    resumed.saved(courses[0])
+    resumed.close()
+    remaining, _ = RunJournal(journal.path).pending()
+    assert hrefs(remaining) == hrefs(courses[1:])
+
+
+def test_finish_keeps_the_journal_while_courses_are_pending(tmp_path):
+    journal = RunJournal(str(tmp_path / "run.jsonl"))
+    courses = [course(1), course(2)]
+    journal.start(courses)
+    journal.saved(courses[0])
+    journal.finish()
+    assert (tmp_path / "run.jsonl").exists()
+
+    journal.saved(courses[1])
+    journal.finish()
+    assert not (tmp_path / "run.jsonl").exists()
+
+
+def test_resume_after_a_crash_fills_the_rest(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path))
+    from runner import fill_selected_courses, open_journal, scan_courses_http
+
+    with MockPortal(MockPortalConfig(courses=3, sarpras=False)) as portal:
+        settings = benchmark_settings(portal.url, "http", 1)
+        courses, session = scan_courses_http(CREDENTIALS, lambda message: None, portal.url, keep_session=False)
+
+        # The run died after saving the first course
+        journal, resumed = open_journal(CREDENTIALS, settings, lambda message: None)
+        assert resumed is None
+        journal.start(courses)
+        fill_selected_courses(CREDENTIALS, settings, courses[:1], lambda message: None,
+                              lambda percent, eta: None)
+        journal.saved(courses[0])
+        journal.close()
+
+        journal, resumed = open_journal(CREDENTIALS, settings, lambda message: None, resume=True)
+        assert hrefs(resumed) == hrefs(courses[1:])
+        journal.resume(resumed)
+        saved = fill_selected_courses(CREDENTIALS, settings, resumed, lambda message: None,
+                                      lambda percent, eta: None, journal=journal)
+        submissions = portal.saved_count()
+
+    assert saved == [True, True]
+    assert submissions == 3
+    # Nothing left to resume, the journal is gone
+    assert open_journal(CREDENTIALS, settings, lambda message: None, resume=True)[1] is None
+    assert list((tmp_path / "AutoEPBM" / "journal").iterdir()) == []
@@ -0,0 +1,169 @@
+"""Sorting errors into kinds, and the retries RecoveryPolicy.attempt gives each kind at each level."""
+
+import urllib.error
+
+import pytest
+
+from cdp_driver import CdpError
+from portal_pages import LoginError
+from recovery import (BROWSER_LOST, CLICK_INTERCEPTED, COURSE, ELEMENT, LOGIN_FAILED, NAVIGATING, PAGE, RULES,
+                      SERVER_ERROR, SESSION, SESSION_EXPIRED, STALE_ELEMENT, TIMEOUT, UNKNOWN, RecoveryPolicy,
+                      SessionExpired, classify)
+from waits import WaitTimeout
+
+
+# Stand-ins for Selenium's exceptions, classify goes by class name
+class WebDriverException(Exception):
+    pass
+
+
+class StaleElementReferenceException(WebDriverException):
+    pass
+
+
+class ElementClickInterceptedException(WebDriverException):
+    pass
+
+
+class InvalidSessionIdException(WebDriverException):
+    pass
+
+
+@pytest.mark.parametrize("error, kind", [
+    (LoginError("Login gagal"), LOGIN_FAILED),
+    (SessionExpired("login"), SESSION_EXPIRED),
+    (StaleElementReferenceException("stale"), STALE_ELEMENT),
+    (ElementClickInterceptedException("covered"), CLICK_INTERCEPTED),
+    (InvalidSessionIdException("gone"), BROWSER_LOST),
+    (WebDriverException("chrome not reachable"), BROWSER_LOST),
+    (CdpError("Koneksi DevTools terputus."), BROWSER_LOST),
+    (WebDriverException("Execution context was destroyed"), NAVIGATING),
+    (WaitTimeout("Timeout 3 detik"), TIMEOUT),
+    (CdpError("Perintah DevTools melebihi 30 detik."), TIMEOUT),
+    (WebDriverException("unknown error: net::ERR_CONNECTION_RESET"), SERVER_ERROR),
+    (urllib.error.HTTPError("http://portal", 503, "Unavailable", {}, None), SERVER_ERROR),
+    (urllib.error.HTTPError("http://portal", 404, "Not Found", {}, None), UNKNOWN),
+    (ConnectionResetError(), SERVER_ERROR),
+    (ValueError("bad form"), UNKNOWN),
+])
+def test_classify(error, kind):
+    assert classify(error) == kind
+
+
+class Failing:
+    """An action raising the given errors one after the other, then returning "done"."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "done"
+
+
+@pytest.fixture
+def policy():
+    messages = []
+    policy = RecoveryPolicy(messages.append, sleep=lambda seconds: None)
+    policy.messages = messages
+    return policy
+
+
+def test_recovers_at_its_own_level(policy):
+    action = Failing(StaleElementReferenceException("stale"))
+    assert policy.attempt(action, ELEMENT) == "done"
+    assert action.calls == 2
+    assert any("Pemulihan (elemen)" in message for message in policy.messages)
+
+
+@pytest.mark.parametrize("error, level", [
+    (WaitTimeout("Timeout"), PAGE),
+    (ValueError("bad form"), COURSE),
+    (SessionExpired("login"), SESSION),
+    (CdpError("Koneksi DevTools terputus."), SESSION),
+])
+def test_escalates_to_a_more_expensive_level(policy, error, level):
+    # The cheaper levels leave the error to their caller, the error's own level retries it
+    for cheaper in range(ELEMENT, level):
+        with pytest.raises(type(error)):
+            policy.attempt(Failing(error), cheaper)
+    assert policy.attempt(Failing(error), level) == "done"
+
+
+def test_a_more_expensive_level_retries_cheaper_errors(policy):
+    action = Failing(StaleElementReferenceException("stale"), WaitTimeout("Timeout"))
+    assert policy.attempt(action, SESSION) == "done"
+    assert action.calls == 3
+
+
+@pytest.mark.parametrize("error, kind", [
+    (StaleElementReferenceException("stale"), STALE_ELEMENT),
+    (WaitTimeout("Timeout"), TIMEOUT),
+    (ConnectionResetError(), SERVER_ERROR),
+    (SessionExpired("login"), SESSION_EXPIRED),
+])
+def test_retries_are_bounded(policy, error, kind):
+    action = Failing(*[error] * (RULES[kind].attempts + 1))
+    with pytest.raises(type(error)) as raised:
+        policy.attempt(action, SESSION)
+    assert action.calls == RULES[kind].attempts + 1
+    assert raised.value.recovery_given_up
+    assert any("menyerah" in message for message in policy.messages)
+
+
+def test_given_up_error_is_not_retried_further_up(policy):
+    error = WaitTimeout("Timeout")
+    with pytest.raises(WaitTimeout):
+        policy.attempt(Failing(*[error] * (RULES[TIMEOUT].attempts + 1)), PAGE)
+
+    action = Failing(error)
+    with pytest.raises(WaitTimeout):
+        policy.attempt(action, SESSION)
+    assert action.calls == 1
+
+
+def test_failed_login_is_never_retried(policy):
+    action = Failing(LoginError("Login gagal"))
+    with pytest.raises(LoginError):
+        policy.attempt(action, SESSION)
+    assert action.calls == 1
+
+
+def test_fallback_replaces_the_action_when_the_level_allows_it(policy):
+    fallback = Failing()
+    action = Failing(ElementClickInterceptedException("covered"))
+    assert policy.attempt(action, ELEMENT, fallback=fallback) == "done"
+    assert (action.calls, fallback.calls) == (1, 1)
+
+
+def test_no_fallback_for_an_error_of_a_more_expensive_level(policy):
+    fallback = Failing()
+    with pytest.raises(WaitTimeout):
+        policy.attempt(Failing(WaitTimeout("Timeout")), ELEMENT, fallback=fallback)
+    assert fallback.calls == 0
+
+
+def test_recover_runs_before_each_retry(policy):
+    kinds = []
+    action = Failing(SessionExpired("login"))
+    assert policy.attempt(action, SESSION, recover=lambda kind: kinds.append(kind) or True) == "done"
+    assert kinds == [SESSION_EXPIRED]
+
+
+def test_recover_can_refuse(policy):
+    action = Failing(CdpError("Koneksi DevTools terputus."))
+    with pytest.raises(CdpError):
+        policy.attempt(action, SESSION, recover=lambda kind: False)
+    assert action.calls == 1
+
+
+def test_backoff_doubles(policy):
+    delays = []
+    policy.sleep = delays.append
+    action = Failing(*[ConnectionResetError()] * RULES[SERVER_ERROR].attempts)
+    assert policy.attempt(action, PAGE) == "done"
+    backoff = RULES[SERVER_ERROR].backoff
+    assert delays == [backoff * 2 ** attempt for attempt in range(RULES[SERVER_ERROR].attempts)]
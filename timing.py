@@ -0,0 +1,112 @@
+"""Timing spans of a run, per phase and per course.
+
+Every phase of a run (driver start, login, opening a form, each
+questionnaire page, saving...) is recorded as a span. At the end of a run
+the spans are written as JSON and CSV under the data directory and
+summarised as p50/p95 per phase.
+"""
+
+import contextlib
+import csv
+import json
+import math
+import os
+import threading
+import time
+
+from app_paths import create_timestamped, data_dir
+
+METRICS_DIR = "metrics"
+
+PHASE_LABELS = {
+    'driver_start': "Menyalakan browser",
+    'open_detail': "Membuka halaman Detail",
+    'login': "Login",
+    'scan': "Memindai mata kuliah",
+    'open_form': "Membuka form",
+    'page': "Mengisi satu halaman",
+    'next_page': "Menunggu halaman berikutnya",
+    'save': "Menyimpan",
+    'modal': "Menutup dialog",
+    'course': "Satu mata kuliah",
+    'verify': "Memeriksa hasil",
+    'recover_element': "Pemulihan elemen",
+    'recover_page': "Pemulihan halaman",
+    'recover_course': "Pemulihan mata kuliah",
+    'recover_session': "Pemulihan sesi",
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of the values."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class RunTimer:
+    """Collects the spans of one run from every filler thread."""
+
+    def __init__(self, spans=()):
+        self.spans = list(spans)
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, phase, course=None):
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(phase, time.perf_counter() - start, course, started)
+
+    def record(self, phase, seconds, course=None, started=None):
+        span = {
+            'phase': phase,
+            'course': f"{course['title']}: {course['desc']}" if course else "",
+            'seconds': round(seconds, 4),
+            'started': started if started is not None else time.time() - seconds,
+            'thread': threading.current_thread().name,
+        }
+        with self.lock:
+            self.spans.append(span)
+
+    def summary(self):
+        """Count, total, p50 and p95 seconds per phase, in the order the phases were first seen."""
+        with self.lock:
+            spans = list(self.spans)
+        durations = {}
+        for span in spans:
+            durations.setdefault(span['phase'], []).append(span['seconds'])
+        return {phase: {'count': len(values), 'total': sum(values),
+                        'p50': percentile(values, 0.5), 'p95': percentile(values, 0.95)}
+                for phase, values in durations.items()}
+
+    def summary_lines(self):
+        lines = []
+        for phase, stats in self.summary().items():
+            label = PHASE_LABELS.get(phase, phase)
+            lines.append(f"{label}: p50 {stats['p50']:.2f} dtk, p95 {stats['p95']:.2f} dtk ({stats['count']}x)")
+        return lines
+
+    def export(self, directory=None):
+        """Write the spans as JSON and CSV, returns both paths."""
+        directory = directory or data_dir(METRICS_DIR)
+        with self.lock:
+            spans = list(self.spans)
+
+        # The JSON file claims the name, the CSV file goes next to it
+        with create_timestamped(directory, "run", ".json") as f:
+            json_path = f.name
+            json.dump({'spans': spans, 'summary': self.summary()}, f, indent=2)
+        csv_path = os.path.splitext(json_path)[0] + ".csv"
+        with open(csv_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=['phase', 'course', 'seconds', 'started', 'thread'])
+            writer.writeheader()
+            writer.writerows(spans)
+        return json_path, csv_path
+
+
+def timed(timer, phase, course=None):
+    """The timer's span, or nothing when there is no timer."""
+    return timer.span(phase, course) if timer is not None else contextlib.nullcontext()
@@ -0,0 +1,79 @@
+"""Checking once a run is done which saves the portal actually recorded.
+
+A save only shows that the portal reacted to the button; the check mark on
+the course's card on the Detail page (is_completed of a scanned card) is
+what says it was recorded. Instead of waiting for it after every save, the
+run loads the Detail page once at the end and checks every course against
+that one read of its cards. Courses without the check mark are reported
+and, with the "requeue_unconfirmed" setting, filled once more.
+"""
+
+from timing import timed
+
+
+def find_card(course, by_href, by_name):
+    return by_href.get(course.get('href')) or by_name.get((course['title'], course['desc']))
+
+
+def verify_saves(courses, read_cards, log, timer=None, journal=None):
+    """Whether each course has its check mark, from one read of the Detail page.
+
+    read_cards() loads the Detail page and returns its cards. Returns None
+    when the page can't be read. The journal, when given, records what was
+    confirmed, so a resumed run fills again what wasn't.
+    """
+    log("\nMemeriksa hasil pengisian di halaman Detail...")
+    try:
+        with timed(timer, "verify"):
+            cards = read_cards()
+    except Exception as e:
+        log(f"Gagal memeriksa hasil pengisian: {e}")
+        return None
+
+    by_href = {card['href']: card for card in cards}
+    by_name = {(card['title'], card['desc']): card for card in cards}
+    confirmed = []
+    for course in courses:
+        card = find_card(course, by_href, by_name)
+        confirmed.append(card is not None and card['is_completed'])
+        if journal is not None:
+            if confirmed[-1]:
+                journal.saved(course)
+            else:
+                journal.unconfirmed(course)
+
+    log(f"Terkonfirmasi tersimpan: {sum(confirmed)}/{len(courses)} mata kuliah.")
+    for course, ok in zip(courses, confirmed):
+        if not ok:
+            log(f"Belum terkonfirmasi: {course['title']}: {course['desc']}")
+    return confirmed
+
+
+def verify_run(courses, saved, read_cards, refill, settings, log, timer=None, journal=None):
+    """Check the run's courses, filling the unconfirmed ones once more when the settings ask for it.
+
+    saved holds the fill results, which are kept when the Detail page
+    can't be read. refill(courses) fills the given courses and returns
+    their results. Returns whether each course is confirmed.
+    """
+    if not courses:
+        return saved
+    confirmed = verify_saves(courses, read_cards, log, timer, journal)
+    if confirmed is None:
+        return saved
+
+    retry = [position for position, ok in enumerate(confirmed) if not ok]
+    if not retry or not settings.get('requeue_unconfirmed'):
+        return confirmed
+
+    batch = [courses[position] for position in retry]
+    log(f"\nMengisi ulang {len(batch)} mata kuliah yang belum terkonfirmasi...")
+    try:
+        refill(batch)
+    except Exception as e:
+        log(f"Pengisian ulang gagal: {e}")
+        return confirmed
+    again = verify_saves(batch, read_cards, log, timer, journal)
+    for position, ok in zip(retry, again or ()):
+        confirmed[position] = ok
+    return confirmed
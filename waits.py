@@ -0,0 +1,156 @@
+"""Compound page conditions for the fill loop.
+
+All conditions of a wait are checked together in a single script call, and
+the wait returns the name of the first one that holds, so a step can move on
+as soon as the page is ready instead of sleeping for a fixed time.
+
+On a driver that awaits promises in the page (cdp_driver) the wait itself
+runs in the page: a MutationObserver re-checks the conditions whenever the
+DOM changes and the script returns once one holds, instead of the driver
+polling every DEFAULT_POLL_INTERVAL.
+"""
+
+import time
+
+DEFAULT_POLL_INTERVAL = 0.05
+
+CONDITION_SCRIPT = """
+const conditions = arguments[0];
+const elements = css => Array.from(document.querySelectorAll(css));
+const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+const loaded = () => document.readyState !== 'loading';
+function holds(c) {
+    switch (c.type) {
+        case 'present': return document.querySelector(c.css) !== null;
+        case 'absent': return loaded() && document.querySelector(c.css) === null;
+        case 'visible': return elements(c.css).some(visible);
+        case 'text': return elements(c.css).some(el => c.texts.some(t => el.textContent.includes(t)));
+        case 'url_contains': return location.href.toLowerCase().includes(c.text);
+        case 'url_not_contains': return loaded() && !location.href.toLowerCase().includes(c.text);
+        case 'url_changed': return loaded() && location.href !== c.url;
+        case 'heading_changed': {
+            const heading = elements(c.css).find(visible);
+            return heading !== undefined && heading.textContent.replace(/\\s+/g, ' ').trim() !== c.text;
+        }
+    }
+    return false;
+}
+for (let i = 0; i < conditions.length; i++) {
+    if (holds(conditions[i])) return i;
+}
+return -1;
+"""
+
+
+# Resolves with the index of the first condition that holds, or -1 after arguments[1] ms
+AWAIT_CONDITION_SCRIPT = """
+const conditions = arguments[0];
+const check = () => (function () {
+""" + CONDITION_SCRIPT + """
+}).apply(null, [conditions]);
+const first = check();
+if (first >= 0) return first;
+return new Promise(resolve => {
+    const done = index => {
+        observer.disconnect();
+        clearInterval(fallback);
+        clearTimeout(limit);
+        resolve(index);
+    };
+    const recheck = () => { const index = check(); if (index >= 0) done(index); };
+    const observer = new MutationObserver(recheck);
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    // Layout and readyState changes don't show up as mutations
+    const fallback = setInterval(recheck, 250);
+    const limit = setTimeout(() => done(-1), arguments[1]);
+});
+"""
+# Time the driver gets on top of the in-page timeout to return the answer
+AWAIT_MARGIN = 5
+
+
+class WaitTimeout(TimeoutError):
+    """None of the conditions of a wait held before its timeout."""
+
+
+def present(css):
+    return {'type': 'present', 'css': css}
+
+
+def absent(css):
+    return {'type': 'absent', 'css': css}
+
+
+def visible(css):
+    return {'type': 'visible', 'css': css}
+
+
+def text_in(css, *texts):
+    return {'type': 'text', 'css': css, 'texts': list(texts)}
+
+
+def button_text(text):
+    return text_in("button", text)
+
+
+def url_contains(text):
+    return {'type': 'url_contains', 'text': text.lower()}
+
+
+def url_not_contains(text):
+    return {'type': 'url_not_contains', 'text': text.lower()}
+
+
+def url_changed(previous):
+    return {'type': 'url_changed', 'url': previous}
+
+
+def heading_changed(previous, css="h5"):
+    return {'type': 'heading_changed', 'css': css, 'text': " ".join(previous.split())}
+
+
+class Waiter:
+    def __init__(self, driver, poll=DEFAULT_POLL_INTERVAL):
+        self.driver = driver
+        self.poll = poll
+
+    def check(self, **conditions):
+        """Name of the first condition that holds right now, or None."""
+        names = list(conditions)
+        try:
+            index = self.driver.execute_script(CONDITION_SCRIPT, [conditions[name] for name in names])
+        except Exception:
+            # The page is in the middle of navigating
+            return None
+        if index is None or index < 0:
+            return None
+        return names[index]
+
+    def until(self, timeout, **conditions):
+        """Wait until any of the named conditions holds and return its name."""
+        deadline = time.monotonic() + timeout
+        if getattr(self.driver, 'awaits_promises', False):
+            return self.until_pushed(deadline, timeout, conditions)
+        while True:
+            name = self.check(**conditions)
+            if name is not None:
+                return name
+            if time.monotonic() >= deadline:
+                raise WaitTimeout(f"Timeout {timeout} detik menunggu: {', '.join(conditions)}")
+            time.sleep(self.poll)
+
+    def until_pushed(self, deadline, timeout, conditions):
+        names = list(conditions)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise WaitTimeout(f"Timeout {timeout} detik menunggu: {', '.join(conditions)}")
+            try:
+                index = self.driver.execute_script(AWAIT_CONDITION_SCRIPT, [conditions[name] for name in names],
+                                                   int(remaining * 1000), timeout=remaining + AWAIT_MARGIN)
+            except Exception:
+                # Navigating away drops the page's script, wait on the new page
+                time.sleep(self.poll)
+                continue
+            if index is not None and index >= 0:
+                return names[index]
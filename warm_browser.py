@@ -0,0 +1,105 @@
+"""A headless browser started ahead of time, while the user is still typing.
+
+Starting Chrome and the first load of the portal take a few seconds. The
+window starts one in the background as soon as the user begins entering
+credentials, already showing the portal's login page, and the course scan
+claims it instead of starting its own. A warm browser nobody claims is
+closed after IDLE_TIMEOUT so it doesn't hold on to memory.
+"""
+
+import threading
+
+from portal_pages import EPBM_DETAIL_PATH, PORTAL_URL, SELENIUM_ENGINE, STANDARD_PROFILE
+
+IDLE_TIMEOUT = 120
+# How long a claim waits for a browser that is still starting
+LAUNCH_WAIT = 30
+
+
+class WarmBrowser:
+    """At most one speculatively started browser, handed out once."""
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        self.key = None
+        self.session = None
+        self.launcher = None
+        self.idle_timer = None
+
+    def start(self, profile=STANDARD_PROFILE, portal_url=PORTAL_URL, engine=SELENIUM_ENGINE):
+        """Start a browser for this profile, portal and engine, unless one is already starting or waiting."""
+        key = (profile, portal_url, engine)
+        with self.lock:
+            if self.key == key:
+                # Still wanted, the idle time starts over once it is ready
+                if self.session is not None:
+                    self.reset_idle_timer()
+                return
+            stale = self.take()
+            self.key = key
+            self.launcher = threading.Thread(target=self.launch, args=(key,), daemon=True)
+            self.launcher.start()
+        if stale is not None:
+            # start runs on the UI thread, quitting Chrome can take a moment
+            threading.Thread(target=stale.close, daemon=True).start()
+
+    def launch(self, key):
+        from portal import PortalSession, create_driver
+
+        profile, portal_url, engine = key
+        session = None
+        try:
+            driver = create_driver(True, profile, portal_url, engine=engine)
+            session = PortalSession(driver, None, True, profile, portal_url, engine=engine)
+            # Lands on the login page, its scripts and styles are cached for the real visit
+            driver.get(portal_url.rstrip("/") + EPBM_DETAIL_PATH)
+        except Exception:
+            # Only a head start, the scan starts its own browser when this one failed
+            pass
+
+        with self.lock:
+            if self.key == key and self.session is None:
+                self.session, session = session, None
+                self.reset_idle_timer()
+        if session is not None:
+            # Released or replaced while starting
+            session.close()
+
+    def claim(self, profile=STANDARD_PROFILE, portal_url=PORTAL_URL, engine=SELENIUM_ENGINE, wait=LAUNCH_WAIT):
+        """The warm browser as a PortalSession without a user, or None when there is none for this profile."""
+        key = (profile, portal_url, engine)
+        with self.lock:
+            launcher = self.launcher if self.key == key else None
+        if launcher is None:
+            return None
+        launcher.join(wait)
+
+        with self.lock:
+            if self.key != key:
+                return None
+            return self.take()
+
+    def take(self):
+        # Called with the lock held
+        if self.idle_timer is not None:
+            self.idle_timer.cancel()
+            self.idle_timer = None
+        session, self.session = self.session, None
+        self.key = self.launcher = None
+        return session
+
+    def reset_idle_timer(self):
+        # Called with the lock held
+        if self.idle_timer is not None:
+            self.idle_timer.cancel()
+        self.idle_timer = threading.Timer(self.idle_timeout, self.release)
+        self.idle_timer.daemon = True
+        self.idle_timer.start()
+
+    def release(self):
+        """Close the warm browser, also one that is still starting."""
+        with self.lock:
+            session = self.take()
+        if session is not None:
+            session.close()